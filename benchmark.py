@@ -0,0 +1,450 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import main
+
+
+BENCHMARK_TABLES = {
+    'narrow': {
+        'scale': 1.0,
+        'columns': [
+            ('a', 'int', 'INT', None),
+            ('b', 'varchar', 'VARCHAR(32)', 32),
+        ],
+    },
+    'wide': {
+        'scale': 0.5,
+        'columns': (
+            [(f'i{n}', 'int', 'INT', None) for n in range(10)]
+            + [(f's{n}', 'varchar', 'VARCHAR(64)', 64) for n in range(10)]
+            + [(f'f{n}', 'double', 'DOUBLE', None) for n in range(5)]
+            + [(f't{n}', 'datetime', 'DATETIME', None) for n in range(5)]
+            + [(f'd{n}', 'decimal', 'DECIMAL(18,4)', None) for n in range(5)]
+        ),
+    },
+    'blob_heavy': {
+        'scale': 0.05,
+        'columns': [
+            ('name', 'varchar', 'VARCHAR(64)', 64),
+            ('payload', 'longblob', 'LONGBLOB', None),
+        ],
+    },
+    'decimal_heavy': {
+        'scale': 0.5,
+        'columns': [(f'd{n}', 'decimal', 'DECIMAL(18,4)', None) for n in range(12)],
+    },
+    'text_heavy': {
+        'scale': 0.2,
+        'columns': (
+            [('title', 'varchar', 'VARCHAR(255)', 255)]
+            + [(f'body{n}', 'text', 'TEXT', None) for n in range(4)]
+        ),
+    },
+}
+
+STAGES = ('read', 'convert', 'encode', 'export', 'import')
+
+def table_columns(spec):
+    """Obtener las columnas de una tabla sintética con el formato del catálogo de main.py"""
+    columns = [['id', 'int', None, 'NO', None]]
+    for name, data_type, _, max_length in spec['columns']:
+        columns.append([name, data_type, max_length, 'YES', None])
+    return columns
+
+def random_text(rng, length):
+    alphabet = 'abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789áéíóúñ,;"\n'
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+def generate_value(rng, data_type, max_length):
+    """Generar un valor sintético para un tipo de MySQL, con un 10% de NULL"""
+    if rng.random() < 0.1:
+        return None
+    if data_type == 'int':
+        return rng.randint(-2 ** 31, 2 ** 31 - 1)
+    if data_type == 'varchar':
+        return random_text(rng, rng.randint(0, max_length))
+    if data_type == 'text':
+        return random_text(rng, rng.randint(500, 2000))
+    if data_type == 'double':
+        return rng.uniform(-1e9, 1e9)
+    if data_type == 'decimal':
+        return Decimal(rng.randint(-10 ** 17, 10 ** 17)).scaleb(-4)
+    if data_type == 'datetime':
+        return datetime(2000, 1, 1) + timedelta(seconds=rng.randint(0, 30 * 365 * 86400), microseconds=rng.randint(0, 999999))
+    if data_type == 'date':
+        return date(2000, 1, 1) + timedelta(days=rng.randint(0, 30 * 365))
+    if data_type == 'longblob':
+        size = rng.randint(8 * 1024, 32 * 1024)
+        return rng.getrandbits(size * 8).to_bytes(size, 'little')
+    raise ValueError(f"Tipo sintético no soportado: {data_type}")
+
+def generate_rows(spec, row_count, seed):
+    """Generar de forma reproducible las filas de una tabla sintética"""
+    rng = random.Random(seed)
+    return [
+        (row_id,) + tuple(generate_value(rng, data_type, max_length) for _, data_type, _, max_length in spec['columns'])
+        for row_id in range(1, row_count + 1)
+    ]
+
+class FakeMySQLCursor:
+    """Cursor DB-API en memoria que devuelve las filas de una tabla sintética"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.position = 0
+        self.description = None
+
+    def execute(self, sql, params=None):
+        table_name = sql.split(' FROM ', 1)[1].split()[0].strip('`')
+        columns, self.rows = self.connection.tables[table_name]
+        self.description = [(col[0],) for col in columns]
+        self.position = 0
+
+    def fetchmany(self, size=1):
+        rows = self.rows[self.position:self.position + size]
+        self.position += size
+        return rows
+
+    def fetchall(self):
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+    def close(self):
+        pass
+
+class FakeMySQLConnection:
+    """Conexión DB-API en memoria que sustituye a MySQL cuando no hay una instancia disponible"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self, *args, **kwargs):
+        return FakeMySQLCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakePostgresCursor:
+    """Cursor DB-API en memoria que consume los datos de COPY como lo haría el servidor"""
+
+    def __init__(self):
+        self.rowcount = 0
+
+    def copy_expert(self, sql, stream, size=64 * 1024):
+        while stream.read(size):
+            pass
+
+    def execute(self, sql, params=None):
+        pass
+
+    def close(self):
+        pass
+
+class FakePostgresConnection:
+    """Conexión DB-API en memoria que sustituye a PostgreSQL cuando no hay una instancia disponible"""
+
+    def cursor(self):
+        return FakePostgresCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeDriver:
+    """Ejecuta el benchmark contra las conexiones en memoria"""
+    name = 'fake'
+
+    def __init__(self):
+        self.tables = {}
+
+    def prepare(self, table_name, spec, columns, rows):
+        self.tables[table_name] = (columns, rows)
+
+    def mysql_connection(self):
+        return FakeMySQLConnection(self.tables)
+
+    def pg_connection(self):
+        return FakePostgresConnection()
+
+    def reset_target(self, pg_conn, table_name, columns):
+        pass
+
+    def cleanup(self):
+        self.tables.clear()
+
+class LiveDriver:
+    """Ejecuta el benchmark contra instancias locales desechables de MySQL y PostgreSQL"""
+    name = 'live'
+
+    def __init__(self, args):
+        self.args = args
+        self.mysql_conn = self.mysql_connection()
+        self.pg_conn = self.pg_connection()
+        if not self.mysql_conn or not self.pg_conn:
+            raise RuntimeError("no se pudo conectar a las bases de datos del benchmark")
+        self.created = []
+
+    def mysql_connection(self):
+        args = self.args
+        return main.connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+
+    def pg_connection(self):
+        args = self.args
+        return main.connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+
+    def prepare(self, table_name, spec, columns, rows):
+        """Crear la tabla sintética en MySQL y cargar sus filas"""
+        cursor = self.mysql_conn.cursor()
+        definitions = ['`id` INT NOT NULL PRIMARY KEY'] + [f'`{name}` {ddl} NULL' for name, _, ddl, _ in spec['columns']]
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(f"CREATE TABLE {table_name} ({', '.join(definitions)})")
+        placeholders = ', '.join(['%s'] * len(columns))
+        for start in range(0, len(rows), 1000):
+            cursor.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", rows[start:start + 1000])
+        self.mysql_conn.commit()
+        cursor.close()
+        self.created.append(table_name)
+        main.create_postgresql_table(self.pg_conn, table_name, columns)
+
+    def reset_target(self, pg_conn, table_name, columns):
+        cursor = pg_conn.cursor()
+        cursor.execute(f'TRUNCATE "{table_name}"')
+        pg_conn.commit()
+        cursor.close()
+
+    def cleanup(self):
+        """Eliminar las tablas sintéticas de ambas bases de datos"""
+        mysql_cursor = self.mysql_conn.cursor()
+        pg_cursor = self.pg_conn.cursor()
+        for table_name in self.created:
+            mysql_cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+            pg_cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        self.mysql_conn.commit()
+        self.pg_conn.commit()
+        mysql_cursor.close()
+        pg_cursor.close()
+        self.mysql_conn.close()
+        self.pg_conn.close()
+
+def measure(func, repeat):
+    """Ejecutar una etapa varias veces y quedarse con la más rápida; el pico de memoria se mide en una ejecución aparte con tracemalloc"""
+    best = None
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        output = func()
+        elapsed = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        if best is None or elapsed < best['seconds']:
+            best = {'seconds': elapsed, 'cpu_seconds': cpu, 'output': output}
+    
+    tracemalloc.start()
+    try:
+        func()
+        best['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+    return best
+
+def quietly(func, *args, **kwargs):
+    """Llamar a una función de main.py sin mostrar sus mensajes de progreso, que se muestran si falla"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = func(*args, **kwargs)
+    if not result:
+        raise RuntimeError(output.getvalue().strip() or f"{func.__name__} falló")
+    return result
+
+def skipped_stages(encoder, columns):
+    """Etapas que no hacen trabajo con el formato de COPY y el esquema de la tabla, con el motivo"""
+    if not hasattr(encoder, 'convert'):
+        return {'convert': 'el formato binary codifica los valores sin convertirlos'}
+    if not any(main.csv_column_converter(col) for col in columns):
+        return {'convert': 'ninguna columna necesita conversión para CSV'}
+    return {}
+
+def benchmark_table(driver, table_name, columns, row_count, args):
+    """Medir por separado la lectura, la conversión y la codificación de una tabla, y la exportación e importación con las funciones de main.py"""
+    encoder = main.make_row_encoder(args.copy_format, columns, include_header=True)
+    skipped = skipped_stages(encoder, columns)
+    mysql_conn = driver.mysql_connection()
+    pg_conn = driver.pg_connection()
+    output_dir = tempfile.mkdtemp(prefix='benchmark_')
+    
+    def read():
+        cursor = mysql_conn.cursor()
+        select_sql, params = main.build_select_sql(table_name)
+        cursor.execute(select_sql, params)
+        batches = []
+        rows = cursor.fetchmany(args.batch_size)
+        while rows:
+            batches.append(rows)
+            rows = cursor.fetchmany(args.batch_size)
+        cursor.close()
+        mysql_conn.rollback()
+        return batches
+    
+    def export():
+        return quietly(main.export_table_data, mysql_conn, table_name, output_dir, encoder=encoder)
+    
+    def load():
+        driver.reset_target(pg_conn, table_name, columns)
+        return quietly(main.import_table_data, pg_conn, table_name, data_file, columns=columns)
+    
+    try:
+        measured = {}
+        measured['read'] = measure(read, args.repeat)
+        batches = measured['read'].pop('output')
+        if 'convert' not in skipped:
+            measured['convert'] = measure(lambda batches=batches: [list(encoder.convert(rows)) for rows in batches],
+                                          args.repeat)
+            measured['convert'].pop('output')
+        measured['encode'] = measure(lambda batches=batches: [encoder.encode(rows) for rows in batches], args.repeat)
+        measured['encode'].pop('output')
+        del batches
+        measured['export'] = measure(export, args.repeat)
+        data_file = measured['export']['output']
+        megabytes = os.path.getsize(data_file) / (1024 * 1024)
+        measured['import'] = measure(load, args.repeat)
+    finally:
+        mysql_conn.close()
+        pg_conn.close()
+        for name in os.listdir(output_dir):
+            os.remove(os.path.join(output_dir, name))
+        os.rmdir(output_dir)
+    
+    results = {}
+    for stage in STAGES:
+        result = measured.get(stage)
+        if result is None:
+            continue
+        seconds = max(result['seconds'], 1e-9)
+        results[stage] = {
+            'seconds': round(result['seconds'], 6),
+            'cpu_seconds': round(result['cpu_seconds'], 6),
+            'rows_per_second': round(row_count / seconds, 1),
+            'mb_per_second': round(megabytes / seconds, 3),
+            'peak_memory_mb': round(result['peak_memory_mb'], 1),
+        }
+    return {'rows': row_count, 'megabytes': round(megabytes, 3), 'stages': results, 'skipped': skipped}
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Comparar las filas por segundo de cada etapa con un resultado anterior y devolver las regresiones"""
+    regressions = []
+    print(f"\nComparación con la referencia del {baseline.get('created_at')}:")
+    for table_name, table_result in results['tables'].items():
+        baseline_table = baseline.get('tables', {}).get(table_name)
+        if baseline_table is None:
+            continue
+        for stage, stage_result in table_result['stages'].items():
+            baseline_stage = baseline_table['stages'].get(stage)
+            if not baseline_stage or not baseline_stage['rows_per_second']:
+                continue
+            change = stage_result['rows_per_second'] / baseline_stage['rows_per_second'] - 1
+            marker = ""
+            if change < -tolerance:
+                marker = "  <-- regresión"
+                regressions.append((table_name, stage, change))
+            print(f"  {table_name}.{stage}: {baseline_stage['rows_per_second']:.0f} -> "
+                  f"{stage_result['rows_per_second']:.0f} filas/s ({change:+.1%}){marker}")
+    return regressions
+
+def print_results(results):
+    print(f"\n{'tabla':<15} {'etapa':<8} {'filas/s':>12} {'MB/s':>9} {'CPU s':>8} {'Mem MB':>8}")
+    for table_name, table_result in results['tables'].items():
+        for stage in STAGES:
+            stage_result = table_result['stages'].get(stage)
+            if stage_result is None:
+                reason = table_result.get('skipped', {}).get(stage, 'no aplica')
+                print(f"{table_name:<15} {stage:<8} {'n/a':>12}  ({reason})")
+                continue
+            print(f"{table_name:<15} {stage:<8} {stage_result['rows_per_second']:>12.0f} "
+                  f"{stage_result['mb_per_second']:>9.2f} {stage_result['cpu_seconds']:>8.3f} {stage_result['peak_memory_mb']:>8.1f}")
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Medir el rendimiento de las etapas de exportación e importación de main.py")
+    parser.add_argument("--driver", choices=["fake", "live"], default="fake", help="Bases de datos en memoria (fake) o instancias locales desechables (live) (default: fake)")
+    parser.add_argument("--rows", default=20000, type=int, help="Filas de la tabla narrow; el resto de tablas usa una fracción (default: 20000)")
+    parser.add_argument("--tables", nargs="+", choices=sorted(BENCHMARK_TABLES), help="Tablas sintéticas a medir (default: todas)")
+    parser.add_argument("--copy-format", choices=sorted(main.ROW_ENCODERS), default="csv", help="Formato usado para COPY (default: csv)")
+    parser.add_argument("--batch-size", default=1000, type=int, help="Filas por fetchmany (default: 1000)")
+    parser.add_argument("--repeat", default=3, type=int, help="Repeticiones de cada etapa; se guarda la más rápida (default: 3)")
+    parser.add_argument("--seed", default=42, type=int, help="Semilla del generador de datos (default: 42)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Archivo JSON de resultados (default: benchmark_results.json)")
+    parser.add_argument("--baseline", help="Resultados anteriores con los que comparar (opcional)")
+    parser.add_argument("--tolerance", default=0.10, type=float, help="Caída de filas/s tolerada antes de marcar una regresión (default: 0.10)")
+
+    for option in ("host", "db", "user", "password"):
+        parser.add_argument(f"--mysql-{option}", help=f"{option} de la instancia MySQL del driver live")
+        parser.add_argument(f"--pg-{option}", help=f"{option} de la instancia PostgreSQL del driver live")
+    parser.add_argument("--mysql-port", default=3306, type=int, help="Puerto MySQL del driver live (default: 3306)")
+    parser.add_argument("--pg-port", default=5432, type=int, help="Puerto PostgreSQL del driver live (default: 5432)")
+
+    args = parser.parse_args()
+    driver = LiveDriver(args) if args.driver == 'live' else FakeDriver()
+    table_names = args.tables or list(BENCHMARK_TABLES)
+
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'driver': driver.name,
+        'copy_format': args.copy_format,
+        'batch_size': args.batch_size,
+        'seed': args.seed,
+        'tables': {},
+    }
+
+    try:
+        for index, spec_name in enumerate(table_names):
+            spec = BENCHMARK_TABLES[spec_name]
+            table_name = f"bench_{spec_name}"
+            columns = table_columns(spec)
+            row_count = max(1, int(args.rows * spec['scale']))
+
+            print(f"Generando {row_count} filas para {table_name}...")
+            rows = generate_rows(spec, row_count, args.seed + index)
+            driver.prepare(table_name, spec, columns, rows)
+            del rows
+
+            print(f"Midiendo {table_name}...")
+            results['tables'][spec_name] = benchmark_table(driver, table_name, columns, row_count, args)
+    finally:
+        driver.cleanup()
+
+    print_results(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('driver') != results['driver'] or baseline.get('copy_format') != results['copy_format']:
+            print("Aviso: la referencia se midió con otro driver o formato de COPY; no se compara")
+        elif compare_with_baseline(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -1,9 +1,40 @@
 import psycopg2
 import mysql.connector
 import csv
+import io
+import gzip
+import base64
+import itertools
 import os
+import re
+import sys
+import json
+import time
+import struct
+import queue
+import socket
+import sqlite3
+import subprocess
+import threading
+import contextlib
+import collections
+import heapq
+import concurrent.futures
 import argparse
-from datetime import datetime
+import copy
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 def connect_to_mysql(host, database, username, password, port=3306):
     """Conectar a la base de datos MySQL"""
@@ -37,6 +68,56 @@ def connect_to_postgresql(host, database, username, password, port=5432):
         print(f"Error al conectar a PostgreSQL: {e}")
         return None
 
+class ConnectionPool:
+    """Pool de conexiones reutilizables entre los workers de la migración"""
+
+    def __init__(self, factory, max_size):
+        self.factory = factory
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(max_size)
+
+    def acquire(self):
+        """Obtener una conexión libre, creando una nueva si el pool no está lleno"""
+        self._available.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        conn = self.factory()
+        if conn is None:
+            self._available.release()
+            raise ConnectionError("No se pudo abrir una nueva conexión para el pool")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def release(self, conn):
+        """Devolver una conexión al pool"""
+        self._idle.put(conn)
+        self._available.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Cerrar todas las conexiones abiertas por el pool"""
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._all = []
+
 def get_tables(mysql_conn):
     """Obtener todas las tablas de la base de datos MySQL"""
     cursor = mysql_conn.cursor()
@@ -45,6 +126,10 @@ def get_tables(mysql_conn):
     cursor.close()
     return tables
 
+def order_tables_by_size(tables, sizes):
+    """Ordenar las tablas de mayor a menor para que las grandes empiecen primero"""
+    return sorted(tables, key=lambda table: sizes.get(table, (0, 0)), reverse=True)
+
 def get_table_schema(mysql_conn, table_name):
     """Obtener el esquema de una tabla en MySQL"""
     cursor = mysql_conn.cursor()
@@ -64,6 +149,20 @@ def get_table_schema(mysql_conn, table_name):
     cursor.close()
     return columns
 
+def get_numeric_columns(mysql_conn, table_name):
+    """Obtener la precisión y la escala de las columnas DECIMAL de una tabla en MySQL"""
+    cursor = mysql_conn.cursor()
+    cursor.execute(f"""
+    SELECT COLUMN_NAME, NUMERIC_PRECISION, NUMERIC_SCALE
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_NAME = '{table_name}' AND TABLE_SCHEMA = DATABASE()
+      AND DATA_TYPE IN ('decimal', 'numeric')
+    """)
+    
+    numeric = {column_name: [int(precision), int(scale)] for column_name, precision, scale in cursor.fetchall()}
+    cursor.close()
+    return numeric
+
 def mysql_to_postgresql_type(mysql_type, max_length=None):
     """Convertir tipo de dato de MySQL a PostgreSQL"""
     type_mapping = {
@@ -106,11 +205,191 @@ def mysql_to_postgresql_type(mysql_type, max_length=None):
     
     return type_mapping.get(mysql_type.lower(), 'TEXT')  
 
-def create_postgresql_table(pg_conn, table_name, columns):
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+PGCOPY_NULL = struct.pack('!i', -1)
+PG_EPOCH_DATE = date(2000, 1, 1)
+PG_EPOCH_DATETIME = datetime(2000, 1, 1)
+
+def _fixed_width_encoder(fmt):
+    packer = struct.Struct('!i' + fmt)
+    size = packer.size - 4
+    
+    def encode(value):
+        return packer.pack(size, value)
+    return encode
+
+def _encode_bytes_field(data):
+    return struct.pack('!i', len(data)) + data
+
+def encode_text_value(value):
+    """Codificar un valor como texto UTF-8 para COPY binario"""
+    if isinstance(value, (bytes, bytearray)):
+        return _encode_bytes_field(bytes(value))
+    if isinstance(value, (set, frozenset)):
+        value = ','.join(sorted(value))
+    return _encode_bytes_field(str(value).encode('utf-8'))
+
+def encode_bytea_value(value):
+    """Codificar un valor binario para una columna BYTEA"""
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return _encode_bytes_field(bytes(value))
+
+def encode_jsonb_value(value):
+    """Codificar un documento JSON con la versión 1 del formato binario de JSONB"""
+    if isinstance(value, (bytes, bytearray)):
+        return _encode_bytes_field(b'\x01' + bytes(value))
+    return _encode_bytes_field(b'\x01' + str(value).encode('utf-8'))
+
+def encode_bool_value(value):
+    return b'\x00\x00\x00\x01\x01' if value else b'\x00\x00\x00\x01\x00'
+
+NUMERIC_HEADER = struct.Struct('!ihhHH')
+
+def encode_numeric_value(value):
+    """Codificar un DECIMAL en el formato binario de NUMERIC (dígitos en base 10000)"""
+    value = Decimal(value)
+    if value.is_nan():
+        return NUMERIC_HEADER.pack(8, 0, 0, 0xC000, 0)
+    if value.is_infinite():
+        raise ValueError(f"Valor NUMERIC no soportado: {value}")
+    
+    sign, digits, exponent = value.as_tuple()
+    if exponent > 0:
+        digits += (0,) * exponent
+        exponent = 0
+    dscale = -exponent
+    int_count = len(digits) - dscale
+    if int_count < 0:
+        digits = (0,) * -int_count + digits
+        int_count = 0
+    
+    lead = -int_count % 4
+    digits = (0,) * lead + digits + (0,) * (-dscale % 4)
+    groups = [a * 1000 + b * 100 + c * 10 + d for a, b, c, d in zip(*[iter(digits)] * 4)]
+    weight = (int_count + lead) // 4 - 1
+    # Los grupos a cero al principio y al final se quitan, como en la forma normalizada que guarda PostgreSQL
+    start = 0
+    while start < len(groups) and groups[start] == 0:
+        start += 1
+    end = len(groups)
+    while end > start and groups[end - 1] == 0:
+        end -= 1
+    groups = groups[start:end]
+    weight = weight - start if groups else 0
+    
+    return (NUMERIC_HEADER.pack(8 + 2 * len(groups), len(groups), weight, 0x4000 if sign else 0x0000, dscale)
+            + struct.pack(f'!{len(groups)}H', *groups))
+
+_encode_int8_field = _fixed_width_encoder('q')
+_encode_int4_field = _fixed_width_encoder('i')
+
+def encode_date_value(value):
+    """Codificar una fecha como días desde 2000-01-01"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return _encode_int4_field((value - PG_EPOCH_DATE).days)
+
+def encode_timestamp_value(value):
+    """Codificar un TIMESTAMP como microsegundos desde 2000-01-01"""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    delta = value.replace(tzinfo=None) - PG_EPOCH_DATETIME
+    return _encode_int8_field((delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+
+def encode_time_value(value):
+    """Codificar un TIME (timedelta o time) como microsegundos desde medianoche"""
+    if isinstance(value, timedelta):
+        return _encode_int8_field((value.days * 86400 + value.seconds) * 1000000 + value.microseconds)
+    return _encode_int8_field(((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond)
+
+BINARY_FIELD_ENCODERS = {
+    'SMALLINT': _fixed_width_encoder('h'),
+    'INTEGER': _encode_int4_field,
+    'BIGINT': _encode_int8_field,
+    'REAL': _fixed_width_encoder('f'),
+    'DOUBLE PRECISION': _fixed_width_encoder('d'),
+    'DECIMAL': encode_numeric_value,
+    'NUMERIC': encode_numeric_value,
+    'BOOLEAN': encode_bool_value,
+    'DATE': encode_date_value,
+    'TIMESTAMP': encode_timestamp_value,
+    'TIME': encode_time_value,
+    'BYTEA': encode_bytea_value,
+    'JSONB': encode_jsonb_value,
+}
+
+def binary_field_encoder(column):
+    """Elegir el codificador binario de una columna a partir de su DATA_TYPE de MySQL"""
+    pg_type = mysql_to_postgresql_type(column[1], column[2]).split('(')[0]
+    return BINARY_FIELD_ENCODERS.get(pg_type, encode_text_value)
+
+def _fixed_width_column_encoder(fmt):
+    """Codificar una columna de ancho fijo con un único struct.Struct por tamaño de lote, longitudes incluidas"""
+    size = struct.calcsize('!' + fmt)
+    width = 4 + size
+    packers = {}
+    
+    def encode(values):
+        count = len(values)
+        packer = packers.get(count)
+        if packer is None:
+            if len(packers) > 64:
+                packers.clear()
+            packer = packers[count] = struct.Struct('!' + ('i' + fmt) * count)
+        data = packer.pack(*itertools.chain.from_iterable(zip(itertools.repeat(size), values)))
+        return [data[offset:offset + width] for offset in range(0, len(data), width)]
+    return encode
+
+def _per_value_column_encoder(encode_value):
+    def encode(values):
+        return list(map(encode_value, values))
+    return encode
+
+_encode_length = struct.Struct('!i').pack
+
+def encode_text_column(values):
+    """Codificar una columna de textos como UTF-8 para COPY binario"""
+    try:
+        data = list(map(str.encode, values))
+    except TypeError:
+        return list(map(encode_text_value, values))
+    return list(map(bytes.__add__, map(_encode_length, map(len, data)), data))
+
+def encode_bytea_column(values):
+    """Codificar una columna de valores binarios para BYTEA"""
+    try:
+        data = list(map(bytes, values))
+    except TypeError:
+        return list(map(encode_bytea_value, values))
+    return list(map(bytes.__add__, map(_encode_length, map(len, data)), data))
+
+BINARY_COLUMN_ENCODERS = {
+    'SMALLINT': _fixed_width_column_encoder('h'),
+    'INTEGER': _fixed_width_column_encoder('i'),
+    'BIGINT': _fixed_width_column_encoder('q'),
+    'REAL': _fixed_width_column_encoder('f'),
+    'DOUBLE PRECISION': _fixed_width_column_encoder('d'),
+    'BOOLEAN': _fixed_width_column_encoder('?'),
+    'BYTEA': encode_bytea_column,
+}
+
+def binary_column_encoder(column):
+    """Elegir el codificador binario por lotes de una columna a partir de su DATA_TYPE de MySQL"""
+    pg_type = mysql_to_postgresql_type(column[1], column[2]).split('(')[0]
+    if pg_type in BINARY_COLUMN_ENCODERS:
+        return BINARY_COLUMN_ENCODERS[pg_type]
+    if pg_type in BINARY_FIELD_ENCODERS:
+        return _per_value_column_encoder(BINARY_FIELD_ENCODERS[pg_type])
+    return encode_text_column
+
+def create_postgresql_table(pg_conn, table_name, columns, unlogged=False, commit=True, partitioning=None):
     """Crear tabla en PostgreSQL basada en el esquema de MySQL"""
     cursor = pg_conn.cursor()
     
-    create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
+    table_kind = "UNLOGGED TABLE" if unlogged else "TABLE"
+    create_table_sql = f"CREATE {table_kind} IF NOT EXISTS {table_name} (\n"
     column_definitions = []
     
     for col in columns:
@@ -130,9 +409,15 @@ def create_postgresql_table(pg_conn, table_name, columns):
     create_table_sql += ",\n".join(column_definitions)
     create_table_sql += "\n);"
     
+    if partitioning is not None:
+        create_table_sql = create_table_sql[:-1] + f" PARTITION BY {partitioning['partition_by']};"
+        for child in partitioning['children']:
+            create_table_sql += f"\nCREATE TABLE IF NOT EXISTS {child['table']} PARTITION OF {table_name} FOR VALUES {child['bounds']};"
+    
     try:
         cursor.execute(create_table_sql)
-        pg_conn.commit()
+        if commit:
+            pg_conn.commit()
         print(f"Tabla {table_name} creada exitosamente en PostgreSQL")
         return True
     except Exception as e:
@@ -143,159 +428,1235 @@ def create_postgresql_table(pg_conn, table_name, columns):
     finally:
         cursor.close()
 
-def export_table_data(mysql_conn, table_name, output_dir):
-    """Exportar datos de la tabla de MySQL a un archivo CSV"""
-    cursor = mysql_conn.cursor()
+def set_table_logged(pg_conn, table_name):
+    """Convertir en LOGGED una tabla creada como UNLOGGED una vez validada su carga"""
+    cursor = pg_conn.cursor()
+    
+    try:
+        cursor.execute(f'ALTER TABLE "{table_name}" SET LOGGED')
+        pg_conn.commit()
+        print(f"Tabla {table_name} convertida a LOGGED")
+        return True
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Error al convertir la tabla {table_name} a LOGGED: {e}")
+        return False
+    finally:
+        cursor.close()
+
+def apply_session_settings(pg_conn, settings):
+    """Aplicar parámetros de sesión de PostgreSQL para la carga masiva"""
+    cursor = pg_conn.cursor()
+    
+    try:
+        for name, value in settings.items():
+            cursor.execute(f"SET {name} = %s", (value,))
+        pg_conn.commit()
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Advertencia: No se pudieron aplicar los parámetros de sesión {settings}: {e}")
+    finally:
+        cursor.close()
+
+def target_schema_settings(args):
+    """Obtener el search_path que sitúa las sesiones de PostgreSQL en el esquema de destino (--pg-schema)"""
+    if not args.pg_schema:
+        return {}
+    return {'search_path': f'"{args.pg_schema}"'}
+
+def create_pg_schema(pg_conn, schema):
+    """Crear el esquema de destino en PostgreSQL si no existe"""
+    cursor = pg_conn.cursor()
+    
+    try:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+        pg_conn.commit()
+        return True
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Error al crear el esquema {schema}: {e}")
+        return False
+    finally:
+        cursor.close()
+
+def fast_load_settings(args):
+    """Obtener los parámetros de sesión del modo --fast-load"""
+    if not args.fast_load:
+        return {}
+    return {
+        'synchronous_commit': 'off',
+        'maintenance_work_mem': args.maintenance_work_mem,
+    }
+
+def build_copy_sql(table_name, column_names, options, freeze=False):
+    """Construir la sentencia COPY ... FROM STDIN con sus opciones"""
+    if freeze:
+        options = options + ["FREEZE"]
+    column_list = ', '.join(f'"{col}"' for col in column_names)
+    return f'COPY "{table_name}" ({column_list}) FROM STDIN WITH ({", ".join(options)})'
+
+def _csv_bytea(value):
+    return None if value is None else '\\x' + value.hex()
+
+def _csv_json(value):
+    return value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else value
+
+def _csv_set(value):
+    return ','.join(sorted(value)) if isinstance(value, (set, frozenset)) else value
+
+CSV_COLUMN_CONVERTERS = {
+    'BYTEA': _csv_bytea,
+    'JSONB': _csv_json,
+}
+
+def csv_column_converter(column):
+    """Elegir la conversión CSV de una columna, o None si sus valores pasan sin cambios"""
+    if column[1].lower() == 'set':
+        return _csv_set
+    pg_type = mysql_to_postgresql_type(column[1], column[2]).split('(')[0]
+    return CSV_COLUMN_CONVERTERS.get(pg_type)
+
+def build_row_converter(columns):
+    """Compilar una vez por tabla la conversión por columnas de los lotes de filas para CSV"""
+    converters = [
+        (index, converter)
+        for index, converter in enumerate(csv_column_converter(col) for col in columns)
+        if converter is not None
+    ]
+    
+    if not converters:
+        return lambda rows: rows
+    
+    def convert(rows):
+        if not rows:
+            return []
+        values = list(zip(*rows))
+        for index, converter in converters:
+            values[index] = map(converter, values[index])
+        return zip(*values)
+    return convert
+
+class CsvRowEncoder:
+    """Codificador de filas para COPY en formato CSV"""
+    file_extension = 'csv'
+
+    def __init__(self, columns, include_header=False):
+        self.columns = columns
+        self.column_names = [col[0] for col in columns]
+        self.include_header = include_header
+        self.convert = build_row_converter(columns)
+
+    def copy_options(self):
+        if self.include_header:
+            return ["FORMAT csv", "HEADER", "DELIMITER ','"]
+        return ["FORMAT csv", "DELIMITER ','"]
+
+    def header(self):
+        if not self.include_header:
+            return b''
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_MINIMAL).writerow(self.column_names)
+        return buffer.getvalue().encode('utf-8')
+
+    def encode(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_MINIMAL).writerows(self.convert(rows))
+        return buffer.getvalue().encode('utf-8')
+
+    def write_large_row(self, stream, row, read_pieces):
+        """Escribir una fila con valores LargeValue copiando cada uno por fragmentos, sin tenerlo entero en memoria"""
+        marker = f"lob{os.urandom(16).hex()}"
+        values = [None if isinstance(value, LargeValue) else value for value in row]
+        converted = list(next(iter(self.convert([values]))))
+        for index, value in enumerate(row):
+            if isinstance(value, LargeValue):
+                converted[index] = marker
+        
+        parts = self.encode_fields(converted).split(marker.encode('ascii'))
+        written = 0
+        for part, value in zip(parts, [value for value in row if isinstance(value, LargeValue)] + [None]):
+            stream.write(part)
+            written += len(part)
+            if value is None:
+                continue
+            if value.text:
+                stream.write(b'"')
+                for piece in read_pieces(row, value):
+                    piece = piece.replace(b'"', b'""')
+                    stream.write(piece)
+                    written += len(piece)
+                stream.write(b'"')
+                written += 2
+            else:
+                stream.write(b'\\x')
+                for piece in read_pieces(row, value):
+                    piece = piece.hex().encode('ascii')
+                    stream.write(piece)
+                    written += len(piece)
+                written += 2
+        return written
+
+    def encode_fields(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_MINIMAL).writerow(values)
+        return buffer.getvalue().encode('utf-8')
+
+    def trailer(self):
+        return b''
+
+class BinaryRowEncoder:
+    """Codificador de filas para COPY en el formato binario de PostgreSQL (PGCOPY)"""
+    file_extension = 'pgcopy'
+
+    def __init__(self, columns, include_header=False):
+        self.columns = columns
+        self.column_names = [col[0] for col in columns]
+        self.field_encoders = [binary_field_encoder(col) for col in columns]
+        self.column_encoders = [binary_column_encoder(col) for col in columns]
+        self.row_header = struct.pack('!h', len(columns))
+
+    def copy_options(self):
+        return ["FORMAT binary"]
+
+    def header(self):
+        return PGCOPY_HEADER
+
+    def encode(self, rows):
+        """Codificar un lote columna a columna y entrelazar los campos de cada fila"""
+        if not rows:
+            return b''
+        # Cada columna se codifica de una vez con su codificador por lotes; los NULL no pasan por él y se
+        # insertan después como PGCOPY_NULL, de modo que cada campo es idéntico al de binary_field_encoder
+        columns = []
+        for encode_column, values in zip(self.column_encoders, zip(*rows)):
+            if None not in values:
+                columns.append(encode_column(values))
+                continue
+            present = [value for value in values if value is not None]
+            encoded = iter(encode_column(present) if present else ())
+            columns.append([PGCOPY_NULL if value is None else next(encoded) for value in values])
+        return b''.join(map(b''.join, zip(itertools.repeat(self.row_header, len(rows)), *columns)))
+
+    def write_large_row(self, stream, row, read_pieces):
+        """Escribir una fila con valores LargeValue copiando cada uno por fragmentos, sin tenerlo entero en memoria"""
+        stream.write(self.row_header)
+        written = len(self.row_header)
+        for encode, value in zip(self.field_encoders, row):
+            if isinstance(value, LargeValue):
+                stream.write(struct.pack('!i', value.length))
+                for piece in read_pieces(row, value):
+                    stream.write(piece)
+                written += 4 + value.length
+            else:
+                data = PGCOPY_NULL if value is None else encode(value)
+                stream.write(data)
+                written += len(data)
+        return written
+
+    def trailer(self):
+        return PGCOPY_TRAILER
+
+ROW_ENCODERS = {
+    'csv': CsvRowEncoder,
+    'binary': BinaryRowEncoder,
+}
+
+def make_row_encoder(copy_format, columns, include_header=False):
+    """Crear el codificador de filas para el formato de COPY indicado"""
+    return ROW_ENCODERS[copy_format](columns, include_header)
+
+class ColumnStats:
+    """Estadísticas por columna recogidas en una sola pasada mientras las filas se codifican para COPY"""
+
+    def __init__(self, columns, on_update=None):
+        self.column_names = [col[0] for col in columns]
+        self.max_indexes = [i for i, col in enumerate(columns) if col[1].lower() in INTEGER_TYPES]
+        self.on_update = on_update
+        self.rows = 0
+        self.bytes = 0
+        self.reset()
+
+    def reset(self):
+        if self.on_update is not None and self.rows:
+            self.on_update(-self.rows, -self.bytes)
+        self.rows = 0
+        self.bytes = 0
+        self.nulls = [0] * len(self.column_names)
+        self.max = [None] * len(self.column_names)
+
+    def update(self, rows, encoded_size):
+        """Acumular un lote de filas y el tamaño de su codificación"""
+        self.rows += len(rows)
+        self.bytes += encoded_size
+        if self.on_update is not None:
+            self.on_update(len(rows), encoded_size)
+        if not rows:
+            return
+        values = list(zip(*rows))
+        for index, column_values in enumerate(values):
+            self.nulls[index] += column_values.count(None)
+        for index in self.max_indexes:
+            batch_max = max((value for value in values[index] if value is not None), default=None)
+            if batch_max is not None and (self.max[index] is None or batch_max > self.max[index]):
+                self.max[index] = batch_max
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'nulls': {name: count for name, count in zip(self.column_names, self.nulls) if count},
+            'max': {self.column_names[index]: self.max[index] for index in self.max_indexes},
+        }
+
+def merge_column_stats(total, stats):
+    """Sumar las estadísticas de un rango a las acumuladas de su tabla"""
+    if total is None:
+        return json.loads(json.dumps(stats))
+    total['rows'] += stats['rows']
+    total['bytes'] += stats['bytes']
+    for name, count in stats['nulls'].items():
+        total['nulls'][name] = total['nulls'].get(name, 0) + count
+    for name, value in stats['max'].items():
+        if value is not None and (total['max'].get(name) is None or value > total['max'][name]):
+            total['max'][name] = value
+    return total
+
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+def open_compressed(path, mode, compression=None):
+    """Abrir un archivo de datos en modo binario, comprimido con gzip o zstd si se indica"""
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("la compresión zstd requiere el paquete zstandard (pip install zstandard)")
+        raw = open(path, mode)
+        if 'w' in mode:
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(path, mode)
+
+def export_table_data(mysql_conn, table_name, output_dir, chunk=None, encoder=None, stats=None, memory_budget=None,
+                      lob_chunk_size=None, throttle=None):
+    """Exportar datos de la tabla de MySQL a un archivo CSV o PGCOPY"""
+    if encoder is None:
+        encoder = make_row_encoder('csv', get_table_schema(mysql_conn, table_name), include_header=True)
     
     
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    file_path = os.path.join(output_dir, f"{table_name}.csv")
+    if chunk is not None and chunk['count'] > 1:
+        file_path = os.path.join(output_dir, f"{table_name}.{chunk['index']:05d}.{encoder.file_extension}")
+    else:
+        file_path = os.path.join(output_dir, f"{table_name}.{encoder.file_extension}")
     
     try:
+        with open(file_path, 'wb') as data_file:
+            write_table_rows(mysql_conn, table_name, data_file, chunk, encoder, stats=stats,
+                             memory_budget=memory_budget, lob_chunk_size=lob_chunk_size, throttle=throttle)
         
-        cursor.execute(f"SELECT * FROM {table_name}")
-        
+        print(f"Datos de la tabla {describe_chunk(table_name, chunk)} exportados exitosamente a {file_path}")
+        return file_path
+    except Exception as e:
+        print(f"Error al exportar datos de la tabla {describe_chunk(table_name, chunk)}: {e}")
+        return None
+
+def import_table_data(pg_conn, table_name, csv_file, columns=None, freeze=False, reject_path=None, compression=None,
+                      buffer_size=64 * 1024 * 1024):
+    """Importar datos del archivo CSV (o PGCOPY) a la tabla de PostgreSQL"""
+    cursor = pg_conn.cursor()
+    base_name = csv_file[:-len(COMPRESSION_EXTENSIONS[compression])] if compression else csv_file
+    binary = base_name.endswith('.pgcopy')
+    
+    if binary:
+        column_names = [col[0] for col in columns]
+        options = ["FORMAT binary"]
+    else:
+        with open_compressed(csv_file, 'rb', compression) as f:
+            column_names = next(csv.reader([f.readline().decode('utf-8')]))
+        options = ["FORMAT csv", "HEADER", "DELIMITER ','"]
+    
+    try:
         
-        columns = [column[0] for column in cursor.description]
+        copy_sql = build_copy_sql(table_name, column_names, options, freeze)
         
         
-        with open(file_path, 'w', newline='', encoding='utf-8') as csv_file:
-            csv_writer = csv.writer(csv_file, quoting=csv.QUOTE_MINIMAL)
-            csv_writer.writerow(columns)  
-            
-            
-            batch_size = 1000
-            rows = cursor.fetchmany(batch_size)
-            
-            while rows:
-                
-                clean_rows = []
-                for row in rows:
-                    clean_row = []
-                    for value in row:
-                        if value is None:
-                            clean_row.append(None)
-                        elif isinstance(value, bytes):
-                            clean_row.append(value.hex())  
-                        else:
-                            clean_row.append(value)
-                    clean_rows.append(clean_row)
-                
-                csv_writer.writerows(clean_rows)
-                rows = cursor.fetchmany(batch_size)
+        with open_compressed(csv_file, 'rb', compression) as f:
+            cursor.copy_expert(copy_sql, f)
+        loaded_rows = cursor.rowcount
+        pg_conn.commit()
         
-        print(f"Datos de la tabla {table_name} exportados exitosamente a {file_path}")
-        return file_path
+        print(f"Importados {loaded_rows} registros a la tabla {table_name} en PostgreSQL")
+        return {'rows': loaded_rows, 'rejected': 0}
     except Exception as e:
-        print(f"Error al exportar datos de la tabla {table_name}: {e}")
-        return None
+        pg_conn.rollback()
+        print(f"Error al importar datos a la tabla {table_name}: {e}")
+        if freeze or isinstance(e, LeaseLost):
+            return False
+        
+        print("Aislando las filas con errores mediante COPY por mitades...")
+        if binary:
+            return copy_isolating_errors(pg_conn, table_name, column_names, options, PGCOPY_HEADER, PGCOPY_TRAILER,
+                                         split_pgcopy_records(csv_file, compression), reject_path, window_bytes=buffer_size)
+        return copy_isolating_errors(pg_conn, table_name, column_names, ["FORMAT csv", "DELIMITER ','"], b'', b'',
+                                     split_csv_records(csv_file, compression), reject_path, window_bytes=buffer_size)
     finally:
         cursor.close()
 
-def import_table_data(pg_conn, table_name, csv_file):
-    """Importar datos del archivo CSV a la tabla de PostgreSQL"""
+def split_csv_records(csv_file, compression=None):
+    """Separar un archivo CSV en registros completos, respetando los saltos de línea entre comillas"""
+    with open_compressed(csv_file, 'rb', compression) as f:
+        record = []
+        quotes = 0
+        header = True
+        for line in f:
+            record.append(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                if not header:
+                    yield b''.join(record)
+                header = False
+                record = []
+                quotes = 0
+        if record:
+            yield b''.join(record)
+
+def split_pgcopy_records(data_file, compression=None):
+    """Separar un archivo en formato binario de COPY en las tuplas que lo componen"""
+    with open_compressed(data_file, 'rb', compression) as f:
+        f.read(15)
+        extension_length = struct.unpack('!i', f.read(4))[0]
+        f.read(extension_length)
+        
+        while True:
+            field_count_bytes = f.read(2)
+            field_count = struct.unpack('!h', field_count_bytes)[0]
+            if field_count == -1:
+                break
+            parts = [field_count_bytes]
+            for _ in range(field_count):
+                length_bytes = f.read(4)
+                parts.append(length_bytes)
+                length = struct.unpack('!i', length_bytes)[0]
+                if length > 0:
+                    parts.append(f.read(length))
+            yield b''.join(parts)
+
+_REJECT_LOCK = threading.Lock()
+
+def write_reject(reject_path, table_name, record, error, binary=False):
+    """Añadir un registro rechazado por PostgreSQL, junto con el error, al archivo de rechazos de la tabla"""
+    entry = {'table': table_name, 'error': str(error).strip()}
+    if binary:
+        entry['record_base64'] = base64.b64encode(record).decode('ascii')
+    else:
+        entry['record'] = record.decode('utf-8', errors='replace')
+    
+    with _REJECT_LOCK:
+        directory = os.path.dirname(reject_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(reject_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+def _copy_bisect(cursor, copy_sql, header, trailer, records, table_name, reject_path):
+    """Cargar un grupo de registros con COPY, dividiéndolo por la mitad cada vez que falla"""
+    cursor.execute("SAVEPOINT copy_bisect")
+    try:
+        cursor.copy_expert(copy_sql, io.BytesIO(header + b''.join(records) + trailer))
+        cursor.execute("RELEASE SAVEPOINT copy_bisect")
+        return len(records), 0
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT copy_bisect")
+        cursor.execute("RELEASE SAVEPOINT copy_bisect")
+        if len(records) == 1:
+            write_reject(reject_path, table_name, records[0], getattr(e, 'pgerror', None) or e,
+                         header.startswith(PGCOPY_HEADER))
+            return 0, 1
+    
+    middle = len(records) // 2
+    left_loaded, left_rejected = _copy_bisect(cursor, copy_sql, header, trailer, records[:middle], table_name, reject_path)
+    right_loaded, right_rejected = _copy_bisect(cursor, copy_sql, header, trailer, records[middle:], table_name, reject_path)
+    return left_loaded + right_loaded, left_rejected + right_rejected
+
+def next_copy_window(records, window, window_bytes):
+    """Tomar los siguientes registros hasta llenar la ventana de filas o de bytes, con al menos un registro"""
+    batch = []
+    size = 0
+    for record in records:
+        batch.append(record)
+        size += len(record)
+        if len(batch) >= window or size >= window_bytes:
+            break
+    return batch
+
+def copy_isolating_errors(pg_conn, table_name, column_names, options, header, trailer, records, reject_path=None,
+                          window=10000, window_bytes=64 * 1024 * 1024):
+    """Cargar registros con COPY aislando por bisección las filas que PostgreSQL rechaza"""
+    if reject_path is None:
+        reject_path = f"{table_name}.rejects.jsonl"
+    copy_sql = build_copy_sql(table_name, column_names, options)
     cursor = pg_conn.cursor()
+    loaded_rows = 0
+    rejected_rows = 0
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            
-            header = next(csv.reader([f.readline()]))
-            columns = ', '.join(f'"{col}"' for col in header)  
-            
-            
-            copy_sql = f'COPY "{table_name}" ({columns}) FROM STDIN WITH CSV HEADER DELIMITER \',\''
-            
-            
-            f.seek(0)
-            
+        records = iter(records)
+        batch = next_copy_window(records, window, window_bytes)
+        while batch:
+            loaded, rejected = _copy_bisect(cursor, copy_sql, header, trailer, batch, table_name, reject_path)
+            loaded_rows += loaded
+            rejected_rows += rejected
+            batch = next_copy_window(records, window, window_bytes)
+        pg_conn.commit()
+        
+        print(f"Importados {loaded_rows} registros a la tabla {table_name} en PostgreSQL, "
+              f"{rejected_rows} rechazados (detalle en {reject_path})")
+        return {'rows': loaded_rows, 'rejected': rejected_rows}
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Error al aislar las filas con errores de la tabla {table_name}: {e}")
+        return False
+    finally:
+        cursor.close()
+
+class CopyStreamAborted(Exception):
+    """El consumidor del flujo COPY abandonó la carga"""
+
+class LeaseLost(Exception):
+    """El worker perdió el arrendamiento del rango que estaba cargando antes de confirmarlo"""
+
+class CopyStream:
+    """Objeto tipo archivo que alimenta COPY ... FROM STDIN desde un buffer acotado en memoria"""
+
+    def __init__(self, max_buffer_bytes=64 * 1024 * 1024):
+        self.max_buffer_bytes = max_buffer_bytes
+        self._chunks = collections.deque()
+        self._buffered = 0
+        self._closed = False
+        self._aborted = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def write(self, data):
+        """Añadir bytes al buffer, bloqueando mientras el buffer esté lleno"""
+        if not data:
+            return
+        with self._condition:
+            while self._buffered >= self.max_buffer_bytes and not self._aborted:
+                self._condition.wait()
+            if self._aborted:
+                raise CopyStreamAborted("La carga COPY fue cancelada")
+            self._chunks.append(data)
+            self._buffered += len(data)
+            self._condition.notify_all()
+
+    def close(self, error=None):
+        """Marcar el final de los datos, propagando opcionalmente un error al lector"""
+        with self._condition:
+            self._closed = True
+            self._error = error
+            self._condition.notify_all()
+
+    def abort(self):
+        """Cancelar el flujo desde el lado del consumidor y liberar al productor"""
+        with self._condition:
+            self._aborted = True
+            self._chunks.clear()
+            self._buffered = 0
+            self._condition.notify_all()
+
+    def read(self, size=-1):
+        """Leer hasta size bytes, esperando a que el productor genere datos"""
+        with self._condition:
+            while not self._chunks and not self._closed:
+                self._condition.wait()
+            if self._error is not None:
+                raise self._error
+            if not self._chunks:
+                return b''
             
-            cursor.copy_expert(copy_sql, f)
-            pg_conn.commit()
+            parts = []
+            remaining = size if size and size > 0 else self._buffered
+            while self._chunks and remaining > 0:
+                chunk = self._chunks.popleft()
+                if len(chunk) > remaining:
+                    self._chunks.appendleft(chunk[remaining:])
+                    chunk = chunk[:remaining]
+                parts.append(chunk)
+                remaining -= len(chunk)
+                self._buffered -= len(chunk)
             
+            self._condition.notify_all()
+            return b''.join(parts)
+
+    def readline(self, size=-1):
+        """Leer hasta el siguiente salto de línea"""
+        line = []
+        while size < 0 or len(line) < size:
+            byte = self.read(1)
+            if not byte:
+                break
+            line.append(byte)
+            if byte == b'\n':
+                break
+        return b''.join(line)
+
+LOB_TYPES = ('blob', 'mediumblob', 'longblob', 'text', 'mediumtext', 'longtext')
+
+class FetchSizer:
+    """Tamaño de fetchmany adaptado al ancho observado de las filas para mantener cada lote dentro de un presupuesto de memoria"""
+
+    def __init__(self, memory_budget=None, max_rows=1000, initial_rows=None, throttle=None):
+        self.memory_budget = memory_budget
+        self.max_rows = max_rows
+        self.throttle = throttle
+        self.size = min(initial_rows or max_rows, max_rows) if memory_budget else max_rows
+
+    def update(self, row_count, encoded_size):
+        """Recalcular el tamaño del siguiente lote a partir del tamaño codificado del último"""
+        if self.throttle is not None:
+            self.throttle.wait(row_count)
+        if self.memory_budget and row_count:
+            row_bytes = max(1, encoded_size // row_count)
+            self.size = max(1, min(self.max_rows, self.size * 2, self.memory_budget // row_bytes))
+        return self.size
+
+class SourceThrottle:
+    """Control de la carga sobre el MySQL de origen: ajusta el ritmo de lectura y los lectores concurrentes según su estado"""
+
+    def __init__(self, connect, max_readers, args):
+        self.connect = connect
+        self.min_readers = max(1, min(args.throttle_min_readers, max_readers))
+        self.max_readers = max_readers
+        self.min_rate = args.throttle_min_rate
+        self.max_rate = args.throttle_max_rate or None
+        self.max_replica_lag = args.max_replica_lag
+        self.max_threads_running = args.max_threads_running
+        self.query = args.throttle_query
+        self.query_max = args.throttle_query_max
+        self.interval = args.throttle_interval
+        self.readers = self.min_readers
+        self.rate = self.max_rate
+        self.active = 0
+        self._rows = 0
+        self._next_slot = time.monotonic()
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._replica_statements = [("SHOW REPLICA STATUS", 'Seconds_Behind_Source'),
+                                    ("SHOW SLAVE STATUS", 'Seconds_Behind_Master')]
+
+    def start(self):
+        """Empezar a muestrear el estado del origen en un hilo propio"""
+        self._conn = self.connect()
+        if self._conn is None:
+            raise ConnectionError("No se pudo abrir la conexión de muestreo del control de carga")
+        print(f"Control de carga activo: {self.readers} a {self.max_readers} lectores, "
+              f"retraso máximo {self.max_replica_lag}s, Threads_running máximo {self.max_threads_running}")
+        self._thread = threading.Thread(target=self._run, name="throttle", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last = time.monotonic()
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._condition:
+                observed_rate = self._rows / max(now - last, 1e-6)
+                self._rows = 0
+            last = now
+            self.adjust(self.overload_reasons(), observed_rate)
+
+    def sample(self):
+        """Consultar el retraso de réplica, Threads_running y la consulta personalizada en el origen"""
+        cursor = self._conn.cursor()
+        sample = {'replica_lag': None, 'threads_running': None, 'query': None}
+        
+        try:
+            for statement, column in list(self._replica_statements):
+                try:
+                    cursor.execute(statement)
+                except Exception:
+                    self._replica_statements.remove((statement, column))
+                    continue
+                row = cursor.fetchone()
+                names = [description[0] for description in cursor.description or []]
+                cursor.fetchall()
+                if row is not None and column in names:
+                    sample['replica_lag'] = row[names.index(column)]
+                break
             
-            cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
-            row_count = cursor.fetchone()[0]
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_running'")
+            row = cursor.fetchone()
+            cursor.fetchall()
+            if row is not None:
+                sample['threads_running'] = int(row[1])
             
-            print(f"Importados {row_count} registros a la tabla {table_name} en PostgreSQL")
-            return True
-    except Exception as e:
-        pg_conn.rollback()
-        print(f"Error al importar datos a la tabla {table_name}: {e}")
-        print("Intentando importar fila por fila...")
+            if self.query:
+                cursor.execute(self.query)
+                row = cursor.fetchone()
+                cursor.fetchall()
+                if row is not None and row[0] is not None:
+                    sample['query'] = float(row[0])
+        finally:
+            cursor.close()
+            self._conn.rollback()
+        return sample
+
+    def overload_reasons(self):
+        """Obtener los motivos por los que el origen está sobrecargado, o una lista vacía si tiene margen"""
+        try:
+            sample = self.sample()
+        except Exception as e:
+            return [f"no se pudo consultar el estado del origen ({e})"]
+        
+        reasons = []
+        if sample['replica_lag'] is not None and sample['replica_lag'] > self.max_replica_lag:
+            reasons.append(f"retraso de réplica {sample['replica_lag']}s")
+        if sample['threads_running'] is not None and sample['threads_running'] > self.max_threads_running:
+            reasons.append(f"Threads_running {sample['threads_running']}")
+        if sample['query'] is not None and self.query_max is not None and sample['query'] > self.query_max:
+            reasons.append(f"consulta de control {sample['query']}")
+        return reasons
+
+    def adjust(self, reasons, observed_rate):
+        """Reducir a la mitad lectores y ritmo si el origen está sobrecargado, o aumentarlos poco a poco si tiene margen"""
+        with self._condition:
+            readers, rate = self.readers, self.rate
+            if reasons:
+                self.readers = max(self.min_readers, self.readers // 2)
+                self.rate = max(self.min_rate, (self.rate or observed_rate) / 2)
+            else:
+                self.readers = min(self.max_readers, self.readers + 1)
+                if self.rate is not None:
+                    self.rate = self.rate * 1.25
+                    if self.max_rate is not None:
+                        self.rate = min(self.rate, self.max_rate)
+                    elif self.rate > 2 * observed_rate:
+                        self.rate = None
+            self._condition.notify_all()
+            changed = (readers, rate) != (self.readers, self.rate)
         
+        if changed:
+            limit = f"{self.rate:.0f} filas/s" if self.rate is not None else "sin límite"
+            cause = f" ({', '.join(reasons)})" if reasons else ""
+            print(f"Control de carga: {self.readers} lectores, {limit}{cause}")
+
+    @contextlib.contextmanager
+    def reader(self):
+        """Ocupar uno de los lectores permitidos durante la lectura de una tabla o rango"""
+        with self._condition:
+            while self.active >= self.readers:
+                self._condition.wait()
+            self.active += 1
         try:
-            
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                header = next(reader)  
-                placeholders = ', '.join(['%s'] * len(header))
-                columns = ', '.join(f'"{col}"' for col in header)
-                
-                insert_query = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders})'
-                
-                
-                batch_size = 100
-                batch = []
-                count = 0
-                
-                for row in reader:
-                    
-                    processed_row = [None if val == '' else val for val in row]
-                    batch.append(processed_row)
-                    count += 1
-                    
-                    if len(batch) >= batch_size:
-                        cursor.executemany(insert_query, batch)
-                        pg_conn.commit()
-                        batch = []
-                
-                
-                if batch:
-                    cursor.executemany(insert_query, batch)
-                    pg_conn.commit()
-                
-                print(f"Importados {count} registros a la tabla {table_name} en PostgreSQL (método alternativo)")
-                return True
-        except Exception as inner_e:
-            pg_conn.rollback()
-            print(f"Error en método alternativo de importación: {inner_e}")
-            return False
+            yield
+        finally:
+            with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+
+    def wait(self, row_count):
+        """Esperar lo necesario para que el conjunto de lectores no supere el ritmo de filas por segundo permitido"""
+        with self._condition:
+            self._rows += row_count
+            if self.rate is None:
+                return
+            now = time.monotonic()
+            start = max(self._next_slot, now)
+            self._next_slot = start + row_count / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._conn is not None:
+            self._conn.close()
+
+def throttle_reader(throttle):
+    """Ocupar un lector del control de carga, si está activo"""
+    if throttle is None:
+        return contextlib.nullcontext()
+    return throttle.reader()
+
+class LargeValue:
+    """Valor LOB demasiado grande para leerse con su fila, que se copia después por fragmentos"""
+
+    def __init__(self, index, length, text):
+        self.index = index
+        self.length = length
+        self.text = text
+
+class LobReader:
+    """Lectura con SUBSTRING, por fragmentos y por clave primaria, de los valores LOB que superan el tamaño de fragmento"""
+
+    def __init__(self, mysql_conn, table_name, columns, pk_columns, chunk_size):
+        names = [col[0] for col in columns]
+        self.mysql_conn = mysql_conn
+        self.table_name = table_name
+        self.columns = columns
+        self.pk_columns = pk_columns
+        self.pk_indexes = [names.index(pk) for pk in pk_columns]
+        self.lob_indexes = [
+            index for index, col in enumerate(columns)
+            if col[1].lower() in LOB_TYPES and col[0] not in pk_columns
+        ]
+        self.chunk_size = chunk_size
+
+    def is_text(self, index):
+        return not self.columns[index][1].lower().endswith('blob')
+
+    def select_sql(self, chunk):
+        """Construir la lectura de la tabla dejando fuera de la fila los LOB grandes y devolviendo su longitud"""
+        where_sql, params = chunk_where(chunk)
+        select_list = []
+        lengths = []
+        for index, col in enumerate(self.columns):
+            name = f"`{col[0]}`"
+            if index not in self.lob_indexes:
+                select_list.append(name)
+                continue
+            length = f"LENGTH(CONVERT({name} USING utf8mb4))" if self.is_text(index) else f"LENGTH({name})"
+            select_list.append(f"IF(LENGTH({name}) > {self.chunk_size}, NULL, {name})")
+            lengths.append(f"IF(LENGTH({name}) > {self.chunk_size}, {length}, NULL)")
+        return f"SELECT {', '.join(select_list + lengths)} FROM {chunk_source(self.table_name, chunk)}{where_sql}", params
+
+    def split(self, rows):
+        """Separar de un lote las filas con valores que deben leerse por fragmentos"""
+        width = len(self.columns)
+        inline = []
+        deferred = []
+        for row in rows:
+            lengths = row[width:]
+            row = tuple(row[:width])
+            if all(length is None for length in lengths):
+                inline.append(row)
+                continue
+            row = list(row)
+            for index, length in zip(self.lob_indexes, lengths):
+                if length is not None:
+                    row[index] = LargeValue(index, int(length), self.is_text(index))
+            deferred.append(tuple(row))
+        return inline, deferred
+
+    def read_pieces(self, row, value):
+        """Leer un valor por fragmentos, como bytes UTF-8 si es texto, comprobando que su longitud no cambió"""
+        name = self.columns[value.index][0]
+        key = tuple(row[index] for index in self.pk_indexes)
+        piece_length = max(1, self.chunk_size // 4) if value.text else self.chunk_size
+        sql = (f"SELECT SUBSTRING(`{name}`, %s, %s) FROM {self.table_name} "
+               f"WHERE {' AND '.join(f'`{pk}` = %s' for pk in self.pk_columns)}")
+        cursor = self.mysql_conn.cursor()
+        position = 1
+        read_bytes = 0
+        
+        try:
+            while True:
+                cursor.execute(sql, (position, piece_length) + key)
+                result = cursor.fetchone()
+                cursor.fetchall()
+                piece = result[0] if result else None
+                if not piece:
+                    break
+                data = piece.encode('utf-8') if isinstance(piece, str) else bytes(piece)
+                read_bytes += len(data)
+                yield data
+                position += len(piece)
+                if len(piece) < piece_length:
+                    break
+        finally:
+            cursor.close()
+        
+        if read_bytes != value.length:
+            raise ValueError(f"el valor de la columna {name} de la fila {key} cambió durante la lectura por fragmentos")
+
+def make_lob_reader(mysql_conn, table_name, columns, chunk, lob_chunk_size):
+    """Crear el lector de LOB por fragmentos de una tabla, o None si no tiene columnas LOB o clave primaria"""
+    if not lob_chunk_size or chunk is None or not chunk['pk_columns']:
+        return None
+    reader = LobReader(mysql_conn, table_name, columns, chunk['pk_columns'], lob_chunk_size)
+    return reader if reader.lob_indexes else None
+
+def has_lob_columns(columns):
+    return any(col[1].lower() in LOB_TYPES for col in columns)
+
+def write_table_rows(mysql_conn, table_name, stream, chunk=None, encoder=None, batch_size=1000, stats=None,
+                     memory_budget=None, lob_chunk_size=None, throttle=None):
+    """Leer las filas de una tabla MySQL y escribirlas codificadas para COPY en un flujo o archivo"""
+    if encoder is None:
+        encoder = make_row_encoder('csv', get_table_schema(mysql_conn, table_name))
+    
+    lob_reader = make_lob_reader(mysql_conn, table_name, encoder.columns, chunk, lob_chunk_size)
+    sizer = FetchSizer(memory_budget, batch_size, 1 if has_lob_columns(encoder.columns) else None, throttle)
+    cursor = mysql_conn.cursor()
+    row_count = 0
+    deferred = []
+    
+    try:
+        select_sql, params = lob_reader.select_sql(chunk) if lob_reader else build_select_sql(table_name, chunk)
+        cursor.execute(select_sql, params)
+        
+        stream.write(encoder.header())
+        rows = cursor.fetchmany(sizer.size)
+        while rows:
+            fetched = len(rows)
+            if lob_reader is not None:
+                rows, large_rows = lob_reader.split(rows)
+                deferred.extend(large_rows)
+            data = encoder.encode(rows) if rows else b''
+            stream.write(data)
+            if stats is not None and rows:
+                stats.update(rows, len(data))
+            row_count += len(rows)
+            rows = cursor.fetchmany(sizer.update(fetched, len(data)))
+        
+        
+        for row in deferred:
+            size = encoder.write_large_row(stream, row, lob_reader.read_pieces)
+            if stats is not None:
+                stats.update([row], size)
+            row_count += 1
+        stream.write(encoder.trailer())
+        
+        return row_count
     finally:
         cursor.close()
 
-def get_primary_keys(mysql_conn, table_name):
-    """Obtener las claves primarias de una tabla en MySQL"""
+def iter_row_records(mysql_conn, table_name, chunk, encoder, batch_size=1000, stats=None, memory_budget=None, throttle=None,
+                     lob_chunk_size=None):
+    """Volver a leer una tabla o rango de MySQL produciendo cada fila codificada como un registro de COPY"""
+    lob_reader = make_lob_reader(mysql_conn, table_name, encoder.columns, chunk, lob_chunk_size)
+    sizer = FetchSizer(memory_budget, batch_size, 1 if has_lob_columns(encoder.columns) else None, throttle)
     cursor = mysql_conn.cursor()
-    cursor.execute(f"""
-    SELECT COLUMN_NAME
-    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-    WHERE TABLE_SCHEMA = DATABASE()
-      AND TABLE_NAME = '{table_name}'
-      AND CONSTRAINT_NAME = 'PRIMARY'
-    ORDER BY ORDINAL_POSITION
-    """)
+    deferred = []
     
-    pk_columns = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    return pk_columns
-
-def migrate_constraints(mysql_conn, pg_conn, table_name):
-    """Migrar las restricciones de clave primaria"""
     try:
+        select_sql, params = lob_reader.select_sql(chunk) if lob_reader else build_select_sql(table_name, chunk)
+        cursor.execute(select_sql, params)
         
-        pk_columns = get_primary_keys(mysql_conn, table_name)
+        rows = cursor.fetchmany(sizer.size)
+        while rows:
+            fetched = len(rows)
+            if lob_reader is not None:
+                rows, large_rows = lob_reader.split(rows)
+                deferred.extend(large_rows)
+            records = [encoder.encode([row]) for row in rows]
+            encoded_size = sum(len(record) for record in records)
+            if stats is not None and rows:
+                stats.update(rows, encoded_size)
+            yield from records
+            rows = cursor.fetchmany(sizer.update(fetched, encoded_size))
         
         
-        if pk_columns:
-            pg_cursor = pg_conn.cursor()
-            pk_columns_str = ', '.join(f'"{col}"' for col in pk_columns)
-            pk_name = f"pk_{table_name}"
-            pk_sql = f'ALTER TABLE "{table_name}" ADD CONSTRAINT {pk_name} PRIMARY KEY ({pk_columns_str})'
-            
-            try:
-                pg_cursor.execute(pk_sql)
+        for row in deferred:
+            record = io.BytesIO()
+            size = encoder.write_large_row(record, row, lob_reader.read_pieces)
+            if stats is not None:
+                stats.update([row], size)
+            yield record.getvalue()
+    finally:
+        cursor.close()
+
+def stream_table_data(mysql_conn, pg_conn, table_name, columns, buffer_size=64 * 1024 * 1024, chunk=None, encoder=None,
+                      freeze=False, reject_path=None, target_table=None, stats=None, memory_budget=None, lob_chunk_size=None,
+                      throttle=None):
+    """Transferir los datos de MySQL a PostgreSQL mediante COPY sin archivo intermedio"""
+    target_table = target_table or table_name
+    if encoder is None:
+        encoder = make_row_encoder('csv', columns)
+    stream = CopyStream(buffer_size)
+    result = {}
+    
+    def produce():
+        try:
+            result['rows'] = write_table_rows(mysql_conn, table_name, stream, chunk, encoder, stats=stats,
+                                              memory_budget=memory_budget, lob_chunk_size=lob_chunk_size, throttle=throttle)
+            stream.close()
+        except CopyStreamAborted:
+            pass
+        except Exception as e:
+            result['error'] = e
+            stream.close(error=e)
+    
+    producer = threading.Thread(target=produce, name=f"export-{table_name}", daemon=True)
+    cursor = pg_conn.cursor()
+    
+    copy_sql = build_copy_sql(target_table, encoder.column_names, encoder.copy_options(), freeze)
+    
+    try:
+        producer.start()
+        cursor.copy_expert(copy_sql, stream)
+        pg_conn.commit()
+        producer.join()
+        
+        print(f"Importados {result.get('rows', 0)} registros a la tabla {describe_chunk(table_name, chunk)} en PostgreSQL (flujo directo)")
+        return {'rows': result.get('rows', 0), 'rejected': 0}
+    except Exception as e:
+        stream.abort()
+        pg_conn.rollback()
+        producer.join()
+        print(f"Error al transferir datos de la tabla {describe_chunk(table_name, chunk)}: {result.get('error', e)}")
+        if freeze or 'error' in result or isinstance(e, LeaseLost):
+            return False
+    finally:
+        cursor.close()
+    
+    
+    print("Aislando las filas con errores mediante COPY por mitades...")
+    try:
+        if 'rows' not in result:
+            reconnect_mysql(mysql_conn)
+        if stats is not None:
+            stats.reset()
+        records = iter_row_records(mysql_conn, table_name, chunk, encoder, stats=stats, memory_budget=memory_budget,
+                                   throttle=throttle, lob_chunk_size=lob_chunk_size)
+        return copy_isolating_errors(pg_conn, target_table, encoder.column_names, encoder.copy_options(),
+                                     encoder.header(), encoder.trailer(), records, reject_path, window_bytes=buffer_size)
+    except Exception as e:
+        print(f"Error al volver a leer la tabla {describe_chunk(table_name, chunk)} desde MySQL: {e}")
+        return False
+
+def get_primary_keys(mysql_conn, table_name):
+    """Obtener las claves primarias de una tabla en MySQL"""
+    cursor = mysql_conn.cursor()
+    cursor.execute(f"""
+    SELECT COLUMN_NAME
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = '{table_name}'
+      AND CONSTRAINT_NAME = 'PRIMARY'
+    ORDER BY ORDINAL_POSITION
+    """)
+    
+    pk_columns = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return pk_columns
+
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint')
+
+def keyset_condition(pk_columns, operator, quote='`'):
+    """Construir una comparación por clave (simple o compuesta) con marcadores de parámetros"""
+    columns = ', '.join(f'{quote}{col}{quote}' for col in pk_columns)
+    placeholders = ', '.join(['%s'] * len(pk_columns))
+    if len(pk_columns) == 1:
+        return f"{columns} {operator} {placeholders}"
+    return f"({columns}) {operator} ({placeholders})"
+
+def chunk_where(chunk, quote='`'):
+    """Obtener la cláusula WHERE y sus parámetros para un rango de clave primaria"""
+    if chunk is None:
+        return "", ()
+    
+    conditions = []
+    params = []
+    if chunk.get('lower') is not None:
+        conditions.append(keyset_condition(chunk['pk_columns'], '>=', quote))
+        params.extend(chunk['lower'])
+    if chunk.get('upper') is not None:
+        conditions.append(keyset_condition(chunk['pk_columns'], '<', quote))
+        params.extend(chunk['upper'])
+    if chunk.get('since') and chunk['since'][1] is not None:
+        conditions.append(f"{quote}{chunk['since'][0]}{quote} >= %s")
+        params.append(chunk['since'][1])
+    
+    if not conditions:
+        return "", ()
+    return " WHERE " + " AND ".join(conditions), tuple(params)
+
+def chunk_source(table_name, chunk):
+    """Obtener la tabla de MySQL a leer, limitada a una partición cuando el rango corresponde a una"""
+    if chunk is not None and chunk.get('partition'):
+        return f"{table_name} PARTITION (`{chunk['partition']}`)"
+    return table_name
+
+def build_select_sql(table_name, chunk=None):
+    """Construir la consulta de lectura de una tabla o de uno de sus rangos"""
+    where_sql, params = chunk_where(chunk)
+    return f"SELECT * FROM {chunk_source(table_name, chunk)}{where_sql}", params
+
+def describe_chunk(table_name, chunk):
+    """Describir una tabla o un rango de la tabla para los mensajes de progreso"""
+    if chunk is not None and chunk.get('partition'):
+        return f"{table_name} (partición {chunk['partition']})"
+    if chunk is None or chunk['count'] <= 1:
+        return table_name
+    return f"{table_name} (rango {chunk['index'] + 1}/{chunk['count']})"
+
+def make_chunks(pk_columns, boundaries):
+    """Convertir una lista ordenada de puntos de corte en rangos [inferior, superior)"""
+    bounds = [None] + boundaries + [None]
+    count = len(bounds) - 1
+    return [
+        {
+            'index': i,
+            'count': count,
+            'pk_columns': pk_columns,
+            'lower': bounds[i],
+            'upper': bounds[i + 1],
+        }
+        for i in range(count)
+    ]
+
+def plan_table_chunks(mysql_conn, table_name, columns, pk_columns, estimated_rows, chunk_rows):
+    """Dividir una tabla grande en rangos de clave primaria que se pueden cargar por separado"""
+    if not pk_columns or chunk_rows <= 0 or estimated_rows <= chunk_rows:
+        return make_chunks(pk_columns, [])
+    
+    column_types = {col[0]: col[1].lower() for col in columns}
+    cursor = mysql_conn.cursor()
+    boundaries = []
+    
+    try:
+        if len(pk_columns) == 1 and column_types.get(pk_columns[0]) in INTEGER_TYPES:
+            
+            pk = pk_columns[0]
+            cursor.execute(f"SELECT MIN(`{pk}`), MAX(`{pk}`) FROM {table_name}")
+            min_value, max_value = cursor.fetchone()
+            cursor.fetchall()
+            if min_value is None:
+                return make_chunks(pk_columns, [])
+            
+            chunk_count = -(-estimated_rows // chunk_rows)
+            step = max(1, -(-(int(max_value) - int(min_value) + 1) // chunk_count))
+            boundary = int(min_value) + step
+            while boundary <= int(max_value):
+                boundaries.append([boundary])
+                boundary += step
+        else:
+            
+            order_by = ', '.join(f'`{col}`' for col in pk_columns)
+            select_pk = f"SELECT {order_by} FROM {table_name}"
+            cursor.execute(f"{select_pk} ORDER BY {order_by} LIMIT 1 OFFSET {chunk_rows}")
+            row = cursor.fetchone()
+            cursor.fetchall()
+            while row is not None:
+                boundaries.append(list(row))
+                cursor.execute(
+                    f"{select_pk} WHERE {keyset_condition(pk_columns, '>=')} "
+                    f"ORDER BY {order_by} LIMIT 1 OFFSET {chunk_rows}",
+                    tuple(row))
+                row = cursor.fetchone()
+                cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    chunks = make_chunks(pk_columns, boundaries)
+    print(f"Tabla {table_name} dividida en {len(chunks)} rangos de clave primaria")
+    return chunks
+
+PARTITION_KEY_FUNCTIONS = {
+    'to_days': lambda value: f"'{date.fromordinal(int(value) - 365).isoformat()}'",
+    'year': lambda value: f"'{int(value):04d}-01-01'",
+}
+
+def split_partition_values(description):
+    """Separar los valores de PARTITION_DESCRIPTION respetando las cadenas entre comillas"""
+    return [value.strip() for value in re.findall(r"'(?:[^'\\]|\\.|'')*'|[^,]+", description or '')]
+
+def partition_scheme(table_name, table):
+    """Traducir el particionado RANGE o LIST de una tabla MySQL a particionado declarativo de PostgreSQL, o None si no es posible"""
+    partitioning = table.get('partitioning')
+    if not partitioning or not partitioning['expression']:
+        return None
+    method = partitioning['method'].split()[0]
+    if method not in ('RANGE', 'LIST'):
+        return None
+    
+    column_names = [col[0] for col in table['columns']]
+    parts = [part.strip() for part in partitioning['expression'].split(',')]
+    key_columns = []
+    convert = None
+    for part in parts:
+        match = re.fullmatch(r"(\w+)\(`?(\w+)`?\)", part)
+        if match and len(parts) == 1 and method == 'RANGE' and match.group(1).lower() in PARTITION_KEY_FUNCTIONS:
+            convert = PARTITION_KEY_FUNCTIONS[match.group(1).lower()]
+            part = match.group(2)
+        column = part.strip('`')
+        if column not in column_names:
+            return None
+        key_columns.append(column)
+    if method == 'LIST' and len(key_columns) != 1:
+        return None
+    
+    children = []
+    lower = ['MINVALUE'] * len(key_columns)
+    for partition in partitioning['partitions']:
+        values = split_partition_values(partition['description'])
+        if convert is not None:
+            values = [value if value.upper() == 'MAXVALUE' else convert(value) for value in values]
+        if method == 'RANGE':
+            bounds = f"FROM ({', '.join(lower)}) TO ({', '.join(values)})"
+            lower = values
+        else:
+            bounds = f"IN ({', '.join(values)})"
+        children.append({
+            'partition': partition['name'],
+            'table': f"{table_name}_{partition['name']}",
+            'bounds': bounds,
+            'table_rows': partition['table_rows'],
+        })
+    
+    key_sql = ', '.join(f'"{col}"' for col in key_columns)
+    return {
+        'partition_by': f"{method} ({key_sql})",
+        'children': children,
+    }
+
+def partition_chunks(scheme, pk_columns):
+    """Convertir cada partición en un rango de carga que se lee con PARTITION (p) y se copia a su tabla hija"""
+    count = len(scheme['children'])
+    return [
+        {
+            'index': i,
+            'count': count,
+            'pk_columns': pk_columns,
+            'lower': None,
+            'upper': None,
+            'partition': child['partition'],
+            'target_table': child['table'],
+        }
+        for i, child in enumerate(scheme['children'])
+    ]
+
+def partition_schemes(tables, catalog, args):
+    """Obtener el particionado de PostgreSQL de cada tabla que se crea particionada"""
+    if args.flatten_partitions:
+        return {}
+    schemes = {}
+    for table_name in tables:
+        scheme = partition_scheme(table_name, catalog['tables'][table_name])
+        if scheme is not None:
+            schemes[table_name] = scheme
+    return schemes
+
+def primary_key_sql(table_name, pk_columns, only=False):
+    """Construir la sentencia que crea la clave primaria de una tabla"""
+    pk_columns_str = ', '.join(f'"{col}"' for col in pk_columns)
+    pk_name = f"pk_{table_name}"
+    only_sql = "ONLY " if only else ""
+    return f'ALTER TABLE {only_sql}"{table_name}" ADD CONSTRAINT {pk_name} PRIMARY KEY ({pk_columns_str})'
+
+def migrate_constraints(mysql_conn, pg_conn, table_name, pk_columns=None):
+    """Migrar las restricciones de clave primaria"""
+    try:
+        
+        if pk_columns is None:
+            pk_columns = get_primary_keys(mysql_conn, table_name)
+        
+        
+        if pk_columns:
+            pg_cursor = pg_conn.cursor()
+            pk_sql = primary_key_sql(table_name, pk_columns)
+            
+            try:
+                pg_cursor.execute(pk_sql)
                 pg_conn.commit()
                 print(f"Clave primaria creada para la tabla {table_name}")
             except Exception as e:
@@ -346,29 +1707,37 @@ def get_foreign_keys(mysql_conn, database):
     
     return foreign_keys
 
-def migrate_foreign_keys(mysql_conn, pg_conn, database_name):
+def foreign_key_sql(fk_name, fk_info, not_valid=False):
+    """Construir el nombre en PostgreSQL y la sentencia de creación de una clave foránea"""
+    table_name = fk_info['table_name']
+    columns = ', '.join(f'"{col}"' for col in fk_info['columns'])
+    ref_table_name = fk_info['ref_table_name']
+    ref_columns = ', '.join(f'"{col}"' for col in fk_info['ref_columns'])
+    
+    
+    pg_fk_name = f"fk_{table_name}_{ref_table_name}_{fk_name[-10:]}"
+    
+    fk_sql = f"""
+    ALTER TABLE "{table_name}"
+    ADD CONSTRAINT {pg_fk_name} FOREIGN KEY ({columns})
+    REFERENCES "{ref_table_name}" ({ref_columns})
+    """
+    if not_valid:
+        fk_sql += "NOT VALID\n"
+    return pg_fk_name, fk_sql
+
+def migrate_foreign_keys(mysql_conn, pg_conn, database_name, foreign_keys=None):
     """Migrar todas las claves foráneas después de que todas las tablas estén creadas"""
     try:
         
-        foreign_keys = get_foreign_keys(mysql_conn, database_name)
+        if foreign_keys is None:
+            foreign_keys = get_foreign_keys(mysql_conn, database_name)
         
         
         pg_cursor = pg_conn.cursor()
         
         for fk_name, fk_info in foreign_keys.items():
-            table_name = fk_info['table_name']
-            columns = ', '.join(f'"{col}"' for col in fk_info['columns'])
-            ref_table_name = fk_info['ref_table_name']
-            ref_columns = ', '.join(f'"{col}"' for col in fk_info['ref_columns'])
-            
-            
-            pg_fk_name = f"fk_{table_name}_{ref_table_name}_{fk_name[-10:]}"
-            
-            fk_sql = f"""
-            ALTER TABLE "{table_name}"
-            ADD CONSTRAINT {pg_fk_name} FOREIGN KEY ({columns})
-            REFERENCES "{ref_table_name}" ({ref_columns})
-            """
+            pg_fk_name, fk_sql = foreign_key_sql(fk_name, fk_info)
             
             try:
                 pg_cursor.execute(fk_sql)
@@ -417,25 +1786,32 @@ def get_indexes(mysql_conn, table_name):
     
     return indexes
 
-def migrate_indexes(mysql_conn, pg_conn, table_name):
+def index_sql(table_name, index_name, index_info, only=False):
+    """Construir el nombre en PostgreSQL y la sentencia de creación de un índice"""
+    columns = ', '.join(f'"{col}"' for col in index_info['columns'])
+    unique = "UNIQUE" if index_info['is_unique'] else ""
+    only_sql = "ONLY " if only else ""
+    
+    
+    pg_index_name = f"idx_{table_name}_{index_name}"
+    
+    idx_sql = f"""
+    CREATE {unique} INDEX {pg_index_name} ON {only_sql}"{table_name}" ({columns})
+    """
+    return pg_index_name, idx_sql
+
+def migrate_indexes(mysql_conn, pg_conn, table_name, indexes=None):
     """Migrar índices no relacionados con claves primarias"""
     try:
         
-        indexes = get_indexes(mysql_conn, table_name)
+        if indexes is None:
+            indexes = get_indexes(mysql_conn, table_name)
         
         
         pg_cursor = pg_conn.cursor()
         
         for index_name, index_info in indexes.items():
-            columns = ', '.join(f'"{col}"' for col in index_info['columns'])
-            unique = "UNIQUE" if index_info['is_unique'] else ""
-            
-            
-            pg_index_name = f"idx_{table_name}_{index_name}"
-            
-            idx_sql = f"""
-            CREATE {unique} INDEX {pg_index_name} ON "{table_name}" ({columns})
-            """
+            pg_index_name, idx_sql = index_sql(table_name, index_name, index_info)
             
             try:
                 pg_cursor.execute(idx_sql)
@@ -451,20 +1827,231 @@ def migrate_indexes(mysql_conn, pg_conn, table_name):
         print(f"Error al migrar índices para la tabla {table_name}: {e}")
         return False
 
-def reset_sequences(pg_conn, table_name):
-    """Resetear las secuencias de PostgreSQL para columnas auto-incrementales"""
+def load_catalog(mysql_conn):
+    """Cargar en memoria el catálogo completo del esquema MySQL con unas pocas consultas por conjunto"""
+    cursor = mysql_conn.cursor()
+    
     try:
-        cursor = pg_conn.cursor()
+        cursor.execute("SELECT DATABASE()")
+        database = cursor.fetchone()[0]
+        cursor.fetchall()
         
         
-        cursor.execute(f"""
-        SELECT column_name, column_default 
-        FROM information_schema.columns 
-        WHERE table_name = '{table_name}' 
-        AND column_default LIKE 'nextval%'
+        cursor.execute("""
+        SELECT
+            TABLE_NAME,
+            COALESCE(DATA_LENGTH, 0),
+            COALESCE(TABLE_ROWS, 0)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME
         """)
+        tables = {}
+        for table_name, data_length, table_rows in cursor.fetchall():
+            tables[table_name] = {
+                'columns': [],
+                'primary_key': [],
+                'indexes': {},
+                'auto_increment': [],
+                'numeric': {},
+                'data_length': int(data_length),
+                'table_rows': int(table_rows),
+            }
         
+        
+        cursor.execute("""
+        SELECT
+            TABLE_NAME,
+            COLUMN_NAME,
+            DATA_TYPE,
+            CHARACTER_MAXIMUM_LENGTH,
+            IS_NULLABLE,
+            COLUMN_DEFAULT,
+            EXTRA,
+            NUMERIC_PRECISION,
+            NUMERIC_SCALE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """)
         for row in cursor.fetchall():
+            table = tables.get(row[0])
+            if table is None:
+                continue
+            table['columns'].append(list(row[1:6]))
+            if 'auto_increment' in (row[6] or '').lower():
+                table['auto_increment'].append(row[1])
+            if row[2].lower() in ('decimal', 'numeric'):
+                table['numeric'][row[1]] = [int(row[7]), int(row[8])]
+        
+        
+        cursor.execute("""
+        SELECT
+            TABLE_NAME,
+            COLUMN_NAME,
+            CONSTRAINT_NAME,
+            REFERENCED_TABLE_NAME,
+            REFERENCED_COLUMN_NAME
+        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND (CONSTRAINT_NAME = 'PRIMARY' OR REFERENCED_TABLE_SCHEMA = DATABASE())
+        ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+        """)
+        foreign_keys = {}
+        for table_name, column_name, constraint_name, ref_table_name, ref_column_name in cursor.fetchall():
+            if constraint_name == 'PRIMARY':
+                if table_name in tables:
+                    tables[table_name]['primary_key'].append(column_name)
+                continue
+            
+            if constraint_name not in foreign_keys:
+                foreign_keys[constraint_name] = {
+                    'table_name': table_name,
+                    'columns': [],
+                    'ref_table_name': ref_table_name,
+                    'ref_columns': []
+                }
+            foreign_keys[constraint_name]['columns'].append(column_name)
+            foreign_keys[constraint_name]['ref_columns'].append(ref_column_name)
+        
+        
+        cursor.execute("""
+        SELECT
+            TABLE_NAME,
+            INDEX_NAME,
+            COLUMN_NAME,
+            NON_UNIQUE
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND INDEX_NAME != 'PRIMARY'
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """)
+        for table_name, index_name, column_name, non_unique in cursor.fetchall():
+            table = tables.get(table_name)
+            if table is None:
+                continue
+            index = table['indexes'].setdefault(index_name, {
+                'columns': [],
+                'is_unique': not bool(non_unique)
+            })
+            index['columns'].append(column_name)
+        
+        
+        cursor.execute("""
+        SELECT
+            TABLE_NAME,
+            PARTITION_NAME,
+            PARTITION_METHOD,
+            PARTITION_EXPRESSION,
+            PARTITION_DESCRIPTION,
+            COALESCE(TABLE_ROWS, 0),
+            COALESCE(DATA_LENGTH, 0)
+        FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION, SUBPARTITION_ORDINAL_POSITION
+        """)
+        for table_name, partition_name, method, expression, description, table_rows, data_length in cursor.fetchall():
+            table = tables.get(table_name)
+            if table is None:
+                continue
+            partitions = table.setdefault('partitioning', {
+                'method': method,
+                'expression': expression,
+                'partitions': []
+            })['partitions']
+            if partitions and partitions[-1]['name'] == partition_name:
+                partitions[-1]['table_rows'] += int(table_rows)
+                partitions[-1]['data_length'] += int(data_length)
+                continue
+            partitions.append({
+                'name': partition_name,
+                'description': description,
+                'table_rows': int(table_rows),
+                'data_length': int(data_length),
+            })
+    finally:
+        cursor.close()
+    
+    print(f"Catálogo de MySQL cargado: {len(tables)} tablas, {len(foreign_keys)} claves foráneas")
+    return {
+        'database': database,
+        'loaded_at': datetime.now().isoformat(),
+        'tables': tables,
+        'foreign_keys': foreign_keys,
+    }
+
+def describe_table(mysql_conn, table_name):
+    """Obtener la entrada de catálogo de una única tabla con las consultas por tabla"""
+    return {
+        'columns': [list(col) for col in get_table_schema(mysql_conn, table_name)],
+        'primary_key': get_primary_keys(mysql_conn, table_name),
+        'indexes': get_indexes(mysql_conn, table_name),
+        'auto_increment': [],
+        'numeric': get_numeric_columns(mysql_conn, table_name),
+        'data_length': 0,
+        'table_rows': 0,
+    }
+
+def catalog_table(catalog, mysql_conn, table_name):
+    """Obtener la información de una tabla del catálogo, consultándola a MySQL si no está"""
+    table = catalog['tables'].get(table_name) if catalog else None
+    if table is None:
+        table = describe_table(mysql_conn, table_name)
+        if catalog:
+            catalog['tables'][table_name] = table
+    return table
+
+def catalog_table_sizes(catalog):
+    """Obtener el tamaño de datos y el número estimado de filas de cada tabla del catálogo"""
+    return {name: (table['data_length'], table['table_rows']) for name, table in catalog['tables'].items()}
+
+def save_catalog(catalog, path):
+    """Guardar el catálogo en disco para reutilizarlo en ejecuciones posteriores"""
+    saved = {key: value for key, value in catalog.items() if key != 'pg_sequences'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f, default=str)
+    print(f"Catálogo guardado en {path}")
+
+def read_catalog(path):
+    """Leer un catálogo previamente guardado en disco"""
+    with open(path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    print(f"Catálogo leído de {path} (cargado el {catalog['loaded_at']})")
+    return catalog
+
+def load_pg_sequences(pg_conn):
+    """Obtener de una sola vez las columnas de PostgreSQL cuyo valor por defecto usa una secuencia"""
+    cursor = pg_conn.cursor()
+    cursor.execute("""
+    SELECT table_name, column_name, column_default
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+    AND column_default LIKE 'nextval%'
+    """)
+    
+    sequences = {}
+    for table_name, column_name, column_default in cursor.fetchall():
+        sequences.setdefault(table_name, []).append((column_name, column_default))
+    cursor.close()
+    return sequences
+
+def reset_sequences(pg_conn, table_name, sequences=None, max_values=None):
+    """Resetear las secuencias de PostgreSQL para columnas auto-incrementales"""
+    try:
+        cursor = pg_conn.cursor()
+        
+        
+        if sequences is None:
+            cursor.execute(f"""
+            SELECT column_name, column_default 
+            FROM information_schema.columns 
+            WHERE table_name = '{table_name}' 
+            AND column_default LIKE 'nextval%'
+            """)
+            sequences = cursor.fetchall()
+        
+        for row in sequences:
             column_name = row[0]
             sequence_info = row[1]
             
@@ -475,11 +2062,16 @@ def reset_sequences(pg_conn, table_name):
                 sequence_name = sequence_parts[1]
                 
                 
-                update_seq_sql = f"""
-                SELECT setval('{sequence_name}', 
-                  (SELECT COALESCE(MAX("{column_name}"), 1) FROM "{table_name}"), 
-                  (SELECT MAX("{column_name}") IS NOT NULL FROM "{table_name}"))
-                """
+                if max_values is not None and column_name in max_values:
+                    max_value = max_values[column_name]
+                    update_seq_sql = (f"SELECT setval('{sequence_name}', {int(max_value)}, true)" if max_value is not None
+                                      else f"SELECT setval('{sequence_name}', 1, false)")
+                else:
+                    update_seq_sql = f"""
+                    SELECT setval('{sequence_name}', 
+                      (SELECT COALESCE(MAX("{column_name}"), 1) FROM "{table_name}"), 
+                      (SELECT MAX("{column_name}") IS NOT NULL FROM "{table_name}"))
+                    """
                 
                 cursor.execute(update_seq_sql)
                 pg_conn.commit()
@@ -491,7 +2083,8 @@ def reset_sequences(pg_conn, table_name):
         print(f"Error al resetear secuencias para la tabla {table_name}: {e}")
         return False
 
-def generate_migration_report(tables, success_tables, failed_tables, start_time):
+def generate_migration_report(tables, success_tables, failed_tables, start_time, index_timings=None, fk_timings=None,
+                              rejected_rows=None, verification=None, table_stats=None, stage_timings=None, phase_timings=None):
     """Generar un informe de migración"""
     end_time = datetime.now()
     duration = end_time - start_time
@@ -516,6 +2109,58 @@ def generate_migration_report(tables, success_tables, failed_tables, start_time)
         for table in failed_tables:
             report += f"    - {table}\n"
     
+    if table_stats:
+        report += "\n    Filas y volumen de datos por tabla:\n"
+        for table, stats in sorted(table_stats.items(), key=lambda item: item[1]['bytes'], reverse=True):
+            report += f"    - {table}: {stats['rows']} filas leídas, {stats['bytes'] / (1024 * 1024):.1f} MB"
+            if stats['nulls']:
+                report += ", NULL: " + ", ".join(f"{name}={count}" for name, count in sorted(stats['nulls'].items()))
+            report += "\n"
+    
+    if phase_timings:
+        report += "\n    Duración de cada fase:\n"
+        for phase, seconds in phase_timings:
+            report += f"    - {phase}: {timedelta(seconds=round(seconds))}\n"
+    
+    if stage_timings:
+        totals = collections.Counter()
+        for stages in stage_timings.values():
+            totals.update(stages)
+        report += "\n    Tiempo acumulado por etapa (suma de todas las sesiones):\n"
+        for stage, seconds in totals.most_common():
+            report += f"    - {stage}: {seconds:.1f}s\n"
+        
+        report += "\n    Tablas más lentas:\n"
+        for table, stages in sorted(stage_timings.items(), key=lambda item: sum(item[1].values()), reverse=True)[:10]:
+            detail = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in collections.Counter(stages).most_common())
+            report += f"    - {table}: {sum(stages.values()):.1f}s ({detail})\n"
+        
+        report += "\n    Etapas más lentas:\n"
+        slowest = sorted(((seconds, table, stage) for table, stages in stage_timings.items() for stage, seconds in stages.items()),
+                         reverse=True)[:10]
+        for seconds, table, stage in slowest:
+            report += f"    - {table}.{stage}: {seconds:.1f}s\n"
+    
+    if rejected_rows:
+        report += f"\n    Filas rechazadas: {sum(rejected_rows.values())}\n"
+        for table, count in sorted(rejected_rows.items()):
+            report += f"    - {table}: {count}\n"
+    
+    if index_timings:
+        report += "\n    Tiempo de construcción de claves e índices:\n"
+        for timing in index_timings:
+            status = "" if timing['success'] else " (error)"
+            report += f"    - {timing['table']}.{timing['name']}: {timing['seconds']:.1f}s{status}\n"
+    
+    if fk_timings:
+        report += "\n    Tiempo de validación de claves foráneas:\n"
+        for timing in fk_timings:
+            status = "" if timing['success'] else " (error)"
+            report += f"    - {timing['table']}.{timing['name']}: {timing['seconds']:.1f}s{status}\n"
+    
+    if verification is not None:
+        report += format_verification_report(verification)
+    
     print(report)
     
     
@@ -524,95 +2169,2814 @@ def generate_migration_report(tables, success_tables, failed_tables, start_time)
     
     print("Informe de migración guardado en 'migration_report.txt'")
 
-def main():
-    parser = argparse.ArgumentParser(description="Migrar base de datos de MySQL a PostgreSQL")
+class MigrationManifest:
+    """Diario JSON-lines que registra el estado de cada tabla y rango para poder reanudar la migración"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.tables = {}
+        self._lock = threading.Lock()
+        
+        if resume and os.path.exists(path):
+            self._replay()
+            mode = 'a'
+        else:
+            mode = 'w'
+        self._file = open(path, mode, encoding='utf-8')
+
+    def _replay(self):
+        """Reconstruir el estado de las tablas a partir de los eventos del diario"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(entry)
+
+    def _apply(self, entry):
+        state = self.tables.setdefault(entry['table'], {
+            'status': 'pending',
+            'chunks': None,
+            'done_chunks': {},
+            'started_chunks': None,
+        })
+        event = entry['event']
+        if event == 'chunks_planned':
+            state['chunks'] = entry['chunks']
+            state['done_chunks'] = {}
+            state['started_chunks'] = None
+            state['rows'] = 0
+            state['rejected'] = 0
+            state['stats'] = None
+        elif event == 'chunk_started':
+            if state['started_chunks'] is None:
+                state['started_chunks'] = set()
+            state['started_chunks'].add(entry['chunk'])
+        elif event == 'chunk_done':
+            state['done_chunks'][entry['chunk']] = entry.get('position')
+            state['rows'] = state.get('rows', 0) + entry.get('rows', 0)
+            state['rejected'] = state.get('rejected', 0) + entry.get('rejected', 0)
+            if entry.get('stats'):
+                state['stats'] = merge_column_stats(state.get('stats'), entry['stats'])
+        elif event == 'table_indexed':
+            state['indexed'] = True
+        if event == 'table_started' and 'watermark' in entry:
+            state['watermark'] = entry['watermark']
+        if event in ('table_started', 'table_loaded', 'table_done', 'table_failed'):
+            state['status'] = event[len('table_'):]
+
+    def record(self, event, table_name, **fields):
+        """Añadir un evento al diario y forzar su escritura en disco"""
+        entry = {'time': datetime.now().isoformat(), 'event': event, 'table': table_name}
+        entry.update(fields)
+        with self._lock:
+            self._apply(json.loads(json.dumps(entry, default=str)))
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def table_state(self, table_name):
+        """Obtener el estado registrado de una tabla, o None si no aparece en el diario"""
+        with self._lock:
+            return self.tables.get(table_name)
+
+    def is_table_done(self, table_name):
+        state = self.table_state(table_name)
+        return state is not None and state['status'] == 'done'
+
+    def rejected_rows(self):
+        """Obtener el número de filas rechazadas por tabla"""
+        with self._lock:
+            return {name: state['rejected'] for name, state in self.tables.items() if state.get('rejected')}
+
+    def table_stats(self):
+        """Obtener las estadísticas acumuladas de las columnas de cada tabla cargada"""
+        with self._lock:
+            return {name: state['stats'] for name, state in self.tables.items() if state.get('stats')}
+
+    def is_table_indexed(self, table_name):
+        state = self.table_state(table_name)
+        return state is not None and state.get('indexed', False)
+
+    def is_chunk_done(self, table_name, chunk):
+        state = self.table_state(table_name)
+        return state is not None and chunk['index'] in state['done_chunks']
+
+    def may_have_chunk_rows(self, table_name, chunk):
+        """Indicar si un rango pendiente pudo dejar filas en PostgreSQL (diarios sin chunk_started cuentan como empezados)"""
+        state = self.table_state(table_name)
+        if state is None or state['started_chunks'] is None:
+            return True
+        return chunk['index'] in state['started_chunks']
+
+    def last_position(self, table_name):
+        """Obtener la última posición de clave confirmada de forma contigua desde el inicio de la tabla"""
+        state = self.table_state(table_name)
+        if not state or not state['chunks']:
+            return None
+        position = None
+        for chunk in state['chunks']:
+            if chunk['index'] not in state['done_chunks']:
+                break
+            position = state['done_chunks'][chunk['index']]
+        return position
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def _prometheus_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class MigrationProgress:
+    """Progreso de la migración por tabla y por etapa, emitido periódicamente en la consola, como JSON y como métricas de Prometheus"""
+
+    def __init__(self, estimates, interval=30, log_path=None, metrics_path=None):
+        self.estimates = estimates
+        self.interval = interval
+        self.metrics_path = metrics_path
+        self.rows = collections.Counter()
+        self.bytes = collections.Counter()
+        self.stages = collections.defaultdict(collections.Counter)
+        self.finished = set()
+        self.phase = None
+        self.phases = []
+        self.started = time.monotonic()
+        self._last_sample = (self.started, 0, 0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def start(self):
+        """Empezar a emitir el progreso cada interval segundos en un hilo propio"""
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.emit()
+
+    def log(self, event, **fields):
+        """Añadir un evento al registro JSON, si se ha pedido"""
+        entry = {'time': datetime.now().isoformat(), 'event': event}
+        entry.update(fields)
+        with self._lock:
+            if self._log is not None:
+                self._log.write(json.dumps(entry, default=str) + "\n")
+                self._log.flush()
+
+    def add_rows(self, table_name, rows, encoded_bytes):
+        with self._lock:
+            self.rows[table_name] += rows
+            self.bytes[table_name] += encoded_bytes
+
+    def row_counter(self, table_name):
+        """Obtener la función con la que ColumnStats suma al progreso los lotes de una tabla"""
+        return lambda rows, encoded_bytes: self.add_rows(table_name, rows, encoded_bytes)
+
+    def add_stage_time(self, table_name, stage, seconds):
+        with self._lock:
+            self.stages[table_name][stage] += seconds
+        self.log('stage_done', table=table_name, stage=stage, seconds=round(seconds, 3))
+
+    @contextlib.contextmanager
+    def stage(self, table_name, stage):
+        """Medir la duración de una etapa de una tabla"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_stage_time(table_name, stage, time.monotonic() - started)
+
+    def table_finished(self, table_name, success=True):
+        with self._lock:
+            self.finished.add(table_name)
+            rows, encoded_bytes = self.rows[table_name], self.bytes[table_name]
+        self.log('table_finished', table=table_name, success=success, rows=rows, bytes=encoded_bytes)
+
+    def chunk_finished(self, table_name, chunk, rows, encoded_bytes):
+        """Registrar un rango cargado por un worker de la cola, que no sabe cuándo termina su tabla"""
+        self.log('chunk_finished', table=table_name, chunk=chunk['index'], rows=rows, bytes=encoded_bytes)
+
+    def set_phase(self, phase):
+        """Cerrar la fase en curso de la migración y empezar la siguiente"""
+        now = time.monotonic()
+        with self._lock:
+            if self.phases and self.phases[-1][2] is None:
+                self.phases[-1][2] = now
+            if phase is not None:
+                self.phases.append([phase, now, None])
+            self.phase = phase
+        if phase is not None:
+            self.log('phase_started', phase=phase)
+
+    def snapshot(self):
+        """Calcular el progreso actual: filas y bytes frente a la estimación, velocidad y tiempo restante"""
+        now = time.monotonic()
+        with self._lock:
+            tables = set(self.estimates) | set(self.rows)
+            rows_done = sum(self.rows.values())
+            bytes_done = sum(self.bytes.values())
+            rows_estimated = sum(
+                self.rows[name] if name in self.finished else max(self.rows[name], self.estimates.get(name, (0, 0))[1])
+                for name in tables)
+            bytes_estimated = sum(size for name, (size, _) in self.estimates.items())
+            active = {
+                name: {'rows': self.rows[name], 'rows_estimated': self.estimates.get(name, (0, 0))[1]}
+                for name in self.rows if name not in self.finished
+            }
+            tables_done = len(self.finished)
+            last_time, last_rows, last_bytes = self._last_sample
+            self._last_sample = (now, rows_done, bytes_done)
+            phase = self.phase
+        
+        elapsed = now - self.started
+        window = max(now - last_time, 1e-6)
+        average_rate = rows_done / elapsed if elapsed > 0 else 0
+        remaining = max(0, rows_estimated - rows_done)
+        return {
+            'phase': phase,
+            'elapsed_seconds': round(elapsed, 1),
+            'tables_done': tables_done,
+            'tables_total': len(tables),
+            'rows_done': rows_done,
+            'rows_estimated': rows_estimated,
+            'bytes_done': bytes_done,
+            'bytes_estimated': bytes_estimated,
+            'rows_per_second': round((rows_done - last_rows) / window, 1),
+            'mb_per_second': round((bytes_done - last_bytes) / window / (1024 * 1024), 3),
+            'eta_seconds': round(remaining / average_rate) if average_rate > 0 else None,
+            'active_tables': active,
+        }
+
+    def emit(self):
+        """Mostrar el progreso en la consola, añadirlo al registro JSON y reescribir el archivo de métricas"""
+        snapshot = self.snapshot()
+        percent = 100.0 * snapshot['rows_done'] / snapshot['rows_estimated'] if snapshot['rows_estimated'] else 100.0
+        eta = timedelta(seconds=snapshot['eta_seconds']) if snapshot['eta_seconds'] is not None else "desconocido"
+        print(f"[progreso] fase {snapshot['phase'] or 'terminada'}: {snapshot['rows_done']}/{snapshot['rows_estimated']} filas ({percent:.1f}%), "
+              f"{snapshot['bytes_done'] / (1024 * 1024):.1f} MB, {snapshot['rows_per_second']:.0f} filas/s, "
+              f"{snapshot['mb_per_second']:.1f} MB/s, {snapshot['tables_done']}/{snapshot['tables_total']} tablas, ETA {eta}")
+        self.log('progress', **snapshot)
+        if self.metrics_path:
+            self.write_metrics(snapshot)
+
+    def write_metrics(self, snapshot):
+        """Escribir las métricas en formato de texto de Prometheus, reemplazando el archivo de forma atómica"""
+        with self._lock:
+            rows = dict(self.rows)
+            encoded_bytes = dict(self.bytes)
+            stages = {name: dict(stages) for name, stages in self.stages.items()}
+        
+        lines = []
+        
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP mysqltopg_{name} {help_text}")
+            lines.append(f"# TYPE mysqltopg_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_prometheus_label(label)}"' for key, label in labels)
+                lines.append(f"mysqltopg_{name}{{{label_text}}} {value}" if labels else f"mysqltopg_{name} {value}")
+        
+        metric('rows_done', 'counter', "Filas leídas de MySQL y enviadas a COPY",
+               [((('table', name),), count) for name, count in sorted(rows.items())])
+        metric('bytes_done', 'counter', "Bytes codificados para COPY",
+               [((('table', name),), count) for name, count in sorted(encoded_bytes.items())])
+        metric('rows_estimated', 'gauge', "Filas estimadas por INFORMATION_SCHEMA.TABLES",
+               [((('table', name),), estimate[1]) for name, estimate in sorted(self.estimates.items())])
+        metric('stage_seconds', 'counter', "Segundos acumulados por tabla y etapa",
+               [((('table', name), ('stage', stage)), round(seconds, 3))
+                for name, table_stages in sorted(stages.items()) for stage, seconds in sorted(table_stages.items())])
+        metric('rows_per_second', 'gauge', "Filas por segundo desde la muestra anterior", [((), snapshot['rows_per_second'])])
+        metric('eta_seconds', 'gauge', "Segundos estimados hasta terminar la copia de datos",
+               [((), snapshot['eta_seconds'] if snapshot['eta_seconds'] is not None else 'NaN')])
+        metric('tables_done', 'gauge', "Tablas terminadas", [((), snapshot['tables_done'])])
+        metric('tables_total', 'gauge', "Tablas a migrar", [((), snapshot['tables_total'])])
+        metric('phase', 'gauge', "Fase en curso de la migración", [((('phase', snapshot['phase']),), 1)] if snapshot['phase'] else [])
+        
+        temporary_path = f"{self.metrics_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self.metrics_path)
+
+    def stage_timings(self):
+        """Obtener los segundos acumulados de cada etapa por tabla"""
+        with self._lock:
+            return {name: dict(stages) for name, stages in self.stages.items()}
+
+    def phase_timings(self):
+        """Obtener la duración de cada fase de la migración"""
+        now = time.monotonic()
+        with self._lock:
+            return [(phase, (end or now) - start) for phase, start, end in self.phases]
+
+    def close(self):
+        """Detener el hilo de progreso y emitir la última muestra"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.set_phase(None)
+        self.emit()
+        if self._log is not None:
+            with self._lock:
+                self._log.close()
+                self._log = None
+
+def progress_stage(progress, table_name, stage):
+    """Medir una etapa de una tabla en el progreso de la migración, si se está registrando"""
+    if progress is None:
+        return contextlib.nullcontext()
+    return progress.stage(table_name, stage)
+
+class ShardProgress:
+    """Vista del progreso de la migración que antepone la base de datos de origen al nombre de cada tabla"""
+
+    def __init__(self, progress, database):
+        self.progress = progress
+        self.database = database
+
+    def row_counter(self, table_name):
+        return self.progress.row_counter(f"{self.database}.{table_name}")
+
+    def add_stage_time(self, table_name, stage, seconds):
+        self.progress.add_stage_time(f"{self.database}.{table_name}", stage, seconds)
+
+    def stage(self, table_name, stage):
+        return self.progress.stage(f"{self.database}.{table_name}", stage)
+
+def connect_pg_for_load(args):
+    """Abrir una conexión a PostgreSQL con los parámetros de sesión de la carga"""
+    pg_conn = connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+    settings = dict(fast_load_settings(args), **target_schema_settings(args))
+    if pg_conn and settings:
+        apply_session_settings(pg_conn, settings)
+    return pg_conn
+
+def use_shard(mysql_conn, pg_conn, database, schema):
+    """Situar una conexión de MySQL en la base de datos de un shard y una de PostgreSQL en su esquema de destino"""
+    if mysql_conn is not None:
+        cursor = mysql_conn.cursor()
+        try:
+            cursor.execute(f"USE `{database}`")
+        finally:
+            cursor.close()
+        mysql_conn.shard_database = database
+    if pg_conn is not None:
+        apply_session_settings(pg_conn, {'search_path': f'"{schema}"'})
+
+def reconnect_mysql(mysql_conn):
+    """Reabrir una conexión de MySQL devolviéndola a la base de datos del shard en la que estaba situada"""
+    mysql_conn.reconnect()
+    database = getattr(mysql_conn, 'shard_database', None)
+    if database is not None:
+        use_shard(mysql_conn, None, database, None)
+
+class WorkerPools:
+    """Conexiones y executor compartidos por los workers que cargan rangos de tablas"""
+
+    shard = None
+
+    def __init__(self, args, jobs):
+        self.mysql_pool = ConnectionPool(
+            lambda: connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port),
+            jobs * 2)
+        self.pg_pool = ConnectionPool(lambda: connect_pg_for_load(args), jobs * 2)
+        self.chunk_executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="chunk")
+
+    def for_shard(self, database, schema):
+        """Obtener una vista de los pools cuyas conexiones se sitúan en la base de datos y el esquema de un shard"""
+        view = copy.copy(self)
+        view.shard = (database, schema)
+        return view
+
+    def run(self, func, *args):
+        """Ejecutar func con una pareja de conexiones tomada de los pools"""
+        with self.mysql_pool.connection() as mysql_conn, self.pg_pool.connection() as pg_conn:
+            if self.shard is not None:
+                use_shard(mysql_conn, pg_conn, *self.shard)
+            return func(mysql_conn, pg_conn, *args)
+
+    def submit_chunk(self, func, *args):
+        """Encolar la carga de un rango en el executor de rangos"""
+        return self.chunk_executor.submit(self.run, func, *args)
+
+    def close(self):
+        self.chunk_executor.shutdown(wait=True)
+        self.mysql_pool.close_all()
+        self.pg_pool.close_all()
+
+def load_table_data(mysql_conn, pg_conn, table_name, columns, args, chunk=None, freeze=False, target_table=None,
+                    progress=None, throttle=None):
+    """Copiar los datos de una tabla o de uno de sus rangos de MySQL a PostgreSQL"""
+    if target_table is None and chunk is not None:
+        target_table = chunk.get('target_table')
+    encoder = make_row_encoder(args.copy_format, columns, include_header=not args.stream)
+    reject_path = os.path.join(args.output_dir, f"{table_name}.rejects.jsonl")
+    stats = ColumnStats(columns, progress.row_counter(table_name) if progress is not None else None)
+    memory_budget = args.batch_memory_mb * 1024 * 1024
+    lob_chunk_size = args.lob_chunk_mb * 1024 * 1024
+    if args.stream:
+        with progress_stage(progress, table_name, 'copy'), throttle_reader(throttle):
+            result = stream_table_data(mysql_conn, pg_conn, table_name, columns, args.stream_buffer_mb * 1024 * 1024,
+                                       chunk, encoder, freeze, reject_path, target_table, stats, memory_budget, lob_chunk_size,
+                                       throttle)
+    else:
+        with progress_stage(progress, table_name, 'export'), throttle_reader(throttle):
+            data_file = export_table_data(mysql_conn, table_name, args.output_dir, chunk, encoder, stats,
+                                          memory_budget, lob_chunk_size, throttle)
+        if not data_file:
+            stats.reset()
+            return False
+        with progress_stage(progress, table_name, 'copy'):
+            result = import_table_data(pg_conn, target_table or table_name, data_file, columns, freeze, reject_path,
+                                       buffer_size=args.stream_buffer_mb * 1024 * 1024)
     
+    if not result:
+        stats.reset()
+    else:
+        result['rows'] = stats.rows - result['rejected']
+        result['stats'] = stats.as_dict()
+    return result
+
+def clear_chunk_data(pg_conn, table_name, chunk):
+    """Eliminar de PostgreSQL las filas de un rango que pudo quedar cargado en una ejecución interrumpida"""
+    cursor = pg_conn.cursor()
+    where_sql, params = chunk_where(chunk, quote='"')
     
-    parser.add_argument("--mysql-host", required=True, help="Host MySQL")
-    parser.add_argument("--mysql-db", required=True, help="Nombre de la base de datos MySQL")
-    parser.add_argument("--mysql-user", required=True, help="Usuario MySQL")
-    parser.add_argument("--mysql-password", required=True, help="Contraseña MySQL")
-    parser.add_argument("--mysql-port", default=3306, type=int, help="Puerto MySQL (default: 3306)")
+    try:
+        if chunk.get('target_table'):
+            cursor.execute(f'TRUNCATE "{chunk["target_table"]}"')
+        else:
+            cursor.execute(f'DELETE FROM "{table_name}"{where_sql}', params)
+        pg_conn.commit()
+        return True
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Error al limpiar los datos previos de la tabla {describe_chunk(table_name, chunk)}: {e}")
+        return False
+    finally:
+        cursor.close()
+
+def load_checkpointed_chunk(mysql_conn, pg_conn, table_name, columns, args, chunk, manifest=None, resuming=False, freeze=False,
+                            progress=None, throttle=None):
+    """Cargar un rango y registrarlo en el diario de la migración una vez confirmado"""
+    if resuming and (manifest is None or manifest.may_have_chunk_rows(table_name, chunk)):
+        if not clear_chunk_data(pg_conn, table_name, chunk):
+            return False
+    if manifest is not None:
+        manifest.record('chunk_started', table_name, chunk=chunk['index'])
     
+    result = load_table_data(mysql_conn, pg_conn, table_name, columns, args, chunk, freeze, progress=progress, throttle=throttle)
+    if not result:
+        return False
     
-    parser.add_argument("--pg-host", required=True, help="Host PostgreSQL")
-    parser.add_argument("--pg-db", required=True, help="Nombre de la base de datos PostgreSQL")
-    parser.add_argument("--pg-user", required=True, help="Usuario PostgreSQL")
-    parser.add_argument("--pg-password", required=True, help="Contraseña PostgreSQL")
-    parser.add_argument("--pg-port", default=5432, type=int, help="Puerto PostgreSQL (default: 5432)")
+    if manifest is not None:
+        manifest.record('chunk_done', table_name, chunk=chunk['index'], position=chunk['upper'],
+                        rows=result['rows'], rejected=result['rejected'], stats=result['stats'])
+    return result
+
+def load_table_chunks(mysql_conn, pg_conn, table_name, columns, chunks, args, workers=None, manifest=None,
+                      resuming=False, freeze=False, progress=None, throttle=None):
+    """Cargar todos los rangos pendientes de una tabla, en paralelo cuando hay workers disponibles"""
+    if manifest is not None:
+        chunks = [chunk for chunk in chunks if not manifest.is_chunk_done(table_name, chunk)]
     
+    totals = {'rows': 0, 'rejected': 0, 'stats': None}
     
-    parser.add_argument("--output-dir", default="./exported_data", help="Directorio para archivos CSV exportados")
-    parser.add_argument("--tables", nargs="+", help="Lista específica de tablas a migrar (opcional)")
+    if workers is None or len(chunks) <= 1:
+        for chunk in chunks:
+            result = load_checkpointed_chunk(mysql_conn, pg_conn, table_name, columns, args, chunk, manifest,
+                                             resuming, freeze and len(chunks) == 1, progress, throttle)
+            if not result:
+                return False
+            totals['rows'] += result['rows']
+            totals['rejected'] += result['rejected']
+            totals['stats'] = merge_column_stats(totals['stats'], result['stats'])
+        return totals
     
-    args = parser.parse_args()
+    futures = [
+        workers.submit_chunk(load_checkpointed_chunk, table_name, columns, args, chunk, manifest, resuming, False, progress,
+                             throttle)
+        for chunk in chunks
+    ]
+    success = True
+    for future in concurrent.futures.as_completed(futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error al cargar un rango de la tabla {table_name}: {e}")
+            result = False
+        if result:
+            totals['rows'] += result['rows']
+            totals['rejected'] += result['rejected']
+            totals['stats'] = merge_column_stats(totals['stats'], result['stats'])
+        else:
+            success = False
+    return totals if success else False
+
+def migrate_table(mysql_conn, pg_conn, table_name, args, catalog=None, workers=None, manifest=None, watermarks=None,
+                  progress=None, throttle=None, planned_chunks=None):
+    """Ejecutar la migración de una tabla: estructura, datos y secuencias (claves e índices van en su propia fase)"""
+    if manifest is not None and manifest.is_table_done(table_name):
+        print(f"\nTabla {table_name} ya migrada en una ejecución anterior, se omite")
+        return True
     
-    start_time = datetime.now()
-    print(f"Iniciando migración: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"\nProcesando tabla: {table_name}")
+    previous_state = manifest.table_state(table_name) if manifest is not None else None
     
     
-    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
-    pg_conn = connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+    table = catalog_table(catalog, mysql_conn, table_name)
+    columns = table['columns']
+    scheme = None if args.flatten_partitions else partition_scheme(table_name, table)
+    if table.get('partitioning') and scheme is None and not args.flatten_partitions:
+        print(f"El particionado {table['partitioning']['method']} de la tabla {table_name} no tiene equivalente "
+              f"declarativo, se crea como tabla normal")
     
-    if not mysql_conn or not pg_conn:
-        print("No se pudo establecer conexión con una o ambas bases de datos. Abortando.")
-        return
     
+    watermark = previous_state.get('watermark') if previous_state is not None else None
+    if watermarks is not None and watermark is None:
+        watermark = capture_watermark(mysql_conn, table_name, table, args.watermark_column)
     
-    tables = args.tables if args.tables else get_tables(mysql_conn)
-    print(f"Se encontraron {len(tables)} tablas para migrar")
     
-    success_tables = []
-    failed_tables = []
+    if previous_state is not None and previous_state['chunks']:
+        chunks = previous_state['chunks']
+        print(f"Reanudando tabla {table_name}: {len(previous_state['done_chunks'])}/{len(chunks)} rangos completados, "
+              f"última posición confirmada {manifest.last_position(table_name)}")
+    else:
+        if planned_chunks is not None:
+            chunks = planned_chunks
+        elif scheme is not None:
+            chunks = partition_chunks(scheme, table['primary_key'])
+            print(f"Tabla {table_name} particionada: {len(chunks)} particiones se cargarán en paralelo")
+        else:
+            chunks = plan_table_chunks(mysql_conn, table_name, columns, table['primary_key'], table['table_rows'], args.chunk_rows)
+        if manifest is not None:
+            manifest.record('table_started', table_name, watermark=watermark)
+            manifest.record('chunks_planned', table_name, chunks=chunks)
     
     
-    for table_name in tables:
-        print(f"\nProcesando tabla: {table_name}")
-        
-        
-        columns = get_table_schema(mysql_conn, table_name)
-        
-        
-        if not create_postgresql_table(pg_conn, table_name, columns):
-            failed_tables.append(table_name)
-            continue
+    freeze = args.fast_load and previous_state is None and len(chunks) == 1 and scheme is None
+    if args.fast_load and not freeze:
+        if previous_state is not None:
+            reason = "se está reanudando"
+        elif scheme is not None:
+            reason = "está particionada"
+        else:
+            reason = f"se carga en {len(chunks)} rangos"
+        print(f"Aviso: la tabla {table_name} se carga sin COPY FREEZE porque {reason}; --fast-load solo congela "
+              f"las tablas que se cargan en un único rango")
+    unlogged = args.unlogged and scheme is None
+    with progress_stage(progress, table_name, 'schema'):
+        created = create_postgresql_table(pg_conn, table_name, columns, unlogged=unlogged, commit=not freeze,
+                                          partitioning=scheme)
+    if not created:
+        return False
+    
+    
+    if previous_state is None or previous_state['status'] != 'loaded':
+        loaded = load_table_chunks(mysql_conn, pg_conn, table_name, columns, chunks, args, workers,
+                                   manifest, resuming=previous_state is not None, freeze=freeze, progress=progress,
+                                   throttle=throttle)
+        if not loaded and freeze:
+            
+            pg_conn.rollback()
+            print(f"Reintentando la carga de la tabla {table_name} sin FREEZE para aislar las filas con errores")
+            loaded = (create_postgresql_table(pg_conn, table_name, columns, unlogged=unlogged)
+                      and load_table_chunks(mysql_conn, pg_conn, table_name, columns, chunks, args, workers, manifest,
+                                            progress=progress, throttle=throttle))
+        if not loaded:
+            pg_conn.rollback()
+            if manifest is not None:
+                manifest.record('table_failed', table_name)
+            return False
+        if manifest is not None:
+            manifest.record('table_loaded', table_name)
+    
+    
+    stats = manifest.table_state(table_name).get('stats') if manifest is not None else loaded.get('stats')
+    pg_sequences = catalog.get('pg_sequences') if catalog else None
+    with progress_stage(progress, table_name, 'sequences'):
+        reset_sequences(pg_conn, table_name, pg_sequences.get(table_name, []) if pg_sequences is not None else None,
+                        stats['max'] if stats else None)
+    
+    if manifest is not None:
+        manifest.record('table_done', table_name)
+    if watermarks is not None:
+        watermarks.set(table_name, *watermark)
+    return True
+
+def watermark_column(table, preferred='updated_at'):
+    """Elegir la columna de marca de agua de una tabla: la columna indicada o su clave primaria auto-incremental"""
+    if preferred in [col[0] for col in table['columns']]:
+        return preferred
+    pk_columns = table['primary_key']
+    if len(pk_columns) == 1 and pk_columns[0] in table['auto_increment']:
+        return pk_columns[0]
+    return None
+
+def capture_watermark(mysql_conn, table_name, table, preferred='updated_at'):
+    """Leer de MySQL la marca de agua actual de una tabla antes de copiar sus filas"""
+    column = watermark_column(table, preferred)
+    if column is None:
+        print(f"La tabla {table_name} no tiene columna {preferred} ni clave auto-incremental: "
+              f"cada sincronización incremental la copiará completa")
+        return [None, None]
+    
+    cursor = mysql_conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX(`{column}`) FROM {table_name}")
+        value = cursor.fetchone()[0]
+        cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    if value is not None and not isinstance(value, int):
+        value = str(value)
+    return [column, value]
+
+class WatermarkStore:
+    """Marcas de agua por tabla de la sincronización incremental, guardadas en un archivo JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tables = {}
+        self._lock = threading.Lock()
+        
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.tables = json.load(f)
+
+    def get(self, table_name):
+        with self._lock:
+            return self.tables.get(table_name)
+
+    def set(self, table_name, column, value):
+        """Registrar la marca de agua de una tabla y reescribir el archivo de forma atómica"""
+        with self._lock:
+            self.tables[table_name] = {'column': column, 'value': value, 'synced_at': datetime.now().isoformat()}
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.tables, f, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+
+def upsert_sql(table_name, staging_table, column_names, pk_columns):
+    """Construir el INSERT ... ON CONFLICT que aplica las filas de la tabla de staging sobre la tabla destino"""
+    columns = ', '.join(f'"{col}"' for col in column_names)
+    conflict = ', '.join(f'"{col}"' for col in pk_columns)
+    updates = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in column_names if col not in pk_columns)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return (f'INSERT INTO "{table_name}" ({columns}) SELECT {columns} FROM "{staging_table}" '
+            f'ON CONFLICT ({conflict}) {action}')
+
+def sync_table_delta(mysql_conn, pg_conn, table_name, args, catalog, watermarks, progress=None, throttle=None):
+    """Copiar las filas posteriores a la marca de agua a una tabla de staging y aplicarlas con INSERT ... ON CONFLICT"""
+    print(f"\nSincronizando cambios de la tabla: {table_name}")
+    table = catalog_table(catalog, mysql_conn, table_name)
+    columns = table['columns']
+    pk_columns = table['primary_key']
+    if not pk_columns:
+        print(f"La tabla {table_name} no tiene clave primaria, no se puede sincronizar de forma incremental")
+        return False
+    
+    
+    previous = watermarks.get(table_name)
+    column, value = capture_watermark(mysql_conn, table_name, table, args.watermark_column)
+    if column != previous['column']:
+        previous = {'column': column, 'value': None}
+    chunk = {
+        'index': 0,
+        'count': 1,
+        'pk_columns': pk_columns,
+        'lower': None,
+        'upper': None,
+        'since': [column, previous['value']] if column else None,
+    }
+    print(f"Copiando filas con {column} >= {previous['value']}" if column and previous['value'] is not None
+          else f"Copiando la tabla {table_name} completa")
+    
+    
+    staging_table = f"_delta_{table_name}"
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(f'DROP TABLE IF EXISTS pg_temp."{staging_table}"')
+        cursor.execute(f'CREATE TEMP TABLE "{staging_table}" (LIKE "{table_name}" INCLUDING DEFAULTS)')
+        pg_conn.commit()
         
+        if not load_table_data(mysql_conn, pg_conn, table_name, columns, args, chunk, target_table=staging_table,
+                               progress=progress, throttle=throttle):
+            raise RuntimeError("no se pudieron copiar las filas a la tabla de staging")
         
-        csv_file = export_table_data(mysql_conn, table_name, args.output_dir)
-        if not csv_file:
-            failed_tables.append(table_name)
+        with progress_stage(progress, table_name, 'upsert'):
+            cursor.execute(upsert_sql(table_name, staging_table, [col[0] for col in columns], pk_columns))
+        merged_rows = cursor.rowcount
+        cursor.execute(f'DROP TABLE pg_temp."{staging_table}"')
+        pg_conn.commit()
+        print(f"{merged_rows} filas insertadas o actualizadas en la tabla {table_name}")
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"Error al sincronizar la tabla {table_name}: {e}")
+        return False
+    finally:
+        cursor.close()
+    
+    
+    pg_sequences = catalog.get('pg_sequences')
+    with progress_stage(progress, table_name, 'sequences'):
+        reset_sequences(pg_conn, table_name, pg_sequences.get(table_name, []) if pg_sequences is not None else None)
+    
+    watermarks.set(table_name, column, value if value is not None else previous['value'])
+    return True
+
+def order_tables_by_dependencies(tables, foreign_keys):
+    """Ordenar las tablas para que cada tabla referenciada se procese antes que las que la referencian"""
+    parents = {table_name: set() for table_name in tables}
+    for fk_info in foreign_keys.values():
+        if fk_info['table_name'] in parents and fk_info['ref_table_name'] in parents:
+            if fk_info['ref_table_name'] != fk_info['table_name']:
+                parents[fk_info['table_name']].add(fk_info['ref_table_name'])
+    
+    ordered = []
+    pending = list(tables)
+    while pending:
+        ready = [table_name for table_name in pending if parents[table_name] <= set(ordered)]
+        if not ready:
+            ready = pending[:1]
+        ordered.extend(ready)
+        pending = [table_name for table_name in pending if table_name not in ready]
+    return ordered
+
+def attached_index_builds(table_name, scheme, stage, parent_name, parent_sql, child_index):
+    """Preparar un índice de una tabla particionada: vacío sobre el padre y construido en cada partición, que se adjunta al terminar"""
+    builds = [{'table': table_name, 'name': parent_name, 'stage': stage, 'sql': parent_sql, 'prepare': True}]
+    for child in scheme['children']:
+        child_name, child_sql = child_index(child['table'])
+        builds.append({
+            'table': table_name,
+            'name': child_name,
+            'stage': stage,
+            'sql': f"{child_sql.strip()};\nALTER INDEX {parent_name} ATTACH PARTITION {child_name}",
+        })
+    return builds
+
+def plan_index_builds(tables, catalog, schemes=None):
+    """Preparar las claves primarias e índices a construir, primero las claves y de mayor a menor tabla"""
+    ordered = order_tables_by_size(tables, catalog_table_sizes(catalog))
+    schemes = schemes or {}
+    builds = []
+    
+    for table_name in ordered:
+        pk_columns = catalog['tables'][table_name]['primary_key']
+        if pk_columns and table_name in schemes:
+            builds.extend(attached_index_builds(
+                table_name, schemes[table_name], 'pk', f"pk_{table_name}",
+                primary_key_sql(table_name, pk_columns, only=True),
+                lambda child: (f"pk_{child}", primary_key_sql(child, pk_columns))
+            ))
+        elif pk_columns:
+            builds.append({
+                'table': table_name,
+                'name': f"pk_{table_name}",
+                'stage': 'pk',
+                'sql': primary_key_sql(table_name, pk_columns),
+            })
+    
+    for table_name in ordered:
+        for index_name, index_info in catalog['tables'][table_name]['indexes'].items():
+            if table_name in schemes:
+                pg_index_name, idx_sql = index_sql(table_name, index_name, index_info, only=True)
+                builds.extend(attached_index_builds(
+                    table_name, schemes[table_name], 'indexes', pg_index_name, idx_sql,
+                    lambda child: index_sql(child, index_name, index_info)
+                ))
+                continue
+            pg_index_name, idx_sql = index_sql(table_name, index_name, index_info)
+            builds.append({'table': table_name, 'name': pg_index_name, 'stage': 'indexes', 'sql': idx_sql})
+    
+    return builds
+
+INDEX_SESSION_MIN_MB = 64
+
+def index_session_jobs(args):
+    """Número de sesiones de índices, limitado para que cada una reciba al menos INDEX_SESSION_MIN_MB de --index-memory-mb"""
+    jobs = args.index_jobs or args.jobs
+    max_jobs = max(1, args.index_memory_mb // INDEX_SESSION_MIN_MB)
+    if jobs > max_jobs:
+        print(f"Aviso: {jobs} sesiones de índices no caben en --index-memory-mb {args.index_memory_mb} con al menos "
+              f"{INDEX_SESSION_MIN_MB} MB cada una, se usan {max_jobs}")
+        return max_jobs
+    return jobs
+
+def index_session_settings(args, jobs):
+    """Repartir el límite total de memoria entre las sesiones concurrentes de construcción de índices"""
+    per_session_mb = max(1, args.index_memory_mb // max(1, jobs))
+    return {
+        'maintenance_work_mem': f"{per_session_mb}MB",
+        'max_parallel_maintenance_workers': str(args.parallel_maintenance_workers),
+    }
+
+def build_index(pg_conn, build):
+    """Ejecutar la construcción de una clave primaria o índice y medir su duración"""
+    cursor = pg_conn.cursor()
+    started = time.monotonic()
+    
+    try:
+        cursor.execute(build['sql'])
+        pg_conn.commit()
+        elapsed = time.monotonic() - started
+        print(f"Índice {build['name']} de la tabla {build['table']} creado en {elapsed:.1f}s")
+        return elapsed, True
+    except Exception as e:
+        pg_conn.rollback()
+        elapsed = time.monotonic() - started
+        print(f"Error al crear índice {build['name']} de la tabla {build['table']}: {e}")
+        return elapsed, False
+    finally:
+        cursor.close()
+
+def run_index_phase(tables, catalog, args, manifest=None, progress=None, schemes=None):
+    """Construir claves primarias e índices de todas las tablas con varias sesiones concurrentes"""
+    if manifest is not None:
+        tables = [table for table in tables if not manifest.is_table_indexed(table)]
+    schemes = schemes or {}
+    
+    builds = plan_index_builds(tables, catalog, schemes)
+    jobs = index_session_jobs(args)
+    settings = index_session_settings(args, jobs)
+    print(f"\nConstruyendo {len(builds)} claves e índices con {jobs} sesiones "
+          f"(maintenance_work_mem={settings['maintenance_work_mem']} por sesión)")
+    
+    def connect():
+        pg_conn = connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+        if pg_conn:
+            apply_session_settings(pg_conn, dict(settings, **target_schema_settings(args)))
+        return pg_conn
+    
+    pool = ConnectionPool(connect, jobs)
+    
+    def run(build):
+        with pool.connection() as pg_conn:
+            return build_index(pg_conn, build)
+    
+    timings = []
+    failed = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="index") as executor:
+        
+        stages = ([build for build in builds if build.get('prepare')], [build for build in builds if not build.get('prepare')])
+        for stage_builds in stages:
+            futures = {executor.submit(run, build): build for build in stage_builds}
+            for future in concurrent.futures.as_completed(futures):
+                build = futures[future]
+                try:
+                    elapsed, success = future.result()
+                except Exception as e:
+                    print(f"Error al crear índice {build['name']} de la tabla {build['table']}: {e}")
+                    elapsed, success = 0.0, False
+                timings.append({'table': build['table'], 'name': build['name'], 'seconds': elapsed, 'success': success})
+                if progress is not None:
+                    progress.add_stage_time(build['table'], build['stage'], elapsed)
+                if not success:
+                    failed.add(build['table'])
+        
+        
+        if args.unlogged:
+            def set_logged(table_name):
+                with pool.connection() as pg_conn:
+                    return set_table_logged(pg_conn, table_name)
+            list(executor.map(set_logged, [table for table in tables if table not in schemes]))
+    
+    pool.close_all()
+    
+    if manifest is not None:
+        for table_name in tables:
+            if table_name not in failed:
+                manifest.record('table_indexed', table_name)
+    
+    return sorted(timings, key=lambda timing: timing['seconds'], reverse=True)
+
+def validate_foreign_key(pg_conn, table_name, pg_fk_name):
+    """Validar una clave foránea creada como NOT VALID y medir su duración"""
+    cursor = pg_conn.cursor()
+    started = time.monotonic()
+    
+    try:
+        cursor.execute(f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT {pg_fk_name}')
+        pg_conn.commit()
+        elapsed = time.monotonic() - started
+        print(f"Clave foránea {pg_fk_name} validada en {elapsed:.1f}s")
+        return elapsed, True
+    except Exception as e:
+        pg_conn.rollback()
+        elapsed = time.monotonic() - started
+        print(f"Error al validar clave foránea {pg_fk_name}: {e}")
+        return elapsed, False
+    finally:
+        cursor.close()
+
+def run_foreign_key_phase(pg_conn, catalog, args, tables=None, progress=None):
+    """Crear todas las claves foráneas como NOT VALID y validarlas después en paralelo"""
+    sizes = catalog_table_sizes(catalog)
+    cursor = pg_conn.cursor()
+    added = []
+    
+    for fk_name, fk_info in catalog['foreign_keys'].items():
+        if tables is not None and fk_info['table_name'] not in tables and fk_info['ref_table_name'] not in tables:
             continue
+        pg_fk_name, fk_sql = foreign_key_sql(fk_name, fk_info, not_valid=True)
+        try:
+            cursor.execute(fk_sql)
+            pg_conn.commit()
+            added.append((fk_info, pg_fk_name))
+        except Exception as e:
+            pg_conn.rollback()
+            print(f"Error al crear clave foránea {pg_fk_name}: {e}")
+    cursor.close()
+    
+    
+    added.sort(key=lambda item: (sizes.get(item[0]['ref_table_name'], (0, 0)),
+                                 sizes.get(item[0]['table_name'], (0, 0))), reverse=True)
+    jobs = args.fk_jobs or args.jobs
+    print(f"{len(added)} claves foráneas creadas como NOT VALID, validando con {jobs} sesiones")
+    
+    def connect():
+        worker_pg = connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+        if worker_pg and args.pg_schema:
+            apply_session_settings(worker_pg, target_schema_settings(args))
+        return worker_pg
+    
+    pool = ConnectionPool(connect, jobs)
+    
+    def run(item):
+        fk_info, pg_fk_name = item
+        with pool.connection() as worker_pg:
+            return validate_foreign_key(worker_pg, fk_info['table_name'], pg_fk_name)
+    
+    timings = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="fk") as executor:
+        futures = {executor.submit(run, item): item for item in added}
+        for future in concurrent.futures.as_completed(futures):
+            fk_info, pg_fk_name = futures[future]
+            try:
+                elapsed, success = future.result()
+            except Exception as e:
+                print(f"Error al validar clave foránea {pg_fk_name}: {e}")
+                elapsed, success = 0.0, False
+            timings.append({'table': fk_info['table_name'], 'name': pg_fk_name, 'seconds': elapsed, 'success': success})
+            if progress is not None:
+                progress.add_stage_time(fk_info['table_name'], 'foreign_keys', elapsed)
+    
+    pool.close_all()
+    return sorted(timings, key=lambda timing: timing['seconds'], reverse=True)
+
+VERIFY_EXPRESSIONS = {
+    'INTEGER': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+    'SMALLINT': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+    'BIGINT': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+    'BOOLEAN': ("CAST({mysql} AS CHAR)", "{pg}::int::text"),
+    'DECIMAL': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+    'NUMERIC': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+    'REAL': ("CAST(CAST({mysql} AS DECIMAL(65, 4)) AS CHAR)", "round({pg}::float8::numeric, 4)::text"),
+    'DOUBLE PRECISION': ("CAST(CAST({mysql} AS DECIMAL(65, 4)) AS CHAR)", "round({pg}::numeric, 4)::text"),
+    'DATE': ("DATE_FORMAT({mysql}, '%Y-%m-%d')", "to_char({pg}, 'YYYY-MM-DD')"),
+    'TIMESTAMP': ("DATE_FORMAT({mysql}, '%Y-%m-%d %H:%i:%S.%f')", "to_char({pg}, 'YYYY-MM-DD HH24:MI:SS.US')"),
+    'TIME': ("TIME_FORMAT({mysql}, '%H:%i:%S.%f')", "to_char({pg}, 'HH24:MI:SS.US')"),
+    'BYTEA': ("LOWER(HEX({mysql}))", "encode({pg}, 'hex')"),
+    'JSONB': ("CAST({mysql} AS CHAR)", "{pg}::text"),
+}
+
+def verify_expressions(column):
+    """Obtener las expresiones que normalizan una columna a texto idéntico en MySQL y en PostgreSQL"""
+    if column[1].lower() == 'set':
+        return None
+    pg_type = mysql_to_postgresql_type(column[1], column[2]).split('(')[0]
+    mysql_expr, pg_expr = VERIFY_EXPRESSIONS.get(pg_type, ("CONVERT({mysql} USING utf8mb4)", "{pg}::text"))
+    mysql_expr = mysql_expr.format(mysql=f"`{column[0]}`")
+    pg_expr = pg_expr.format(pg=f'"{column[0]}"')
+    return f"COALESCE({mysql_expr}, CHAR(30 USING utf8mb4))", f"COALESCE({pg_expr}, chr(30))"
+
+def range_checksum_sql(table_name, columns, chunk):
+    """Construir las consultas que calculan el número de filas y un hash independiente del orden de un rango"""
+    expressions = [expr for expr in (verify_expressions(col) for col in columns) if expr is not None]
+    mysql_row = ', '.join(expr[0] for expr in expressions)
+    pg_row = ', '.join(expr[1] for expr in expressions)
+    mysql_where, params = chunk_where(chunk)
+    pg_where, _ = chunk_where(chunk, quote='"')
+    
+    mysql_sql = (f"SELECT COUNT(*), COALESCE(SUM(CAST(CONV(SUBSTRING(MD5(CONCAT_WS(CHAR(31 USING utf8mb4), {mysql_row})), 1, 15), 16, 10) AS UNSIGNED)), 0) "
+                 f"FROM {table_name}{mysql_where}")
+    pg_sql = (f"SELECT COUNT(*), COALESCE(SUM(('x' || substr(md5(concat_ws(chr(31), {pg_row})), 1, 15))::bit(60)::bigint), 0) "
+              f'FROM "{table_name}"{pg_where}')
+    return mysql_sql, pg_sql, params
+
+def range_checksum(conn, sql, params):
+    """Ejecutar una consulta de verificación y devolver (filas, hash)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        row_count, checksum = cursor.fetchone()
+        cursor.fetchall()
+        return int(row_count), int(checksum)
+    finally:
+        cursor.close()
+        conn.rollback()
+
+def split_range(mysql_conn, table_name, columns, chunk, row_count, parts):
+    """Dividir un rango de clave primaria en subrangos de tamaño parecido para acotar una diferencia"""
+    pk_columns = chunk['pk_columns']
+    column_types = {col[0]: col[1].lower() for col in columns}
+    where_sql, params = chunk_where(chunk)
+    cursor = mysql_conn.cursor()
+    boundaries = []
+    
+    try:
+        if len(pk_columns) == 1 and column_types.get(pk_columns[0]) in INTEGER_TYPES:
+            pk = pk_columns[0]
+            cursor.execute(f"SELECT MIN(`{pk}`), MAX(`{pk}`) FROM {table_name}{where_sql}", params)
+            min_value, max_value = cursor.fetchone()
+            cursor.fetchall()
+            if min_value is not None:
+                step = max(1, -(-(int(max_value) - int(min_value) + 1) // parts))
+                boundaries = [[boundary] for boundary in range(int(min_value) + step, int(max_value) + 1, step)]
+        else:
+            order_by = ', '.join(f'`{col}`' for col in pk_columns)
+            step = max(1, row_count // parts)
+            for offset in range(step, row_count, step):
+                cursor.execute(f"SELECT {order_by} FROM {table_name}{where_sql} ORDER BY {order_by} LIMIT 1 OFFSET {offset}",
+                               params)
+                row = cursor.fetchone()
+                cursor.fetchall()
+                if row is None:
+                    break
+                if not boundaries or list(row) != boundaries[-1]:
+                    boundaries.append(list(row))
+    finally:
+        cursor.close()
+        mysql_conn.rollback()
+    
+    bounds = [chunk['lower']] + boundaries + [chunk['upper']]
+    return [
+        {
+            'index': i,
+            'count': len(bounds) - 1,
+            'pk_columns': pk_columns,
+            'lower': bounds[i],
+            'upper': bounds[i + 1],
+        }
+        for i in range(len(bounds) - 1)
+    ]
+
+def verify_range(mysql_conn, pg_conn, table_name, columns, chunk, args, executor):
+    """Comparar un rango en ambas bases de datos a la vez y dividirlo si sus hashes no coinciden"""
+    mysql_sql, pg_sql, params = range_checksum_sql(table_name, columns, chunk)
+    mysql_future = executor.submit(range_checksum, mysql_conn, mysql_sql, params)
+    pg_result = range_checksum(pg_conn, pg_sql, params)
+    mysql_result = mysql_future.result()
+    
+    result = {'table': table_name, 'chunk': chunk, 'mysql': mysql_result, 'pg': pg_result, 'children': []}
+    if mysql_result != pg_result and chunk['pk_columns'] and max(mysql_result[0], pg_result[0]) > args.verify_min_rows:
+        children = split_range(mysql_conn, table_name, columns, chunk, max(mysql_result[0], pg_result[0]), args.verify_split)
+        if len(children) > 1:
+            result['children'] = children
+    return result
+
+def run_verification(tables, catalog, args):
+    """Verificar el contenido de las tablas comparando hashes por rangos de clave primaria en paralelo"""
+    jobs = max(1, args.jobs)
+    workers = WorkerPools(args, jobs)
+    summary = {'tables': {}, 'mismatches': []}
+    print(f"\nVerificando {len(tables)} tablas con {jobs} sesiones")
+    
+    mysql_conn = workers.mysql_pool.acquire()
+    try:
+        ranges = []
+        for table_name in tables:
+            table = catalog_table(catalog, mysql_conn, table_name)
+            summary['tables'][table_name] = {'mysql_rows': 0, 'pg_rows': 0, 'ranges': 0, 'mismatched': 0}
+            for chunk in plan_table_chunks(mysql_conn, table_name, table['columns'], table['primary_key'],
+                                           table['table_rows'], args.chunk_rows):
+                ranges.append((table_name, table['columns'], chunk))
+    finally:
+        workers.mysql_pool.release(mysql_conn)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="verify") as executor:
+        def submit(table_name, columns, chunk):
+            return executor.submit(workers.run, verify_range, table_name, columns, chunk, args, workers.chunk_executor)
         
+        pending = {submit(*item): item for item in ranges}
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                table_name, columns, chunk = pending.pop(future)
+                stats = summary['tables'][table_name]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error al verificar la tabla {describe_chunk(table_name, chunk)}: {e}")
+                    stats['mismatched'] += 1
+                    summary['mismatches'].append({'table': table_name, 'lower': chunk['lower'], 'upper': chunk['upper'],
+                                                  'mysql_rows': None, 'pg_rows': None, 'error': str(e)})
+                    continue
+                
+                if result['children']:
+                    for child in result['children']:
+                        pending[submit(table_name, columns, child)] = (table_name, columns, child)
+                    continue
+                
+                stats['ranges'] += 1
+                stats['mysql_rows'] += result['mysql'][0]
+                stats['pg_rows'] += result['pg'][0]
+                if result['mysql'] != result['pg']:
+                    stats['mismatched'] += 1
+                    summary['mismatches'].append({'table': table_name, 'lower': chunk['lower'], 'upper': chunk['upper'],
+                                                  'mysql_rows': result['mysql'][0], 'pg_rows': result['pg'][0]})
+                    print(f"Diferencia en la tabla {table_name} entre {format_bound(chunk['lower'], 'inicio')} y "
+                          f"{format_bound(chunk['upper'], 'fin')}: "
+                          f"{result['mysql'][0]} filas en MySQL, {result['pg'][0]} en PostgreSQL")
+    
+    workers.close()
+    for table_name, stats in summary['tables'].items():
+        status = "OK" if not stats['mismatched'] else f"{stats['mismatched']} rangos con diferencias"
+        print(f"Tabla {table_name} verificada: {stats['mysql_rows']} filas en MySQL, {stats['pg_rows']} en PostgreSQL ({status})")
+    return summary
+
+def format_bound(bound, default):
+    """Mostrar un límite de rango de clave primaria en los mensajes y el informe"""
+    if bound is None:
+        return default
+    return ', '.join(str(value) for value in bound)
+
+def format_verification_report(summary):
+    """Dar formato a los resultados de la verificación para el informe"""
+    mismatched_tables = [name for name, stats in summary['tables'].items() if stats['mismatched']]
+    report = f"\n    Tablas verificadas: {len(summary['tables'])}\n"
+    report += f"    Tablas con diferencias: {len(mismatched_tables)}\n"
+    
+    if summary['mismatches']:
+        report += "\n    Rangos con diferencias:\n"
+        for mismatch in summary['mismatches']:
+            if mismatch.get('error'):
+                detail = f"error: {mismatch['error']}"
+            else:
+                detail = f"{mismatch['mysql_rows']} filas en MySQL, {mismatch['pg_rows']} en PostgreSQL"
+            report += (f"    - {mismatch['table']} [{format_bound(mismatch['lower'], 'inicio')} - "
+                       f"{format_bound(mismatch['upper'], 'fin')}): {detail}\n")
+    return report
+
+PASSWORD_ENVIRONMENT = {
+    'mysql_password': 'MYSQLTOPG_MYSQL_PASSWORD',
+    'pg_password': 'MYSQLTOPG_PG_PASSWORD',
+}
+
+def add_password_argument(parser, option, help_text):
+    """Añadir una contraseña que también se puede dar en su variable de entorno, fuera de la línea de comandos"""
+    variable = PASSWORD_ENVIRONMENT[option[2:].replace('-', '_')]
+    parser.add_argument(option, default=os.environ.get(variable), required=variable not in os.environ,
+                        help=f"{help_text} (o variable de entorno {variable})")
+
+def add_connection_arguments(parser):
+    """Añadir al parser los parámetros de conexión a MySQL y PostgreSQL"""
+    add_mysql_arguments(parser)
+    add_pg_arguments(parser)
+
+def add_mysql_arguments(parser):
+    """Añadir al parser los parámetros de conexión a MySQL"""
+    parser.add_argument("--mysql-host", required=True, help="Host MySQL")
+    parser.add_argument("--mysql-db", required=True, help="Nombre de la base de datos MySQL")
+    parser.add_argument("--mysql-user", required=True, help="Usuario MySQL")
+    add_password_argument(parser, "--mysql-password", "Contraseña MySQL")
+    parser.add_argument("--mysql-port", default=3306, type=int, help="Puerto MySQL (default: 3306)")
+
+def add_pg_arguments(parser):
+    """Añadir al parser los parámetros de conexión a PostgreSQL"""
+    parser.add_argument("--pg-host", required=True, help="Host PostgreSQL")
+    parser.add_argument("--pg-db", required=True, help="Nombre de la base de datos PostgreSQL")
+    parser.add_argument("--pg-user", required=True, help="Usuario PostgreSQL")
+    add_password_argument(parser, "--pg-password", "Contraseña PostgreSQL")
+    parser.add_argument("--pg-port", default=5432, type=int, help="Puerto PostgreSQL (default: 5432)")
+    parser.add_argument("--pg-schema", help="Esquema de PostgreSQL donde crear las tablas; se crea si no existe (default: search_path del usuario)")
+
+def add_index_arguments(parser):
+    """Añadir al parser los parámetros de las fases de índices y claves foráneas"""
+    parser.add_argument("--index-jobs", type=int, help="Número de claves e índices a construir en paralelo (default: valor de --jobs)")
+    parser.add_argument("--index-memory-mb", default=4096, type=int, help="Memoria total repartida como maintenance_work_mem entre las sesiones de índices (default: 4096)")
+    parser.add_argument("--parallel-maintenance-workers", default=2, type=int, help="max_parallel_maintenance_workers de cada sesión de índices (default: 2)")
+    parser.add_argument("--fk-jobs", type=int, help="Número de claves foráneas a validar en paralelo (default: valor de --jobs)")
+
+def add_verify_arguments(parser):
+    """Añadir al parser los parámetros de la verificación por rangos"""
+    parser.add_argument("--verify-min-rows", default=10000, type=int, help="Filas por debajo de las cuales un rango con diferencias ya no se subdivide (default: 10000)")
+    parser.add_argument("--verify-split", default=16, type=int, help="Número de subrangos en que se divide un rango con diferencias (default: 16)")
+
+def add_read_arguments(parser):
+    """Añadir al parser los parámetros de memoria de la lectura de MySQL"""
+    parser.add_argument("--batch-memory-mb", default=64, type=int, help="Memoria máxima aproximada de cada lote de filas leído de MySQL; el tamaño del lote se adapta al ancho de las filas (default: 64)")
+    parser.add_argument("--lob-chunk-mb", default=16, type=int, help="Los valores BLOB/TEXT mayores se leen aparte por fragmentos de este tamaño; 0 lo desactiva (default: 16)")
+
+def add_throttle_arguments(parser):
+    """Añadir al parser los parámetros del control de carga sobre el MySQL de origen"""
+    parser.add_argument("--throttle", action="store_true", help="Ajustar el ritmo de lectura y los lectores concurrentes según el estado del MySQL de origen")
+    parser.add_argument("--max-replica-lag", default=30, type=float, help="Retraso de réplica en segundos a partir del cual se reduce la lectura (default: 30)")
+    parser.add_argument("--max-threads-running", default=50, type=int, help="Threads_running a partir del cual se reduce la lectura (default: 50)")
+    parser.add_argument("--throttle-query", help="Consulta adicional cuyo primer valor indica la carga del origen (opcional)")
+    parser.add_argument("--throttle-query-max", type=float, help="Valor de --throttle-query a partir del cual se reduce la lectura")
+    parser.add_argument("--throttle-interval", default=5, type=float, help="Segundos entre muestras del estado del origen (default: 5)")
+    parser.add_argument("--throttle-min-readers", default=1, type=int, help="Mínimo de lecturas concurrentes; el máximo es --jobs (default: 1)")
+    parser.add_argument("--throttle-min-rate", default=1000, type=int, help="Mínimo de filas por segundo leídas entre todos los lectores (default: 1000)")
+    parser.add_argument("--throttle-max-rate", default=0, type=int, help="Máximo de filas por segundo leídas entre todos los lectores; 0 sin límite (default: 0)")
+
+def make_source_throttle(args):
+    """Crear e iniciar el control de carga del origen si se ha pedido con --throttle"""
+    if not args.throttle:
+        return None
+    throttle = SourceThrottle(
+        lambda: connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port),
+        args.jobs, args)
+    throttle.start()
+    return throttle
+
+def add_progress_arguments(parser):
+    """Añadir al parser los parámetros del seguimiento del progreso y las métricas"""
+    parser.add_argument("--progress-interval", default=30, type=int, help="Segundos entre muestras de progreso; 0 solo emite la muestra final (default: 30)")
+    parser.add_argument("--log-json", help="Archivo JSON-lines donde añadir las muestras de progreso y los eventos de cada etapa (opcional)")
+    parser.add_argument("--metrics-file", help="Archivo de métricas en formato de texto de Prometheus, p. ej. para el textfile collector de node_exporter (opcional)")
+
+def obtain_catalog(mysql_conn, args):
+    """Leer el catálogo de MySQL de --catalog-cache o cargarlo de INFORMATION_SCHEMA"""
+    catalog = None
+    if args.catalog_cache and os.path.exists(args.catalog_cache) and not args.refresh_catalog:
+        catalog = read_catalog(args.catalog_cache)
+        if catalog.get('database') != args.mysql_db:
+            print(f"El catálogo de {args.catalog_cache} pertenece a otra base de datos, se vuelve a cargar")
+            catalog = None
+    if catalog is None:
+        catalog = load_catalog(mysql_conn)
+        if args.catalog_cache:
+            save_catalog(catalog, args.catalog_cache)
+    return catalog
+
+def add_migrate_arguments(parser):
+    """Añadir al parser las opciones de la migración, compartidas por migrate y plan"""
+    parser.add_argument("--output-dir", default="./exported_data", help="Directorio para archivos CSV exportados")
+    parser.add_argument("--tables", nargs="+", help="Lista específica de tablas a migrar (opcional)")
+    parser.add_argument("--stream", action="store_true", help="Transferir los datos directamente con COPY sin archivos CSV intermedios")
+    parser.add_argument("--copy-format", choices=sorted(ROW_ENCODERS), default="csv", help="Formato usado para COPY: csv o binary (default: csv)")
+    parser.add_argument("--jobs", default=1, type=int, help="Número de tablas a migrar en paralelo (default: 1)")
+    parser.add_argument("--chunk-rows", default=1000000, type=int, help="Filas aproximadas por rango de clave primaria al dividir tablas grandes; 0 desactiva la división (default: 1000000)")
+    parser.add_argument("--manifest", default="migration_manifest.jsonl", help="Diario de progreso usado para reanudar la migración (default: migration_manifest.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Reanudar una migración interrumpida omitiendo las tablas y rangos ya completados")
+    parser.add_argument("--fast-load", action="store_true", help="Crear cada tabla y cargarla con COPY FREEZE en la misma transacción, con synchronous_commit=off; FREEZE solo se aplica a tablas de un único rango, no particionadas ni reanudadas (con --chunk-rows 0 no se dividen)")
+    parser.add_argument("--unlogged", action="store_true", help="Crear las tablas como UNLOGGED y pasarlas a LOGGED al terminar su migración")
+    parser.add_argument("--maintenance-work-mem", default="1GB", help="maintenance_work_mem de las sesiones de carga con --fast-load (default: 1GB)")
+    parser.add_argument("--flatten-partitions", action="store_true", help="Crear las tablas particionadas de MySQL como tablas normales en lugar de con particionado declarativo")
+    add_index_arguments(parser)
+    parser.add_argument("--catalog-cache", help="Archivo JSON donde guardar y reutilizar el catálogo de MySQL entre ejecuciones (opcional)")
+    parser.add_argument("--refresh-catalog", action="store_true", help="Volver a leer el catálogo de MySQL aunque exista --catalog-cache")
+    parser.add_argument("--stream-buffer-mb", default=64, type=int, help="Tamaño máximo del buffer en memoria del modo --stream en MB (default: 64)")
+    add_read_arguments(parser)
+    parser.add_argument("--incremental", action="store_true", help="Copiar solo las filas posteriores a la marca de agua de las tablas ya migradas y registrar la marca de las demás")
+    parser.add_argument("--watermark-column", default="updated_at", help="Columna usada como marca de agua; sin ella se usa la clave primaria auto-incremental (default: updated_at)")
+    parser.add_argument("--watermarks", default="migration_watermarks.json", help="Archivo JSON con la marca de agua de cada tabla (default: migration_watermarks.json)")
+    parser.add_argument("--verify", action="store_true", help="Verificar el contenido de las tablas migradas al terminar y añadir las diferencias al informe")
+    add_verify_arguments(parser)
+    add_progress_arguments(parser)
+    add_throttle_arguments(parser)
+
+def migrate_command(argv):
+    """Subcomando migrate: migrar estructura, datos, claves e índices de MySQL a PostgreSQL"""
+    parser = argparse.ArgumentParser(description="Migrar base de datos de MySQL a PostgreSQL")
+    
+    
+    add_connection_arguments(parser)
+    add_migrate_arguments(parser)
+    parser.add_argument("--plan", help="Plan JSON generado con el subcomando plan; sus opciones se usan como valores por defecto (opcional)")
+    parser.add_argument("--mysql-dbs", nargs="+", help="Bases de datos de origen con el mismo esquema (shards) a migrar en una sola ejecución (opcional)")
+    parser.add_argument("--mysql-db-pattern", help="Patrón LIKE de las bases de datos de origen (shards), p. ej. tenant_%% (opcional)")
+    parser.add_argument("--schema-template", default="{database}", help="Esquema de PostgreSQL de cada shard; {database} se sustituye por su base de datos de origen (default: {database})")
+    
+    args = parser.parse_args(argv)
+    if args.mysql_dbs or args.mysql_db_pattern:
+        migrate_shards(args)
+        return
+    plan = None
+    if args.plan:
+        plan = read_migration_plan(args.plan)
+        parser.set_defaults(**plan['options'])
+        args = parser.parse_args(argv)
+    
+    start_time = datetime.now()
+    print(f"Iniciando migración: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    pg_conn = connect_pg_for_load(args)
+    
+    if not mysql_conn or not pg_conn:
+        print("No se pudo establecer conexión con una o ambas bases de datos. Abortando.")
+        return
+    if args.pg_schema and not create_pg_schema(pg_conn, args.pg_schema):
+        return
+    
+    
+    catalog = obtain_catalog(mysql_conn, args)
+    catalog['pg_sequences'] = load_pg_sequences(pg_conn)
+    
+    
+    tables = args.tables if args.tables else list(catalog['tables'])
+    planned_chunks = {}
+    if plan is not None:
+        if plan['database'] != args.mysql_db:
+            print(f"El plan {args.plan} pertenece a la base de datos {plan['database']}, no a {args.mysql_db}. Abortando.")
+            return
+        tables = [table['name'] for table in plan['tables'] if table['name'] in tables]
+        planned_chunks = {table['name']: table['chunks'] for table in plan['tables']}
+        print(f"Ejecutando el plan {args.plan} (duración estimada {timedelta(seconds=round(plan['estimate']['total_seconds']))})")
+    print(f"Se encontraron {len(tables)} tablas para migrar")
+    
+    success_tables = []
+    failed_tables = []
+    
+    
+    manifest = MigrationManifest(args.manifest, resume=args.resume)
+    if args.resume:
+        print(f"Reanudando migración a partir del diario {args.manifest}")
+    
+    
+    watermarks = WatermarkStore(args.watermarks) if args.incremental else None
+    delta_tables = [table_name for table_name in tables if watermarks is not None and watermarks.get(table_name)]
+    full_tables = [table_name for table_name in tables if table_name not in delta_tables]
+    
+    
+    sizes = catalog_table_sizes(catalog)
+    progress = MigrationProgress({table_name: sizes.get(table_name, (0, 0)) for table_name in full_tables},
+                                 args.progress_interval, args.log_json, args.metrics_file)
+    progress.set_phase('load')
+    progress.start()
+    throttle = make_source_throttle(args)
+    
+    if args.jobs > 1:
+        full_tables = order_tables_by_size(full_tables, catalog_table_sizes(catalog))
+        workers = WorkerPools(args, args.jobs)
+        
+        def run_table(worker_mysql, worker_pg, table_name):
+            return migrate_table(worker_mysql, worker_pg, table_name, args, catalog, workers, manifest, watermarks, progress,
+                                 throttle, planned_chunks.get(table_name))
         
-        if not import_table_data(pg_conn, table_name, csv_file):
-            failed_tables.append(table_name)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(workers.run, run_table, table_name): table_name for table_name in full_tables}
+            for future in concurrent.futures.as_completed(futures):
+                table_name = futures[future]
+                try:
+                    migrated = future.result()
+                except Exception as e:
+                    print(f"Error al migrar la tabla {table_name}: {e}")
+                    migrated = False
+                (success_tables if migrated else failed_tables).append(table_name)
+                progress.table_finished(table_name, bool(migrated))
+        
+        workers.close()
+    else:
+        for table_name in full_tables:
+            migrated = migrate_table(mysql_conn, pg_conn, table_name, args, catalog, manifest=manifest, watermarks=watermarks,
+                                     progress=progress, throttle=throttle, planned_chunks=planned_chunks.get(table_name))
+            (success_tables if migrated else failed_tables).append(table_name)
+            progress.table_finished(table_name, migrated)
+    loaded_tables = list(success_tables)
+    
+    
+    if delta_tables:
+        progress.set_phase('delta')
+    for table_name in order_tables_by_dependencies(delta_tables, catalog['foreign_keys']):
+        synced = sync_table_delta(mysql_conn, pg_conn, table_name, args, catalog, watermarks, progress, throttle)
+        (success_tables if synced else failed_tables).append(table_name)
+        progress.table_finished(table_name, synced)
+    if throttle is not None:
+        throttle.close()
+    
+    
+    progress.set_phase('indexes')
+    index_timings = run_index_phase(loaded_tables, catalog, args, manifest, progress,
+                                    partition_schemes(loaded_tables, catalog, args))
+    
+    
+    print("\nMigrando claves foráneas...")
+    progress.set_phase('foreign_keys')
+    fk_timings = run_foreign_key_phase(pg_conn, catalog, args, loaded_tables if args.incremental else None, progress)
+    
+    
+    if args.verify:
+        progress.set_phase('verify')
+    verification = run_verification(success_tables, catalog, args) if args.verify else None
+    progress.close()
+    
+    
+    generate_migration_report(tables, success_tables, failed_tables, start_time, index_timings, fk_timings,
+                              manifest.rejected_rows(), verification, manifest.table_stats(),
+                              progress.stage_timings(), progress.phase_timings())
+    manifest.close()
+    
+    
+    mysql_conn.close()
+    pg_conn.close()
+    
+    print("\nMigración completada.")
+
+def list_source_databases(mysql_conn, args):
+    """Obtener las bases de datos de origen (shards) indicadas por lista o por patrón"""
+    databases = list(args.mysql_dbs or [])
+    if args.mysql_db_pattern:
+        cursor = mysql_conn.cursor()
+        try:
+            cursor.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME LIKE %s ORDER BY SCHEMA_NAME",
+                           (args.mysql_db_pattern,))
+            databases += [row[0] for row in cursor.fetchall() if row[0] not in databases]
+        finally:
+            cursor.close()
+    return databases
+
+def load_shard_sizes(mysql_conn, databases):
+    """Leer con una sola consulta el tamaño y las filas estimadas de las tablas de todos los shards"""
+    cursor = mysql_conn.cursor()
+    placeholders = ', '.join(['%s'] * len(databases))
+    sizes = {database: {} for database in databases}
+    
+    try:
+        cursor.execute(f"""
+        SELECT
+            TABLE_SCHEMA,
+            TABLE_NAME,
+            COALESCE(DATA_LENGTH, 0),
+            COALESCE(TABLE_ROWS, 0)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA IN ({placeholders})
+        """, tuple(databases))
+        for database, table_name, data_length, table_rows in cursor.fetchall():
+            sizes[database][table_name] = (int(data_length), int(table_rows))
+    finally:
+        cursor.close()
+    return sizes
+
+def shard_catalog(catalog, sizes):
+    """Copiar el catálogo compartido por los shards con el tamaño y las filas de las tablas de uno de ellos"""
+    tables = {}
+    for table_name, table in catalog['tables'].items():
+        data_length, table_rows = sizes.get(table_name, (0, 0))
+        tables[table_name] = dict(table, data_length=data_length, table_rows=table_rows)
+    return dict(catalog, tables=tables)
+
+def shard_path(path, database):
+    """Obtener la ruta del archivo propio de un shard a partir de la ruta común"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{database}{extension}"
+
+def shard_arguments(args, database, schema):
+    """Copiar los argumentos de la migración para un shard: base de datos de origen, esquema de destino y archivos propios"""
+    shard_args = argparse.Namespace(**vars(args))
+    shard_args.mysql_db = database
+    shard_args.pg_schema = schema
+    shard_args.output_dir = os.path.join(args.output_dir, database)
+    shard_args.manifest = shard_path(args.manifest, database)
+    return shard_args
+
+def migrate_shards(args):
+    """Migrar varias bases de datos de MySQL con el mismo esquema, cada una a su esquema de PostgreSQL, desde una única cola de trabajo"""
+    if args.incremental or args.plan:
+        print("--incremental y --plan no se pueden combinar con --mysql-dbs ni --mysql-db-pattern. Abortando.")
+        return
+    
+    start_time = datetime.now()
+    print(f"Iniciando migración: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    pg_conn = connect_pg_for_load(args)
+    if not mysql_conn or not pg_conn:
+        print("No se pudo establecer conexión con una o ambas bases de datos. Abortando.")
+        return
+    
+    databases = list_source_databases(mysql_conn, args)
+    if not databases:
+        print("No se encontró ninguna base de datos de origen. Abortando.")
+        return
+    
+    
+    use_shard(mysql_conn, None, databases[0], None)
+    catalog = obtain_catalog(mysql_conn, shard_arguments(args, databases[0], None))
+    sizes = load_shard_sizes(mysql_conn, databases)
+    tables = args.tables if args.tables else list(catalog['tables'])
+    print(f"Se encontraron {len(databases)} bases de datos de origen con {len(tables)} tablas cada una")
+    
+    success_tables = []
+    failed_tables = []
+    shards = []
+    workers = WorkerPools(args, args.jobs)
+    
+    
+    estimates = {}
+    for database in databases:
+        schema = args.schema_template.format(database=database)
+        shard_tables = [table_name for table_name in tables if table_name in sizes[database]]
+        missing = [table_name for table_name in tables if table_name not in sizes[database]]
+        if missing:
+            print(f"Advertencia: a la base de datos {database} le faltan las tablas {', '.join(missing)}")
+            failed_tables += [f"{database}.{table_name}" for table_name in missing]
+        if not create_pg_schema(pg_conn, schema):
+            failed_tables += [f"{database}.{table_name}" for table_name in shard_tables]
             continue
         
+        use_shard(None, pg_conn, database, schema)
+        shard = {
+            'database': database,
+            'schema': schema,
+            'args': shard_arguments(args, database, schema),
+            'catalog': shard_catalog(catalog, sizes[database]),
+            'tables': shard_tables,
+            'loaded': [],
+            'workers': workers.for_shard(database, schema),
+        }
+        shard['catalog']['pg_sequences'] = load_pg_sequences(pg_conn)
+        shard['manifest'] = MigrationManifest(shard['args'].manifest, resume=args.resume)
+        for table_name in shard_tables:
+            estimates[f"{database}.{table_name}"] = sizes[database][table_name]
+        shards.append(shard)
+    
+    progress = MigrationProgress(estimates, args.progress_interval, args.log_json, args.metrics_file)
+    for shard in shards:
+        shard['progress'] = ShardProgress(progress, shard['database'])
+    
+    
+    units = [(shard, table_name) for shard in shards for table_name in shard['tables']]
+    units.sort(key=lambda unit: sizes[unit[0]['database']][unit[1]], reverse=True)
+    print(f"Cola de trabajo: {len(units)} tablas de {len(shards)} shards con {args.jobs} workers")
+    progress.set_phase('load')
+    progress.start()
+    throttle = make_source_throttle(args)
+    
+    def run_table(worker_mysql, worker_pg, shard, table_name):
+        return migrate_table(worker_mysql, worker_pg, table_name, shard['args'], shard['catalog'], shard['workers'],
+                             shard['manifest'], None, shard['progress'], throttle)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(shard['workers'].run, run_table, shard, table_name): (shard, table_name)
+                   for shard, table_name in units}
+        for future in concurrent.futures.as_completed(futures):
+            shard, table_name = futures[future]
+            try:
+                migrated = future.result()
+            except Exception as e:
+                print(f"Error al migrar la tabla {shard['database']}.{table_name}: {e}")
+                migrated = False
+            if migrated:
+                shard['loaded'].append(table_name)
+            (success_tables if migrated else failed_tables).append(f"{shard['database']}.{table_name}")
+            progress.table_finished(f"{shard['database']}.{table_name}", bool(migrated))
+    
+    workers.close()
+    if throttle is not None:
+        throttle.close()
+    
+    
+    def prefixed(shard, timings):
+        return [dict(timing, table=f"{shard['database']}.{timing['table']}") for timing in timings]
+    
+    progress.set_phase('indexes')
+    index_timings = []
+    for shard in shards:
+        if shard['loaded']:
+            index_timings += prefixed(shard, run_index_phase(
+                shard['loaded'], shard['catalog'], shard['args'], shard['manifest'], shard['progress'],
+                partition_schemes(shard['loaded'], shard['catalog'], shard['args'])))
+    
+    print("\nMigrando claves foráneas...")
+    progress.set_phase('foreign_keys')
+    fk_timings = []
+    for shard in shards:
+        if shard['loaded']:
+            use_shard(None, pg_conn, shard['database'], shard['schema'])
+            fk_timings += prefixed(shard, run_foreign_key_phase(pg_conn, shard['catalog'], shard['args'],
+                                                                progress=shard['progress']))
+    
+    verification = None
+    if args.verify:
+        progress.set_phase('verify')
+        verification = {'tables': {}, 'mismatches': []}
+        for shard in shards:
+            if shard['loaded']:
+                summary = run_verification(shard['loaded'], shard['catalog'], shard['args'])
+                for table_name, stats in summary['tables'].items():
+                    verification['tables'][f"{shard['database']}.{table_name}"] = stats
+                verification['mismatches'] += prefixed(shard, summary['mismatches'])
+    progress.close()
+    
+    
+    rejected_rows = {}
+    table_stats = {}
+    for shard in shards:
+        for table_name, rejected in shard['manifest'].rejected_rows().items():
+            rejected_rows[f"{shard['database']}.{table_name}"] = rejected
+        for table_name, stats in shard['manifest'].table_stats().items():
+            table_stats[f"{shard['database']}.{table_name}"] = stats
+        shard['manifest'].close()
+    
+    generate_migration_report(success_tables + failed_tables, success_tables, failed_tables, start_time, index_timings,
+                              fk_timings, rejected_rows, verification, table_stats, progress.stage_timings(),
+                              progress.phase_timings())
+    
+    mysql_conn.close()
+    pg_conn.close()
+    
+    print("\nMigración completada.")
+
+PLAN_VERSION = 1
+
+PLAN_OPTIONS = (
+    'output_dir', 'stream', 'copy_format', 'jobs', 'chunk_rows', 'fast_load', 'unlogged', 'maintenance_work_mem',
+    'flatten_partitions', 'index_jobs', 'index_memory_mb', 'parallel_maintenance_workers', 'fk_jobs', 'stream_buffer_mb',
+    'batch_memory_mb', 'lob_chunk_mb', 'verify', 'verify_min_rows', 'verify_split', 'throttle',
+)
+
+DEFAULT_PLAN_RATES = {
+    'load_mb_per_second': 20.0,
+    'index_mb_per_second': 40.0,
+    'fk_mb_per_second': 80.0,
+    'verify_mb_per_second': 60.0,
+    'encoded_ratio': 1.0,
+}
+
+PLAN_BASE_RSS_MB = 64
+
+def calibrate_plan_rates(log_paths):
+    """Calcular la velocidad de cada fase a partir de los registros JSON (--log-json) de migraciones anteriores"""
+    rates = dict(DEFAULT_PLAN_RATES)
+    totals = collections.Counter()
+    
+    for path in log_paths or []:
+        table_bytes = {}
+        chunk_bytes = collections.Counter()
+        stages = collections.defaultdict(collections.Counter)
+        builds = collections.defaultdict(collections.Counter)
+        phases = []
+        last_progress = None
+        last_time = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                last_time = datetime.fromisoformat(entry['time'])
+                if entry['event'] == 'stage_done':
+                    stages[entry['table']][entry['stage']] += entry['seconds']
+                    builds[entry['table']][entry['stage']] += 1
+                elif entry['event'] == 'table_finished' and entry['success']:
+                    table_bytes[entry['table']] = entry['bytes']
+                elif entry['event'] == 'chunk_finished':
+                    chunk_bytes[entry['table']] += entry['bytes']
+                elif entry['event'] == 'phase_started':
+                    phases.append((entry['phase'], last_time))
+                elif entry['event'] == 'progress':
+                    last_progress = entry
+        for table_name, encoded_bytes in chunk_bytes.items():
+            table_bytes.setdefault(table_name, encoded_bytes)
         
-        if not migrate_constraints(mysql_conn, pg_conn, table_name):
-            print(f"Advertencia: No se pudieron migrar todas las restricciones para la tabla {table_name}")
+        for table_name, encoded_bytes in table_bytes.items():
+            table_stages = stages[table_name]
+            totals['load_seconds'] += table_stages['export'] + table_stages['copy']
+            totals['load_bytes'] += encoded_bytes
+            totals['index_seconds'] += table_stages['pk'] + table_stages['indexes']
+            totals['index_bytes'] += encoded_bytes * (builds[table_name]['pk'] + builds[table_name]['indexes'])
+            totals['fk_seconds'] += table_stages['foreign_keys']
+            totals['fk_bytes'] += encoded_bytes * builds[table_name]['foreign_keys']
         
+        for i, (phase, started) in enumerate(phases):
+            if phase == 'verify':
+                ended = phases[i + 1][1] if i + 1 < len(phases) else last_time
+                totals['verify_seconds'] += (ended - started).total_seconds()
+                totals['verify_bytes'] += sum(table_bytes.values())
         
-        if not migrate_indexes(mysql_conn, pg_conn, table_name):
-            print(f"Advertencia: No se pudieron migrar todos los índices para la tabla {table_name}")
+        if last_progress is not None and last_progress['bytes_estimated']:
+            totals['encoded_bytes'] += last_progress['bytes_done']
+            totals['estimated_bytes'] += last_progress['bytes_estimated']
+    
+    for name in ('load', 'index', 'fk', 'verify'):
+        if totals[f'{name}_seconds'] > 0 and totals[f'{name}_bytes'] > 0:
+            rates[f'{name}_mb_per_second'] = round(totals[f'{name}_bytes'] / totals[f'{name}_seconds'] / (1024 * 1024), 3)
+    if totals['estimated_bytes'] > 0 and totals['encoded_bytes'] > 0:
+        rates['encoded_ratio'] = round(totals['encoded_bytes'] / totals['estimated_bytes'], 3)
+    return rates
+
+def schedule_units(durations, slots):
+    """Repartir unidades de trabajo, en orden, entre slots workers que toman la siguiente al quedar libres"""
+    workers = [(0.0, worker) for worker in range(max(1, slots))]
+    assignments = []
+    for duration in durations:
+        free_at, worker = heapq.heappop(workers)
+        assignments.append((worker, free_at))
+        heapq.heappush(workers, (free_at + duration, worker))
+    return assignments, max(free_at for free_at, _ in workers)
+
+def build_migration_plan(mysql_conn, catalog, tables, args, rates):
+    """Preparar el plan de una migración: orden de fases, rangos, reparto entre workers, recursos y duración estimada"""
+    mb = 1024 * 1024
+    ordered = order_tables_by_size(tables, catalog_table_sizes(catalog))
+    schemes = partition_schemes(ordered, catalog, args)
+    
+    
+    plan_tables = []
+    units = []
+    for table_name in ordered:
+        table = catalog['tables'][table_name]
+        encoded_bytes = int(table['data_length'] * rates['encoded_ratio'])
+        if table_name in schemes:
+            chunks = partition_chunks(schemes[table_name], table['primary_key'])
+            partition_rows = [child['table_rows'] for child in schemes[table_name]['children']]
+            shares = [rows / sum(partition_rows) if sum(partition_rows) else 1 / len(chunks) for rows in partition_rows]
+        else:
+            chunks = plan_table_chunks(mysql_conn, table_name, table['columns'], table['primary_key'],
+                                       table['table_rows'], args.chunk_rows)
+            shares = [1 / len(chunks)] * len(chunks)
+        for chunk, share in zip(chunks, shares):
+            units.append((table_name, chunk['index'], encoded_bytes * share / mb / rates['load_mb_per_second']))
+        plan_tables.append({
+            'name': table_name,
+            'rows': table['table_rows'],
+            'bytes': table['data_length'],
+            'encoded_bytes': encoded_bytes,
+            'partitioned': table_name in schemes,
+            'lob_columns': has_lob_columns(table['columns']),
+            'chunks': chunks,
+        })
+    
+    
+    assignments, load_seconds = schedule_units([seconds for _, _, seconds in units], args.jobs)
+    workers = [{'worker': worker, 'busy_seconds': 0.0, 'units': []} for worker in range(max(1, args.jobs))]
+    for (table_name, chunk_index, seconds), (worker, started) in zip(units, assignments):
+        workers[worker]['units'].append({'table': table_name, 'chunk': chunk_index,
+                                         'start_seconds': round(started, 1), 'seconds': round(seconds, 1)})
+        workers[worker]['busy_seconds'] += seconds
+    for worker in workers:
+        worker['busy_seconds'] = round(worker['busy_seconds'], 1)
+    
+    
+    table_bytes = {table['name']: table['encoded_bytes'] for table in plan_tables}
+    builds = plan_index_builds(ordered, catalog, schemes)
+    
+    def build_seconds(build):
+        if build.get('prepare'):
+            return 0.0
+        share = len(schemes[build['table']]['children']) if build['table'] in schemes else 1
+        return table_bytes[build['table']] / share / mb / rates['index_mb_per_second']
+    
+    index_jobs = index_session_jobs(args)
+    _, index_seconds = schedule_units([build_seconds(build) for build in builds], index_jobs)
+    
+    foreign_keys = [fk_info for fk_info in catalog['foreign_keys'].values()
+                    if fk_info['table_name'] in table_bytes or fk_info['ref_table_name'] in table_bytes]
+    fk_jobs = args.fk_jobs or args.jobs
+    _, fk_seconds = schedule_units(
+        [table_bytes.get(fk_info['table_name'], 0) / mb / rates['fk_mb_per_second'] for fk_info in foreign_keys], fk_jobs)
+    verify_seconds = sum(table_bytes.values()) / mb / rates['verify_mb_per_second'] if args.verify else 0.0
+    
+    
+    phases = [
+        {'phase': 'load', 'seconds': round(load_seconds, 1), 'units': len(units), 'sessions': args.jobs},
+        {'phase': 'indexes', 'seconds': round(index_seconds, 1), 'units': len(builds), 'sessions': index_jobs},
+        {'phase': 'foreign_keys', 'seconds': round(fk_seconds, 1), 'units': len(foreign_keys), 'sessions': fk_jobs},
+    ]
+    if args.verify:
+        phases.append({'phase': 'verify', 'seconds': round(verify_seconds, 1), 'units': len(plan_tables), 'sessions': args.jobs})
+    
+    
+    pooled = 2 * args.jobs if args.jobs > 1 else 0
+    loaders = min(2 * args.jobs, len(units)) if args.jobs > 1 else 1
+    loader_mb = args.batch_memory_mb + (args.stream_buffer_mb if args.stream else 0)
+    if any(table['lob_columns'] for table in plan_tables):
+        loader_mb += args.lob_chunk_mb
+    connections = {
+        'load': {'mysql': 1 + pooled + (1 if args.throttle else 0), 'postgresql': 1 + pooled},
+        'indexes': {'mysql': 1, 'postgresql': 1 + index_jobs},
+        'foreign_keys': {'mysql': 1, 'postgresql': 1 + fk_jobs},
+    }
+    if args.verify:
+        connections['verify'] = {'mysql': 1 + 2 * args.jobs, 'postgresql': 1 + 2 * args.jobs}
+    
+    return {
+        'version': PLAN_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'database': args.mysql_db,
+        'options': {name: getattr(args, name) for name in PLAN_OPTIONS},
+        'phases': phases,
+        'tables': plan_tables,
+        'workers': workers,
+        'resources': {
+            'scratch_disk_bytes': 0 if args.stream else sum(table_bytes.values()),
+            'peak_rss_mb': PLAN_BASE_RSS_MB + loaders * loader_mb,
+            'pg_index_memory_mb': args.index_memory_mb,
+            'connections': connections,
+            'peak_connections': {
+                'mysql': max(phase['mysql'] for phase in connections.values()),
+                'postgresql': max(phase['postgresql'] for phase in connections.values()),
+            },
+        },
+        'estimate': {
+            'total_seconds': round(sum(phase['seconds'] for phase in phases), 1),
+            'rates': rates,
+            'calibrated_from': list(args.calibrate or []),
+        },
+    }
+
+def format_plan_summary(plan):
+    """Resumir un plan de migración para mostrarlo en la consola"""
+    resources = plan['resources']
+    lines = [
+        f"Plan de migración de la base de datos {plan['database']}: {len(plan['tables'])} tablas, "
+        f"{sum(len(table['chunks']) for table in plan['tables'])} rangos",
+    ]
+    for phase in plan['phases']:
+        lines.append(f"  Fase {phase['phase']}: {phase['units']} unidades con {phase['sessions']} sesiones, "
+                     f"{timedelta(seconds=round(phase['seconds']))}")
+    lines.append(f"  Duración estimada: {timedelta(seconds=round(plan['estimate']['total_seconds']))}")
+    lines.append(f"  Disco temporal: {resources['scratch_disk_bytes'] / (1024 ** 3):.2f} GB, "
+                 f"memoria máxima del proceso: {resources['peak_rss_mb']} MB, "
+                 f"maintenance_work_mem total en PostgreSQL: {resources['pg_index_memory_mb']} MB")
+    lines.append(f"  Conexiones máximas: {resources['peak_connections']['mysql']} a MySQL, "
+                 f"{resources['peak_connections']['postgresql']} a PostgreSQL")
+    calibration = ', '.join(plan['estimate']['calibrated_from']) or "valores por defecto"
+    lines.append(f"  Velocidades ({calibration}): " + ', '.join(f"{name}={value}" for name, value in plan['estimate']['rates'].items()))
+    return "\n".join(lines)
+
+def read_migration_plan(path):
+    """Leer un plan de migración generado con el subcomando plan"""
+    with open(path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"versión de plan no soportada en {path}: {plan.get('version')}")
+    return plan
+
+def plan_command(argv):
+    """Subcomando plan: estimar sin migrar la duración, los rangos y los recursos de una migración"""
+    parser = argparse.ArgumentParser(description="Preparar el plan de una migración de MySQL a PostgreSQL sin ejecutarla")
+    add_mysql_arguments(parser)
+    add_migrate_arguments(parser)
+    parser.add_argument("--calibrate", nargs="+", help="Registros JSON (--log-json) de migraciones anteriores usados para calibrar las velocidades (opcional)")
+    parser.add_argument("--output", default="migration_plan.json", help="Archivo JSON donde guardar el plan (default: migration_plan.json)")
+    args = parser.parse_args(argv)
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    if not mysql_conn:
+        print("No se pudo establecer conexión con MySQL. Abortando.")
+        return
+    
+    catalog = obtain_catalog(mysql_conn, args)
+    tables = args.tables if args.tables else list(catalog['tables'])
+    rates = calibrate_plan_rates(args.calibrate)
+    plan = build_migration_plan(mysql_conn, catalog, tables, args, rates)
+    mysql_conn.close()
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2, default=str)
+    print(format_plan_summary(plan))
+    print(f"\nPlan guardado en {args.output}; ejecútelo con: python main.py migrate --plan {args.output} ...")
+
+def verify_command(argv):
+    """Subcomando verify: comparar el contenido de MySQL y PostgreSQL por rangos de clave primaria"""
+    parser = argparse.ArgumentParser(prog="verify", description="Verificar los datos migrados de MySQL a PostgreSQL")
+    add_connection_arguments(parser)
+    parser.add_argument("--tables", nargs="+", help="Lista específica de tablas a verificar (opcional)")
+    parser.add_argument("--jobs", default=1, type=int, help="Número de rangos a verificar en paralelo (default: 1)")
+    parser.add_argument("--chunk-rows", default=1000000, type=int, help="Filas aproximadas de los rangos iniciales de cada tabla (default: 1000000)")
+    parser.add_argument("--catalog-cache", help="Archivo JSON con el catálogo de MySQL guardado por la migración (opcional)")
+    parser.add_argument("--refresh-catalog", action="store_true", help="Volver a leer el catálogo de MySQL aunque exista --catalog-cache")
+    parser.add_argument("--report", default="migration_report.txt", help="Informe al que se añaden los resultados (default: migration_report.txt)")
+    add_verify_arguments(parser)
+    parser.set_defaults(fast_load=False)
+    args = parser.parse_args(argv)
+    
+    start_time = datetime.now()
+    print(f"Iniciando verificación: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    if not mysql_conn:
+        print("No se pudo establecer conexión con MySQL. Abortando.")
+        return
+    
+    catalog = obtain_catalog(mysql_conn, args)
+    mysql_conn.close()
+    tables = args.tables if args.tables else list(catalog['tables'])
+    
+    summary = run_verification(tables, catalog, args)
+    
+    report = f"""
+    Verificación del {start_time.strftime('%Y-%m-%d %H:%M:%S')} (duración {datetime.now() - start_time})
+    """ + format_verification_report(summary)
+    print(report)
+    
+    with open(args.report, 'a') as f:
+        f.write(report)
+    
+    print(f"Resultados de la verificación añadidos a '{args.report}'")
+
+EXPORT_MANIFEST = "export_manifest.json"
+EXPORT_CATALOG = "catalog.json"
+
+def export_table_files(mysql_conn, table_name, columns, chunk, args, batch_size=1000, throttle=None):
+    """Exportar una tabla o rango de MySQL a archivos comprimidos de tamaño fijo, cada uno cargable por separado"""
+    encoder = make_row_encoder(args.copy_format, columns, include_header=True)
+    extension = f".{encoder.file_extension}{COMPRESSION_EXTENSIONS.get(args.compression, '')}"
+    chunk_size = args.chunk_size_mb * 1024 * 1024
+    lob_reader = make_lob_reader(mysql_conn, table_name, columns, chunk, args.lob_chunk_mb * 1024 * 1024)
+    sizer = FetchSizer(args.batch_memory_mb * 1024 * 1024, batch_size, 1 if has_lob_columns(columns) else None, throttle)
+    stats = ColumnStats(columns)
+    files = []
+    current = None
+    writer = None
+    deferred = []
+    cursor = mysql_conn.cursor()
+    
+    def open_part():
+        part = {'file': f"{table_name}.{chunk['index']:05d}.{len(files):05d}{extension}", 'rows': 0, 'bytes': 0}
+        part_writer = open_compressed(os.path.join(args.output_dir, part['file']), 'wb', args.compression)
+        part_writer.write(encoder.header())
+        return part, part_writer
+    
+    try:
+        select_sql, params = lob_reader.select_sql(chunk) if lob_reader else build_select_sql(table_name, chunk)
+        cursor.execute(select_sql, params)
+        
+        rows = cursor.fetchmany(sizer.size)
+        while rows:
+            fetched = len(rows)
+            if lob_reader is not None:
+                rows, large_rows = lob_reader.split(rows)
+                deferred.extend(large_rows)
+            if writer is None:
+                current, writer = open_part()
+            
+            data = encoder.encode(rows) if rows else b''
+            writer.write(data)
+            if rows:
+                stats.update(rows, len(data))
+            current['rows'] += len(rows)
+            current['bytes'] += len(data)
+            
+            if current['bytes'] >= chunk_size:
+                writer.write(encoder.trailer())
+                writer.close()
+                writer = None
+                files.append(current)
+            rows = cursor.fetchmany(sizer.update(fetched, len(data)))
         
         
-        reset_sequences(pg_conn, table_name)
+        for row in deferred:
+            if writer is None:
+                current, writer = open_part()
+            size = encoder.write_large_row(writer, row, lob_reader.read_pieces)
+            stats.update([row], size)
+            current['rows'] += 1
+            current['bytes'] += size
+            
+            if current['bytes'] >= chunk_size:
+                writer.write(encoder.trailer())
+                writer.close()
+                writer = None
+                files.append(current)
         
-        success_tables.append(table_name)
+        if writer is not None:
+            writer.write(encoder.trailer())
+            writer.close()
+            writer = None
+            files.append(current)
+    finally:
+        if writer is not None:
+            writer.close()
+        cursor.close()
+    
+    print(f"Datos de la tabla {describe_chunk(table_name, chunk)} exportados a {len(files)} archivos ({stats.rows} filas)")
+    return files, stats.as_dict()
+
+def arrow_type(column, numeric=None):
+    """Obtener el tipo de Arrow con el que se guarda una columna de MySQL en Parquet; numeric es su (precisión, escala) si es DECIMAL"""
+    if column[1].lower() == 'set':
+        return pyarrow.string()
+    pg_type = mysql_to_postgresql_type(column[1], column[2]).split('(')[0]
+    if pg_type in ('DECIMAL', 'NUMERIC') and numeric:
+        precision, scale = numeric
+        return pyarrow.decimal128(precision, scale) if precision <= 38 else pyarrow.decimal256(precision, scale)
+    return {
+        'SMALLINT': pyarrow.int64(),
+        'INTEGER': pyarrow.int64(),
+        'BIGINT': pyarrow.int64(),
+        'BOOLEAN': pyarrow.bool_(),
+        'REAL': pyarrow.float32(),
+        'DOUBLE PRECISION': pyarrow.float64(),
+        'DATE': pyarrow.date32(),
+        'TIMESTAMP': pyarrow.timestamp('us'),
+        'TIME': pyarrow.duration('us'),
+        'BYTEA': pyarrow.binary(),
+        'JSONB': pyarrow.string(),
+    }.get(pg_type, pyarrow.string())
+
+def _arrow_text(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    if isinstance(value, (set, frozenset)):
+        return ','.join(sorted(value))
+    return value if value is None or isinstance(value, str) else str(value)
+
+def build_arrow_batch(columns, schema, rows):
+    """Convertir un lote de filas de MySQL en un RecordBatch de Arrow, columna a columna"""
+    values = list(zip(*rows))
+    arrays = []
+    for index, field in enumerate(schema):
+        column_values = values[index]
+        if field.type == pyarrow.string():
+            column_values = [_arrow_text(value) for value in column_values]
+        elif field.type == pyarrow.bool_():
+            column_values = [None if value is None else bool(value) for value in column_values]
+        arrays.append(pyarrow.array(column_values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+def export_table_parquet(mysql_conn, table_name, columns, chunk, args, batch_size=10000, throttle=None, numeric=None):
+    """Exportar una tabla o rango de MySQL a archivos Parquet tipados, escritos por lotes de filas"""
+    numeric = numeric or {}
+    schema = pyarrow.schema([(col[0], arrow_type(col, numeric.get(col[0]))) for col in columns])
+    chunk_size = args.chunk_size_mb * 1024 * 1024
+    lob_reader = make_lob_reader(mysql_conn, table_name, columns, chunk, args.lob_chunk_mb * 1024 * 1024)
+    sizer = FetchSizer(args.batch_memory_mb * 1024 * 1024, batch_size, 1 if has_lob_columns(columns) else None, throttle)
+    stats = ColumnStats(columns)
+    files = []
+    current = None
+    writer = None
+    deferred = []
+    cursor = mysql_conn.cursor()
+    
+    def write_rows(rows):
+        nonlocal current, writer
+        if writer is None:
+            current = {'file': f"{table_name}.{chunk['index']:05d}.{len(files):05d}.parquet", 'rows': 0, 'bytes': 0}
+            writer = pyarrow.parquet.ParquetWriter(os.path.join(args.output_dir, current['file']), schema,
+                                                   compression=args.compression or 'none')
+        
+        batch = build_arrow_batch(columns, schema, rows)
+        writer.write_batch(batch)
+        stats.update(rows, batch.nbytes)
+        current['rows'] += len(rows)
+        current['bytes'] += batch.nbytes
+        
+        if current['bytes'] >= chunk_size:
+            writer.close()
+            writer = None
+            files.append(current)
+        return batch.nbytes
+    
+    try:
+        select_sql, params = lob_reader.select_sql(chunk) if lob_reader else build_select_sql(table_name, chunk)
+        cursor.execute(select_sql, params)
+        
+        rows = cursor.fetchmany(sizer.size)
+        while rows:
+            fetched = len(rows)
+            if lob_reader is not None:
+                rows, large_rows = lob_reader.split(rows)
+                deferred.extend(large_rows)
+            encoded_size = write_rows(rows) if rows else 0
+            rows = cursor.fetchmany(sizer.update(fetched, encoded_size))
+        
+        
+        if deferred:
+            print(f"Aviso: {len(deferred)} filas de la tabla {describe_chunk(table_name, chunk)} tienen valores BLOB/TEXT "
+                  f"mayores que --lob-chunk-mb; Parquet necesita cada valor entero, así que se leen por fragmentos y se "
+                  f"escriben de una en una")
+        for row in deferred:
+            row = list(row)
+            for value in [value for value in row if isinstance(value, LargeValue)]:
+                row[value.index] = b''.join(lob_reader.read_pieces(row, value))
+            write_rows([tuple(row)])
+        
+        if writer is not None:
+            writer.close()
+            writer = None
+            files.append(current)
+    finally:
+        if writer is not None:
+            writer.close()
+        cursor.close()
+    
+    print(f"Datos de la tabla {describe_chunk(table_name, chunk)} exportados a {len(files)} archivos Parquet ({stats.rows} filas)")
+    return files, stats.as_dict()
+
+def iter_parquet_rows(data_file, batch_size=10000):
+    """Leer un archivo Parquet por lotes y devolver cada lote como lista de filas"""
+    parquet_file = pyarrow.parquet.ParquetFile(data_file)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield list(zip(*(column.to_pylist() for column in batch.columns)))
+
+def import_parquet_file(pg_conn, table_name, data_file, columns, reject_path=None, buffer_size=64 * 1024 * 1024):
+    """Cargar un archivo Parquet en PostgreSQL codificando sus lotes en el formato binario de COPY"""
+    encoder = BinaryRowEncoder(columns)
+    stream = CopyStream(buffer_size)
+    result = {}
+    
+    def produce():
+        try:
+            stream.write(encoder.header())
+            row_count = 0
+            for rows in iter_parquet_rows(data_file):
+                stream.write(encoder.encode(rows))
+                row_count += len(rows)
+            stream.write(encoder.trailer())
+            result['rows'] = row_count
+            stream.close()
+        except CopyStreamAborted:
+            pass
+        except Exception as e:
+            result['error'] = e
+            stream.close(error=e)
+    
+    producer = threading.Thread(target=produce, name=f"parquet-{table_name}", daemon=True)
+    cursor = pg_conn.cursor()
+    
+    try:
+        producer.start()
+        cursor.copy_expert(build_copy_sql(table_name, encoder.column_names, encoder.copy_options()), stream)
+        pg_conn.commit()
+        producer.join()
+        
+        print(f"Importados {result['rows']} registros de {data_file} a la tabla {table_name} en PostgreSQL")
+        return {'rows': result['rows'], 'rejected': 0}
+    except Exception as e:
+        stream.abort()
+        pg_conn.rollback()
+        producer.join()
+        print(f"Error al importar datos a la tabla {table_name}: {result.get('error', e)}")
+        if 'error' in result:
+            return False
+    finally:
+        cursor.close()
+    
+    
+    print("Aislando las filas con errores mediante COPY por mitades...")
+    records = (encoder.encode([row]) for rows in iter_parquet_rows(data_file) for row in rows)
+    return copy_isolating_errors(pg_conn, table_name, encoder.column_names, encoder.copy_options(),
+                                 PGCOPY_HEADER, PGCOPY_TRAILER, records, reject_path, window_bytes=buffer_size)
+
+def export_command(argv):
+    """Subcomando export: exportar tablas de MySQL a un directorio de archivos comprimidos con su manifiesto"""
+    parser = argparse.ArgumentParser(prog="export", description="Exportar datos de MySQL a archivos comprimidos")
+    add_mysql_arguments(parser)
+    parser.add_argument("--output-dir", default="./exported_data", help="Directorio donde escribir los archivos y el manifiesto (default: ./exported_data)")
+    parser.add_argument("--tables", nargs="+", help="Lista específica de tablas a exportar (opcional)")
+    parser.add_argument("--jobs", default=1, type=int, help="Número de rangos a exportar en paralelo (default: 1)")
+    parser.add_argument("--chunk-rows", default=1000000, type=int, help="Filas aproximadas por rango de clave primaria al dividir tablas grandes (default: 1000000)")
+    parser.add_argument("--chunk-size-mb", default=256, type=int, help="Tamaño sin comprimir a partir del cual se empieza un nuevo archivo (default: 256)")
+    add_read_arguments(parser)
+    add_throttle_arguments(parser)
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default="gzip", help="Compresión de los archivos (default: gzip)")
+    parser.add_argument("--format", "--copy-format", dest="copy_format", choices=sorted(ROW_ENCODERS) + ["parquet"], default="csv", help="Formato de los archivos: csv, binary (PGCOPY) o parquet (default: csv)")
+    parser.add_argument("--catalog-cache", help="Archivo JSON donde guardar y reutilizar el catálogo de MySQL entre ejecuciones (opcional)")
+    parser.add_argument("--refresh-catalog", action="store_true", help="Volver a leer el catálogo de MySQL aunque exista --catalog-cache")
+    args = parser.parse_args(argv)
+    if args.compression == 'none':
+        args.compression = None
+    if args.copy_format == 'parquet' and pyarrow is None:
+        print("El formato parquet requiere el paquete pyarrow (pip install pyarrow). Abortando.")
+        return
+    if args.compression == 'zstd' and zstandard is None and args.copy_format != 'parquet':
+        print("La compresión zstd requiere el paquete zstandard (pip install zstandard). Abortando.")
+        return
+    
+    start_time = datetime.now()
+    print(f"Iniciando exportación: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    if not mysql_conn:
+        print("No se pudo establecer conexión con MySQL. Abortando.")
+        return
+    
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    catalog = obtain_catalog(mysql_conn, args)
+    save_catalog(catalog, os.path.join(args.output_dir, EXPORT_CATALOG))
+    tables = order_tables_by_size(args.tables if args.tables else list(catalog['tables']), catalog_table_sizes(catalog))
+    
+    
+    tasks = []
+    for table_name in tables:
+        table = catalog_table(catalog, mysql_conn, table_name)
+        for chunk in plan_table_chunks(mysql_conn, table_name, table['columns'], table['primary_key'],
+                                       table['table_rows'], args.chunk_rows):
+            tasks.append((table_name, table['columns'], chunk))
+    mysql_conn.close()
+    
+    pool = ConnectionPool(
+        lambda: connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port),
+        args.jobs)
+    
+    throttle = make_source_throttle(args)
     
+    def run(task):
+        with pool.connection() as worker_mysql, throttle_reader(throttle):
+            if args.copy_format == 'parquet':
+                return export_table_parquet(worker_mysql, *task, args, throttle=throttle,
+                                            numeric=catalog['tables'][task[0]].get('numeric'))
+            return export_table_files(worker_mysql, *task, args, throttle=throttle)
     
+    exported = {table_name: {'files': [], 'stats': None} for table_name in tables}
+    failed_tables = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix="export") as executor:
+        futures = {executor.submit(run, task): task for task in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            table_name, columns, chunk = futures[future]
+            try:
+                files, stats = future.result()
+            except Exception as e:
+                print(f"Error al exportar datos de la tabla {describe_chunk(table_name, chunk)}: {e}")
+                failed_tables.add(table_name)
+                continue
+            exported[table_name]['files'].extend(files)
+            exported[table_name]['stats'] = merge_column_stats(exported[table_name]['stats'], stats)
+    pool.close_all()
+    if throttle is not None:
+        throttle.close()
+    
+    
+    for table_name in failed_tables:
+        exported.pop(table_name)
+    for entry in exported.values():
+        entry['files'].sort(key=lambda item: item['file'])
+    manifest = {
+        'database': catalog['database'],
+        'created_at': datetime.now().isoformat(),
+        'copy_format': args.copy_format,
+        'compression': args.compression,
+        'tables': exported,
+    }
+    manifest_path = os.path.join(args.output_dir, EXPORT_MANIFEST)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    
+    file_count = sum(len(entry['files']) for entry in exported.values())
+    print(f"\nExportadas {len(exported)} tablas en {file_count} archivos, manifiesto en {manifest_path} "
+          f"(duración {datetime.now() - start_time})")
+    if failed_tables:
+        print(f"Tablas con errores: {', '.join(sorted(failed_tables))}")
+
+def import_command(argv):
+    """Subcomando import: cargar en PostgreSQL en paralelo los archivos generados por export"""
+    parser = argparse.ArgumentParser(prog="import", description="Importar a PostgreSQL los archivos generados por export")
+    add_pg_arguments(parser)
+    parser.add_argument("--input-dir", default="./exported_data", help="Directorio con los archivos y el manifiesto de export (default: ./exported_data)")
+    parser.add_argument("--tables", nargs="+", help="Lista específica de tablas a importar (opcional)")
+    parser.add_argument("--jobs", default=1, type=int, help="Número de archivos a cargar en paralelo (default: 1)")
+    parser.add_argument("--unlogged", action="store_true", help="Crear las tablas como UNLOGGED y pasarlas a LOGGED al terminar la fase de índices")
+    add_index_arguments(parser)
+    parser.set_defaults(fast_load=False)
+    args = parser.parse_args(argv)
+    
+    start_time = datetime.now()
+    print(f"Iniciando importación: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    with open(os.path.join(args.input_dir, EXPORT_MANIFEST), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    catalog = read_catalog(os.path.join(args.input_dir, EXPORT_CATALOG))
+    parquet = manifest['copy_format'] == 'parquet'
+    compression = None if parquet else manifest['compression']
+    if parquet and pyarrow is None:
+        print("Los archivos están en formato parquet y el paquete pyarrow no está instalado. Abortando.")
+        return
+    if compression == 'zstd' and zstandard is None:
+        print("Los archivos están comprimidos con zstd y el paquete zstandard no está instalado. Abortando.")
+        return
+    
+    pg_conn = connect_pg_for_load(args)
+    if not pg_conn:
+        print("No se pudo establecer conexión con PostgreSQL. Abortando.")
+        return
+    if args.pg_schema and not create_pg_schema(pg_conn, args.pg_schema):
+        return
+    catalog['pg_sequences'] = load_pg_sequences(pg_conn)
+    
+    
+    tables = [table_name for table_name in (args.tables or list(manifest['tables'])) if table_name in manifest['tables']]
+    tables = order_tables_by_size(tables, catalog_table_sizes(catalog))
+    failed_tables = set()
+    for table_name in tables:
+        if not create_postgresql_table(pg_conn, table_name, catalog['tables'][table_name]['columns'], unlogged=args.unlogged):
+            failed_tables.add(table_name)
+    
+    
+    pool = ConnectionPool(lambda: connect_pg_for_load(args), args.jobs)
+    
+    def run(table_name, file_info):
+        data_file = os.path.join(args.input_dir, file_info['file'])
+        columns = catalog['tables'][table_name]['columns']
+        reject_path = os.path.join(args.input_dir, f"{table_name}.rejects.jsonl")
+        with pool.connection() as worker_pg:
+            if parquet:
+                return import_parquet_file(worker_pg, table_name, data_file, columns, reject_path)
+            return import_table_data(worker_pg, table_name, data_file, columns, False, reject_path, compression)
+    
+    rejected_rows = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix="import") as executor:
+        futures = {
+            executor.submit(run, table_name, file_info): table_name
+            for table_name in tables if table_name not in failed_tables
+            for file_info in manifest['tables'][table_name]['files']
+        }
+        for future in concurrent.futures.as_completed(futures):
+            table_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error al importar un archivo de la tabla {table_name}: {e}")
+                result = False
+            if not result:
+                failed_tables.add(table_name)
+            elif result['rejected']:
+                rejected_rows[table_name] = rejected_rows.get(table_name, 0) + result['rejected']
+    pool.close_all()
+    
+    
+    success_tables = [table_name for table_name in tables if table_name not in failed_tables]
+    table_stats = {table_name: manifest['tables'][table_name]['stats'] for table_name in success_tables
+                   if manifest['tables'][table_name]['stats']}
+    for table_name in success_tables:
+        stats = table_stats.get(table_name)
+        reset_sequences(pg_conn, table_name, catalog['pg_sequences'].get(table_name, []), stats['max'] if stats else None)
+    
+    index_timings = run_index_phase(success_tables, catalog, args)
     print("\nMigrando claves foráneas...")
-    migrate_foreign_keys(mysql_conn, pg_conn, args.mysql_db)
+    fk_timings = run_foreign_key_phase(pg_conn, catalog, args, success_tables)
+    
+    generate_migration_report(tables, success_tables, sorted(failed_tables), start_time, index_timings, fk_timings,
+                              rejected_rows, table_stats=table_stats)
+    pg_conn.close()
+    
+    print("\nImportación completada.")
+
+class WorkQueue:
+    """Cola de trabajo compartida por el coordinador y los workers: rangos de tablas arrendados con caducidad"""
+
+    placeholder = '%s'
+    now_sql = "EXTRACT(EPOCH FROM clock_timestamp())"
+    lock_clause = " FOR UPDATE SKIP LOCKED"
+    schema = None
+
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self._lock = threading.Lock()
+
+    def _execute(self, sql, params=(), fetch=False):
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(sql.replace('%s', self.placeholder), params)
+                result = cursor.fetchall() if fetch else cursor.rowcount
+                self.conn.commit()
+                return result
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def setup(self, reset=False):
+        """Crear las tablas de la cola, vaciándolas antes si se pide"""
+        if reset:
+            self._execute(f"DROP TABLE IF EXISTS {self.name}")
+            self._execute(f"DROP TABLE IF EXISTS {self.name}_meta")
+        self._execute(f"""
+        CREATE TABLE IF NOT EXISTS {self.name} (
+            id BIGINT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            chunk TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_until DOUBLE PRECISION,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            leases INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT
+        )
+        """)
+        self._execute(f"CREATE TABLE IF NOT EXISTS {self.name}_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def set_meta(self, key, value):
+        self._execute(f"DELETE FROM {self.name}_meta WHERE key = %s", (key,))
+        self._execute(f"INSERT INTO {self.name}_meta (key, value) VALUES (%s, %s)", (key, json.dumps(value, default=str)))
+
+    def get_meta(self, key):
+        rows = self._execute(f"SELECT value FROM {self.name}_meta WHERE key = %s", (key,), fetch=True)
+        return json.loads(rows[0][0]) if rows else None
+
+    def put(self, items):
+        """Encolar los rangos (tabla, rango) a cargar"""
+        for item_id, (table_name, chunk) in enumerate(items):
+            self._execute(f"INSERT INTO {self.name} (id, table_name, chunk) VALUES (%s, %s, %s)",
+                          (item_id, table_name, json.dumps(chunk, default=str)))
+
+    def lease(self, worker, lease_seconds, max_attempts):
+        """Arrendar el siguiente rango pendiente o cuyo arrendamiento ha caducado"""
+        rows = self._execute(f"""
+        UPDATE {self.name}
+        SET status = 'leased', worker = %s, lease_until = {self.now_sql} + %s, attempts = attempts + 1, leases = leases + 1
+        WHERE id = (
+            SELECT id FROM {self.name}
+            WHERE (status = 'pending' OR (status = 'leased' AND lease_until < {self.now_sql})) AND attempts < %s
+            ORDER BY id
+            LIMIT 1{self.lock_clause}
+        )
+        RETURNING id, table_name, chunk, attempts, leases
+        """, (worker, lease_seconds, max_attempts), fetch=True)
+        if not rows:
+            return None
+        item_id, table_name, chunk, attempts, leases = rows[0]
+        return {'id': item_id, 'table': table_name, 'chunk': json.loads(chunk), 'attempts': attempts, 'leases': leases}
+
+    def heartbeat(self, item_id, worker, lease_seconds):
+        """Renovar el arrendamiento de un rango; devuelve False si el worker ya no lo tiene"""
+        return self._execute(f"""
+        UPDATE {self.name} SET lease_until = {self.now_sql} + %s
+        WHERE id = %s AND worker = %s AND status = 'leased'
+        """, (lease_seconds, item_id, worker)) > 0
+
+    def fence(self, conn, item_id, worker, lease_seconds):
+        """Bloquear el rango en la transacción de carga de conn, lanzando LeaseLost si el worker ya no lo tiene arrendado"""
+        if self.schema is None:
+            self.schema = self._execute("SELECT current_schema()", fetch=True)[0][0]
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+            SELECT id FROM "{self.schema}".{self.name}
+            WHERE id = %s AND worker = %s AND status = 'leased'
+            FOR UPDATE
+            """, (item_id, worker))
+            owned = cursor.fetchone() is not None
+        finally:
+            cursor.close()
+        if not owned:
+            raise LeaseLost(f"el worker {worker} ya no tiene arrendado el rango {item_id}")
+
+    def complete(self, item_id, worker, result):
+        """Marcar un rango como cargado con su resultado; devuelve False si el worker ya no lo tenía arrendado"""
+        return self._execute(f"""
+        UPDATE {self.name} SET status = 'done', result = %s, lease_until = NULL
+        WHERE id = %s AND worker = %s AND status = 'leased'
+        """, (json.dumps(result, default=str), item_id, worker)) > 0
+
+    def fail(self, item_id, worker, error, max_attempts):
+        """Devolver a la cola un rango que ha fallado, o marcarlo como fallido si ha agotado sus intentos"""
+        self._execute(f"""
+        UPDATE {self.name}
+        SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END, error = %s, lease_until = NULL
+        WHERE id = %s AND worker = %s AND status = 'leased'
+        """, (max_attempts, error, item_id, worker))
+
+    def expire(self, max_attempts):
+        """Marcar como fallidos los rangos cuyo arrendamiento ha caducado tras agotar sus intentos"""
+        return self._execute(f"""
+        UPDATE {self.name} SET status = 'failed', error = 'arrendamiento caducado'
+        WHERE status = 'leased' AND lease_until < {self.now_sql} AND attempts >= %s
+        """, (max_attempts,))
+
+    def requeue_failed(self):
+        """Devolver a la cola los rangos fallidos, con sus intentos a cero pero conservando cuántas veces se arrendaron"""
+        return self._execute(f"UPDATE {self.name} SET status = 'pending', attempts = 0, worker = NULL WHERE status = 'failed'")
+
+    def counts(self):
+        """Contar los rangos de la cola por estado"""
+        counts = collections.Counter({'pending': 0, 'leased': 0, 'done': 0, 'failed': 0})
+        for status, count in self._execute(f"SELECT status, COUNT(*) FROM {self.name} GROUP BY status", fetch=True):
+            counts[status] = count
+        return counts
+
+    def items(self):
+        """Obtener la tabla, el estado, el resultado y el error de cada rango"""
+        return self._execute(f"SELECT table_name, status, result, error FROM {self.name} ORDER BY id", fetch=True)
+
+    def close(self):
+        self.conn.close()
+
+class SqliteWorkQueue(WorkQueue):
+    """Cola de trabajo en un archivo SQLite local, para varios procesos worker en el mismo equipo"""
+
+    placeholder = '?'
+    now_sql = "((julianday('now') - 2440587.5) * 86400.0)"
+    lock_clause = ""
+
+    def setup(self, reset=False):
+        self._execute("PRAGMA journal_mode=WAL", fetch=True)
+        super().setup(reset)
+
+    def fence(self, conn, item_id, worker, lease_seconds):
+        """Renovar el arrendamiento justo antes de confirmar la carga, lanzando LeaseLost si el worker ya no lo tiene"""
+        if not self.heartbeat(item_id, worker, lease_seconds):
+            raise LeaseLost(f"el worker {worker} ya no tiene arrendado el rango {item_id}")
+
+class LeaseFencedConnection:
+    """Conexión de carga que comprueba el arrendamiento del rango antes de confirmar cada transacción"""
+
+    def __init__(self, conn, queue, item_id, worker, lease_seconds):
+        self.conn = conn
+        self.queue = queue
+        self.item_id = item_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def commit(self):
+        self.queue.fence(self.conn, self.item_id, self.worker, self.lease_seconds)
+        self.conn.commit()
+
+def add_queue_arguments(parser):
+    """Añadir al parser los parámetros de la cola de trabajo compartida por el coordinador y los workers"""
+    parser.add_argument("--queue-file", help="Archivo SQLite de la cola para workers en el mismo equipo (default: tabla en el PostgreSQL de destino)")
+    parser.add_argument("--queue-name", default="mysqltopg_queue", help="Nombre de la tabla de la cola (default: mysqltopg_queue)")
+    parser.add_argument("--lease-seconds", default=300, type=int, help="Duración del arrendamiento de un rango; el worker lo renueva mientras lo carga (default: 300)")
+    parser.add_argument("--max-attempts", default=3, type=int, help="Intentos de carga de un rango antes de darlo por fallido (default: 3)")
+    parser.add_argument("--poll-interval", default=10, type=float, help="Segundos entre consultas del estado de la cola (default: 10)")
+
+def open_work_queue(args):
+    """Abrir la cola de trabajo: un archivo SQLite con --queue-file o una tabla en el PostgreSQL de destino"""
+    if args.queue_file:
+        return SqliteWorkQueue(sqlite3.connect(args.queue_file, timeout=60, check_same_thread=False), args.queue_name)
+    pg_conn = connect_to_postgresql(args.pg_host, args.pg_db, args.pg_user, args.pg_password, args.pg_port)
+    return WorkQueue(pg_conn, args.queue_name) if pg_conn else None
+
+QUEUE_OPTIONS = ('output_dir', 'stream', 'copy_format', 'stream_buffer_mb', 'batch_memory_mb', 'lob_chunk_mb', 'fast_load',
+                 'maintenance_work_mem', 'pg_schema')
+
+@contextlib.contextmanager
+def keep_lease(queue, item_id, worker, lease_seconds):
+    """Renovar el arrendamiento de un rango en un hilo propio mientras el worker lo carga"""
+    stop = threading.Event()
     
+    def renew():
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(item_id, worker, lease_seconds):
+                print(f"Advertencia: el worker {worker} ha perdido el arrendamiento del rango {item_id}")
+                return
     
-    generate_migration_report(tables, success_tables, failed_tables, start_time)
+    thread = threading.Thread(target=renew, name=f"lease-{item_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_queue_worker(queue, catalog, args, worker, progress=None, throttle=None):
+    """Arrendar y cargar rangos de la cola hasta que no quede ninguno pendiente ni en curso"""
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    pg_conn = connect_pg_for_load(args)
+    if not mysql_conn or not pg_conn:
+        print(f"El worker {worker} no pudo conectarse a una o ambas bases de datos")
+        return 0
     
+    loaded = 0
+    while True:
+        item = queue.lease(worker, args.lease_seconds, args.max_attempts)
+        if item is None:
+            counts = queue.counts()
+            if not counts['pending'] and not counts['leased']:
+                break
+            time.sleep(args.poll_interval)
+            continue
+        
+        table_name, chunk = item['table'], item['chunk']
+        columns = catalog['tables'][table_name]['columns']
+        load_conn = LeaseFencedConnection(pg_conn, queue, item['id'], worker, args.lease_seconds)
+        error = "la carga del rango falló"
+        with keep_lease(queue, item['id'], worker, args.lease_seconds):
+            try:
+                if item['leases'] > 1 and not clear_chunk_data(load_conn, table_name, chunk):
+                    result = False
+                else:
+                    result = load_table_data(mysql_conn, load_conn, table_name, columns, args, chunk, progress=progress,
+                                             throttle=throttle)
+            except Exception as e:
+                pg_conn.rollback()
+                error = str(e)
+                result = False
+        
+        if result:
+            if not queue.complete(item['id'], worker, result):
+                print(f"El rango de la tabla {describe_chunk(table_name, chunk)} perdió su arrendamiento tras cargarse; "
+                      f"el worker que lo arriende lo limpiará y lo volverá a cargar")
+                continue
+            loaded += 1
+            if progress is not None:
+                progress.chunk_finished(table_name, chunk, result['rows'], result['stats']['bytes'])
+        else:
+            queue.fail(item['id'], worker, error, args.max_attempts)
+            print(f"Error al cargar la tabla {describe_chunk(table_name, chunk)} (intento {item['attempts']}): {error}")
+    
+    mysql_conn.close()
+    pg_conn.close()
+    return loaded
+
+def worker_command(argv):
+    """Subcomando worker: cargar los rangos de la cola de trabajo preparada por el coordinador"""
+    parser = argparse.ArgumentParser(description="Cargar en PostgreSQL los rangos de la cola de trabajo de una migración coordinada")
+    add_connection_arguments(parser)
+    add_queue_arguments(parser)
+    parser.add_argument("--threads", default=1, type=int, help="Rangos que este proceso carga en paralelo (default: 1)")
+    add_progress_arguments(parser)
+    add_throttle_arguments(parser)
+    args = parser.parse_args(argv)
+    args.jobs = args.threads
+    
+    queue = open_work_queue(args)
+    if queue is None:
+        print("No se pudo abrir la cola de trabajo. Abortando.")
+        return
+    
+    
+    queue.setup()
+    catalog = queue.get_meta('catalog')
+    while catalog is None:
+        print(f"Esperando a que el coordinador prepare la cola {args.queue_name}...")
+        time.sleep(args.poll_interval)
+        catalog = queue.get_meta('catalog')
+    args = argparse.Namespace(**dict(vars(args), **queue.get_meta('options')))
+    
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {worker} cargando rangos de la cola {args.queue_name} con {args.threads} hilos")
+    progress = MigrationProgress({}, args.progress_interval, args.log_json, args.metrics_file)
+    progress.set_phase('load')
+    progress.start()
+    throttle = make_source_throttle(args)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="worker") as executor:
+        futures = [executor.submit(run_queue_worker, queue, catalog, args, f"{worker}:{i}", progress, throttle)
+                   for i in range(args.threads)]
+        loaded = sum(future.result() for future in futures)
+    
+    if throttle is not None:
+        throttle.close()
+    progress.close()
+    queue.close()
+    print(f"Worker {worker} terminado: {loaded} rangos cargados")
+
+def enqueue_migration(mysql_conn, pg_conn, queue, catalog, tables, args):
+    """Crear las tablas en PostgreSQL y encolar sus rangos, de la tabla más grande a la más pequeña"""
+    schemes = partition_schemes(tables, catalog, args)
+    items = []
+    created = []
+    
+    for table_name in order_tables_by_size(tables, catalog_table_sizes(catalog)):
+        table = catalog['tables'][table_name]
+        scheme = schemes.get(table_name)
+        if not create_postgresql_table(pg_conn, table_name, table['columns'], unlogged=args.unlogged and scheme is None,
+                                       partitioning=scheme):
+            continue
+        if scheme is not None:
+            chunks = partition_chunks(scheme, table['primary_key'])
+        else:
+            chunks = plan_table_chunks(mysql_conn, table_name, table['columns'], table['primary_key'], table['table_rows'],
+                                       args.chunk_rows)
+        items += [(table_name, chunk) for chunk in chunks]
+        created.append(table_name)
+    
+    queue.put(items)
+    queue.set_meta('options', {name: getattr(args, name) for name in QUEUE_OPTIONS})
+    queue.set_meta('catalog', {key: value for key, value in catalog.items() if key != 'pg_sequences'})
+    print(f"{len(items)} rangos de {len(created)} tablas encolados en {args.queue_file or args.queue_name}")
+    return created
+
+def local_worker_argv(args):
+    """Construir los argumentos de un proceso worker local a partir de los del coordinador, sin las contraseñas"""
+    argv = [
+        '--mysql-host', args.mysql_host, '--mysql-db', args.mysql_db, '--mysql-user', args.mysql_user,
+        '--mysql-port', str(args.mysql_port),
+        '--pg-host', args.pg_host, '--pg-db', args.pg_db, '--pg-user', args.pg_user, '--pg-port', str(args.pg_port),
+        '--queue-name', args.queue_name, '--lease-seconds', str(args.lease_seconds),
+        '--max-attempts', str(args.max_attempts), '--poll-interval', str(args.poll_interval),
+    ]
+    if args.queue_file:
+        argv += ['--queue-file', args.queue_file]
+    return argv
+
+def local_worker_environment(args):
+    """Entorno de un proceso worker local, con las contraseñas que no van en su línea de comandos (visible con ps)"""
+    environment = dict(os.environ)
+    for option, variable in PASSWORD_ENVIRONMENT.items():
+        environment[variable] = getattr(args, option)
+    return environment
+
+def coordinate_command(argv):
+    """Subcomando coordinate: repartir la carga entre procesos worker a través de una cola compartida y completar la migración"""
+    parser = argparse.ArgumentParser(description="Coordinar una migración de MySQL a PostgreSQL cargada por procesos worker")
+    add_connection_arguments(parser)
+    add_migrate_arguments(parser)
+    add_queue_arguments(parser)
+    parser.add_argument("--local-workers", default=0, type=int, help="Procesos worker a iniciar en este equipo (default: 0)")
+    args = parser.parse_args(argv)
+    if args.incremental:
+        print("--incremental no se puede combinar con el subcomando coordinate. Abortando.")
+        return
+    if args.fast_load:
+        print("Aviso: los workers de la cola cargan los rangos sin COPY FREEZE; --fast-load solo aplica "
+              "synchronous_commit=off y --maintenance-work-mem a sus sesiones")
+    
+    start_time = datetime.now()
+    print(f"Iniciando migración coordinada: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    mysql_conn = connect_to_mysql(args.mysql_host, args.mysql_db, args.mysql_user, args.mysql_password, args.mysql_port)
+    pg_conn = connect_pg_for_load(args)
+    queue = open_work_queue(args)
+    if not mysql_conn or not pg_conn or queue is None:
+        print("No se pudo establecer conexión con una o ambas bases de datos. Abortando.")
+        return
+    if args.pg_schema and not create_pg_schema(pg_conn, args.pg_schema):
+        return
+    
+    catalog = obtain_catalog(mysql_conn, args)
+    catalog['pg_sequences'] = load_pg_sequences(pg_conn)
+    tables = args.tables if args.tables else list(catalog['tables'])
+    
+    
+    queue.setup()
+    if args.resume and queue.get_meta('catalog') is not None:
+        print(f"Reanudando la cola {args.queue_file or args.queue_name}: {queue.requeue_failed()} rangos fallidos vuelven a la cola")
+    else:
+        queue.setup(reset=True)
+        enqueue_migration(mysql_conn, pg_conn, queue, catalog, tables, args)
+    
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker'] + local_worker_argv(args),
+                                  env=local_worker_environment(args))
+                 for _ in range(args.local_workers)]
+    
+    
+    while True:
+        expired = queue.expire(args.max_attempts)
+        if expired:
+            print(f"{expired} rangos han agotado sus intentos con el arrendamiento caducado")
+        counts = queue.counts()
+        print(f"[cola] {counts['pending']} pendientes, {counts['leased']} en curso, {counts['done']} cargados, "
+              f"{counts['failed']} fallidos")
+        if not counts['pending'] and not counts['leased']:
+            break
+        time.sleep(args.poll_interval)
+    for process in processes:
+        process.wait()
+    
+    
+    results = {}
+    for table_name, status, result, error in queue.items():
+        totals = results.setdefault(table_name, {'rows': 0, 'rejected': 0, 'stats': None, 'failed': 0})
+        if status != 'done':
+            totals['failed'] += 1
+            print(f"Rango de la tabla {table_name} fallido: {error}")
+            continue
+        result = json.loads(result)
+        totals['rows'] += result['rows']
+        totals['rejected'] += result['rejected']
+        totals['stats'] = merge_column_stats(totals['stats'], result['stats'])
+    queue.close()
+    
+    success_tables = [table_name for table_name in tables if table_name in results and not results[table_name]['failed']]
+    failed_tables = [table_name for table_name in tables if table_name not in success_tables]
+    for table_name in success_tables:
+        stats = results[table_name]['stats']
+        reset_sequences(pg_conn, table_name, catalog['pg_sequences'].get(table_name, []), stats['max'] if stats else None)
+    
+    
+    index_timings = run_index_phase(success_tables, catalog, args, schemes=partition_schemes(success_tables, catalog, args))
+    print("\nMigrando claves foráneas...")
+    fk_timings = run_foreign_key_phase(pg_conn, catalog, args, success_tables)
+    verification = run_verification(success_tables, catalog, args) if args.verify else None
+    
+    generate_migration_report(tables, success_tables, failed_tables, start_time, index_timings, fk_timings,
+                              {name: totals['rejected'] for name, totals in results.items() if totals['rejected']},
+                              verification, {name: totals['stats'] for name, totals in results.items() if totals['stats']})
     
     mysql_conn.close()
     pg_conn.close()
     
     print("\nMigración completada.")
 
+COMMANDS = {
+    'migrate': migrate_command,
+    'plan': plan_command,
+    'verify': verify_command,
+    'export': export_command,
+    'import': import_command,
+    'coordinate': coordinate_command,
+    'worker': worker_command,
+}
+
+def main():
+    """Ejecutar el subcomando indicado; sin subcomando se ejecuta migrate"""
+    argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+    else:
+        migrate_command(argv)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeMySQLCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+        self.description = None
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+        self.rows = list(self.conn.respond(sql, tuple(params or ())))
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeMySQL:
+    """Conexión de MySQL en memoria: respond(sql, params) devuelve las filas de cada consulta"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.executed = []
+
+    def cursor(self, *args, **kwargs):
+        return FakeMySQLCursor(self)
+
+    def reconnect(self):
+        self.executed.append(('RECONNECT', None))
+
+    def rollback(self):
+        self.executed.append(('ROLLBACK', None))
+
+    def close(self):
+        pass
+
+
+class FakePostgreSQLCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+
+    def copy_expert(self, sql, stream, size=8192):
+        self.conn.copy(sql, stream)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def read_stream(stream, size=8192):
+    data = b''
+    while True:
+        piece = stream.read(size)
+        if not piece:
+            return data
+        data += piece
+
+
+class FakePostgreSQL:
+    """Conexión de PostgreSQL en memoria: copy(sql, stream) recibe cada COPY y puede lanzar una excepción para rechazarlo"""
+
+    def __init__(self, copy=None):
+        self.copied = []
+        self.executed = []
+        self.copy = copy or (lambda sql, stream: self.copied.append(read_stream(stream)))
+
+    def cursor(self):
+        return FakePostgreSQLCursor(self)
+
+    def commit(self):
+        self.executed.append(('COMMIT', None))
+
+    def rollback(self):
+        self.executed.append(('ROLLBACK', None))
+
+    def close(self):
+        pass
@@ -0,0 +1,142 @@
+import random
+import struct
+from datetime import date, datetime
+from decimal import Decimal, localcontext
+
+import pytest
+
+import main
+
+NUMERIC_VALUES = [
+    Decimal('0'), Decimal('0.0000'), Decimal('-0.00'), Decimal('1'), Decimal('-1'), Decimal('9999'), Decimal('10000'),
+    Decimal('12345678.9'), Decimal('0.0001'), Decimal('0.00012'), Decimal('-12.5'), Decimal('1E+5'), Decimal('1.5E-7'),
+    Decimal('123456789012345678901234567890123456789.123456789'), 7, '3.25',
+]
+
+
+def decode_numeric(field):
+    ndigits, weight, sign, dscale = struct.unpack('!hhHH', field[:8])
+    if sign == 0xC000:
+        return Decimal('NaN')
+    groups = struct.unpack(f'!{ndigits}H', field[8:])
+    with localcontext() as context:
+        context.prec = 1000
+        value = sum(Decimal(group) * Decimal(10000) ** (weight - index) for index, group in enumerate(groups))
+        value = value.quantize(Decimal(1).scaleb(-dscale)) if groups else Decimal(0).scaleb(-dscale)
+        return -value if sign == 0x4000 else value
+
+
+def decode_rows(data, column_count):
+    assert data.startswith(main.PGCOPY_HEADER) and data.endswith(main.PGCOPY_TRAILER)
+    data = data[len(main.PGCOPY_HEADER):-len(main.PGCOPY_TRAILER)]
+    rows = []
+    position = 0
+    while position < len(data):
+        assert struct.unpack_from('!h', data, position)[0] == column_count
+        position += 2
+        row = []
+        for _ in range(column_count):
+            length = struct.unpack_from('!i', data, position)[0]
+            position += 4
+            row.append(None if length == -1 else data[position:position + length])
+            position += max(length, 0)
+        rows.append(row)
+    return rows
+
+
+def encode(columns, rows):
+    encoder = main.BinaryRowEncoder(columns)
+    return decode_rows(encoder.header() + encoder.encode(rows) + encoder.trailer(), len(columns))
+
+
+@pytest.mark.parametrize('value', NUMERIC_VALUES)
+def test_numeric_value_round_trip(value):
+    field = main.encode_numeric_value(value)
+    assert struct.unpack('!i', field[:4])[0] == len(field) - 4
+    decoded = decode_numeric(field[4:])
+    assert decoded == Decimal(value) and decoded.as_tuple().exponent == min(Decimal(value).as_tuple().exponent, 0)
+
+
+def test_numeric_value_strips_zero_groups():
+    assert main.encode_numeric_value(Decimal('10000.0000'))[4:12] == struct.pack('!hhHH', 1, 1, 0, 4)
+    assert main.encode_numeric_value(Decimal('0.00'))[4:] == struct.pack('!hhHH', 0, 0, 0, 2)
+
+
+def test_numeric_nan():
+    assert decode_numeric(main.encode_numeric_value(Decimal('NaN'))[4:]).is_nan()
+
+
+def test_numeric_trailing_zero_groups_are_stripped():
+    assert main.encode_numeric_value(Decimal('1.00')) == struct.pack('!ihhHHH', 10, 1, 0, 0, 2, 1)
+    assert main.encode_numeric_value(Decimal('-20.50000')) == struct.pack('!ihhHHHH', 12, 2, 0, 0x4000, 5, 20, 5000)
+
+
+@pytest.mark.parametrize('values', [
+    [Decimal(random.Random(seed).randint(-10 ** 17, 10 ** 17)).scaleb(-4) for seed in range(200)],
+    [Decimal('1.50'), Decimal('-0.05'), Decimal('123456789.00'), Decimal('-0.00'), Decimal('1.00')],
+    NUMERIC_VALUES,
+])
+def test_numeric_column_matches_values(values):
+    rows = [(value,) for value in values]
+    encoder = main.BinaryRowEncoder([('price', 'decimal', None, 'YES', None)])
+    assert encoder.encode(rows) == b''.join(encoder.row_header + main.encode_numeric_value(value) for value in values)
+
+
+def test_rows_with_nulls_round_trip():
+    columns = [('id', 'bigint', None, 'NO', None), ('flag', 'tinyint', 1, 'YES', None), ('price', 'decimal', None, 'YES', None),
+               ('name', 'varchar', 20, 'YES', None), ('data', 'blob', None, 'YES', None), ('day', 'date', None, 'YES', None),
+               ('at', 'datetime', None, 'YES', None), ('ratio', 'double', None, 'YES', None)]
+    rows = [
+        (1, 1, Decimal('10.25'), 'año', b'\x00\x01', date(2000, 1, 2), datetime(2000, 1, 1, 0, 0, 1), 0.5),
+        (2, None, None, None, None, None, None, None),
+        (3, 0, Decimal('-3.10'), '', b'', date(1999, 12, 31), datetime(1999, 12, 31, 23, 59, 59), -1.0),
+    ]
+    decoded = encode(columns, rows)
+
+    assert [struct.unpack('!q', row[0])[0] for row in decoded] == [1, 2, 3]
+    assert [row[1] for row in decoded] == [b'\x01', None, b'\x00']
+    assert [row[2] and decode_numeric(row[2]) for row in decoded] == [Decimal('10.25'), None, Decimal('-3.10')]
+    assert [row[3] for row in decoded] == ['año'.encode('utf-8'), None, b'']
+    assert [row[4] for row in decoded] == [b'\x00\x01', None, b'']
+    assert [row[5] and struct.unpack('!i', row[5])[0] for row in decoded] == [1, None, -1]
+    assert [row[6] and struct.unpack('!q', row[6])[0] for row in decoded] == [1000000, None, -1000000]
+    assert [row[7] and struct.unpack('!d', row[7])[0] for row in decoded] == [0.5, None, -1.0]
+
+
+def test_fixed_width_column_matches_values():
+    for column_type, fmt, values in [('smallint', 'h', [0, -5, 32767]), ('bigint', 'q', [2 ** 40, -1]),
+                                     ('float', 'f', [0.5, -2.0]), ('double', 'd', [1e300]), ('boolean', '?', [1, 0, 2])]:
+        encoder = main.BinaryRowEncoder([('value', column_type, None, 'NO', None)])
+        assert encoder.encode([(value,) for value in values]) == b''.join(
+            encoder.row_header + struct.pack('!i' + fmt, struct.calcsize('!' + fmt), value) for value in values)
+
+
+def test_fixed_width_rows_with_nulls_round_trip():
+    columns = [('id', 'int', None, 'NO', None), ('price', 'decimal', None, 'YES', None),
+               ('empty', 'bigint', None, 'YES', None), ('ratio', 'double', None, 'YES', None)]
+    rows = [(index, None if index % 3 == 0 else Decimal(index).scaleb(-2), None, None if index % 4 == 1 else index / 2)
+            for index in range(40)]
+    decoded = encode(columns, rows)
+    assert [struct.unpack('!i', row[0])[0] for row in decoded] == list(range(40))
+    assert [row[1] and decode_numeric(row[1]) for row in decoded] == [row[1] for row in rows]
+    assert [row[2] for row in decoded] == [None] * 40
+    assert [row[3] and struct.unpack('!d', row[3])[0] for row in decoded] == [row[3] for row in rows]
+
+
+def test_all_null_column_and_mixed_text_values():
+    columns = [('a', 'int', None, 'YES', None), ('tags', 'set', None, 'YES', None)]
+    decoded = encode(columns, [(None, {'b', 'a'}), (None, 'c')])
+    assert decoded == [[None, b'a,b'], [None, b'c']]
+
+
+def test_columnar_matches_per_value_encoding():
+    columns = [('id', 'int', None, 'NO', None), ('name', 'varchar', 20, 'YES', None), ('data', 'blob', None, 'YES', None)]
+    rows = [(index, f'fila {index}', bytes([index])) for index in range(50)]
+    encoder = main.BinaryRowEncoder(columns)
+    expected = b''.join(encoder.row_header + b''.join(encode_value(value) for encode_value, value in zip(encoder.field_encoders, row))
+                        for row in rows)
+    assert encoder.encode(rows) == expected
+
+
+def test_empty_batch():
+    assert main.BinaryRowEncoder([('a', 'int', None, 'YES', None)]).encode([]) == b''
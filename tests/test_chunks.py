@@ -0,0 +1,66 @@
+import bisect
+
+import main
+from conftest import FakeMySQL
+
+INT_COLUMNS = [('id', 'bigint', None, 'NO', None), ('name', 'varchar', 100, 'YES', None)]
+KEY_COLUMNS = [('tenant', 'varchar', 20, 'NO', None), ('seq', 'int', None, 'NO', None)]
+
+
+def min_max(min_value, max_value):
+    return FakeMySQL(lambda sql, params: [(min_value, max_value)])
+
+
+def keyset_table(keys):
+    """Tabla con clave compuesta: responde a SELECT ... WHERE (a, b) >= (%s, %s) ... OFFSET n sobre las claves ordenadas"""
+    keys = sorted(keys)
+
+    def respond(sql, params):
+        start = bisect.bisect_left(keys, params) if params else 0
+        offset = int(sql.rsplit('OFFSET', 1)[1])
+        return [keys[start + offset]] if start + offset < len(keys) else []
+    return respond
+
+
+def test_chunk_where_bounds():
+    chunk = {'pk_columns': ['id'], 'lower': [10], 'upper': [20]}
+    assert main.chunk_where(chunk) == (" WHERE `id` >= %s AND `id` < %s", (10, 20))
+    assert main.chunk_where({'pk_columns': ['id'], 'lower': None, 'upper': [20]}, quote='"') == (' WHERE "id" < %s', (20,))
+    assert main.chunk_where(None) == ("", ())
+
+
+def test_small_table_is_a_single_chunk():
+    chunks = main.plan_table_chunks(None, 'users', INT_COLUMNS, ['id'], 50, 100)
+    assert [(chunk['lower'], chunk['upper']) for chunk in chunks] == [(None, None)]
+
+
+def test_integer_key_split_by_value_range():
+    chunks = main.plan_table_chunks(min_max(1, 300), 'users', INT_COLUMNS, ['id'], 250, 100)
+    assert [(chunk['lower'], chunk['upper']) for chunk in chunks] == [(None, [101]), ([101], [201]), ([201], None)]
+    assert all(chunk['count'] == 3 for chunk in chunks)
+
+
+def test_composite_key_split_by_offset():
+    keys = [(tenant, seq) for tenant in ('a', 'b', 'c') for seq in range(4)]
+    chunks = main.plan_table_chunks(FakeMySQL(keyset_table(keys)), 'events', KEY_COLUMNS, ['tenant', 'seq'], 12, 5)
+    assert [chunk['upper'] for chunk in chunks] == [['b', 1], ['c', 2], None]
+
+
+def test_split_range_covers_the_chunk():
+    chunk = {'index': 1, 'count': 3, 'pk_columns': ['id'], 'lower': [101], 'upper': [201]}
+    parts = main.split_range(min_max(101, 200), 'users', INT_COLUMNS, chunk, 100, 4)
+    assert [(part['lower'], part['upper']) for part in parts] == [([101], [126]), ([126], [151]), ([151], [176]),
+                                                                  ([176], [201])]
+
+
+def test_split_range_of_empty_chunk():
+    chunk = {'index': 0, 'count': 1, 'pk_columns': ['id'], 'lower': None, 'upper': None}
+    parts = main.split_range(min_max(None, None), 'users', INT_COLUMNS, chunk, 0, 4)
+    assert [(part['lower'], part['upper']) for part in parts] == [(None, None)]
+
+
+def test_split_range_composite_key():
+    keys = [(tenant, seq) for tenant in ('a', 'b') for seq in range(5)]
+    chunk = {'index': 0, 'count': 1, 'pk_columns': ['tenant', 'seq'], 'lower': None, 'upper': None}
+    parts = main.split_range(FakeMySQL(keyset_table(keys)), 'events', KEY_COLUMNS, chunk, 10, 2)
+    assert [(part['lower'], part['upper']) for part in parts] == [(None, ['b', 0]), (['b', 0], None)]
@@ -0,0 +1,76 @@
+import json
+
+import main
+from conftest import FakePostgreSQL, read_stream
+
+
+class RejectingCopy:
+    """COPY falso que rechaza cualquier lote con un registro marcado como erróneo"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.loaded = []
+
+    def __call__(self, sql, stream):
+        self.attempts += 1
+        data = read_stream(stream)
+        if b'bad' in data:
+            raise ValueError('invalid input syntax')
+        self.loaded.append(data)
+
+
+def test_bisect_isolates_rejected_records(tmp_path):
+    copy = RejectingCopy()
+    pg_conn = FakePostgreSQL(copy)
+    records = [b'%d,ok\n' % i for i in range(16)]
+    records[5] = b'5,bad\n'
+    records[12] = b'12,bad\n'
+    reject_path = str(tmp_path / 'docs.rejects.jsonl')
+
+    loaded, rejected = main._copy_bisect(pg_conn.cursor(), 'COPY docs FROM STDIN', b'', b'', records, 'docs', reject_path)
+
+    assert (loaded, rejected) == (14, 2)
+    assert b''.join(copy.loaded) == b''.join(record for record in records if b'bad' not in record)
+    assert copy.attempts < len(records)
+    with open(reject_path) as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['record'] for entry in entries] == ['5,bad\n', '12,bad\n']
+    assert entries[0]['error'] == 'invalid input syntax'
+
+
+def test_bisect_wraps_each_attempt_in_a_savepoint(tmp_path):
+    pg_conn = FakePostgreSQL(RejectingCopy())
+    main._copy_bisect(pg_conn.cursor(), 'COPY docs FROM STDIN', b'', b'', [b'1,bad\n'], 'docs',
+                      str(tmp_path / 'docs.rejects.jsonl'))
+    assert [sql for sql, params in pg_conn.executed] == ["SAVEPOINT copy_bisect", "ROLLBACK TO SAVEPOINT copy_bisect",
+                                                         "RELEASE SAVEPOINT copy_bisect"]
+
+
+def test_binary_rejects_are_base64(tmp_path):
+    reject_path = str(tmp_path / 'docs.rejects.jsonl')
+    record = b'\x00\x01\x00\x00\x00\x03bad'
+    loaded, rejected = main._copy_bisect(FakePostgreSQL(RejectingCopy()).cursor(), 'COPY docs FROM STDIN',
+                                         main.PGCOPY_HEADER, main.PGCOPY_TRAILER, [record], 'docs', reject_path)
+    assert (loaded, rejected) == (0, 1)
+    with open(reject_path) as f:
+        assert json.loads(f.readline())['record_base64'] == 'AAEAAAADYmFk'
+
+
+def test_window_ends_at_byte_budget():
+    records = iter([b'a' * 40] * 10)
+    assert len(main.next_copy_window(records, 100, 100)) == 3
+    assert len(main.next_copy_window(records, 2, 1000)) == 2
+    assert main.next_copy_window(iter([b'x' * 500]), 100, 100) == [b'x' * 500]
+    assert main.next_copy_window(iter([]), 100, 100) == []
+
+
+def test_isolation_copies_bounded_windows(tmp_path):
+    pg_conn = FakePostgreSQL()
+    records = [b'%02d,%s\n' % (i, b'x' * 96) for i in range(50)]
+
+    result = main.copy_isolating_errors(pg_conn, 'docs', ['id', 'data'], ["FORMAT csv"], b'', b'', records,
+                                        str(tmp_path / 'docs.rejects.jsonl'), window=20, window_bytes=1000)
+
+    assert result == {'rows': 50, 'rejected': 0}
+    assert [len(data) for data in pg_conn.copied] == [1000] * 5
+    assert b''.join(pg_conn.copied) == b''.join(records)
@@ -0,0 +1,35 @@
+import csv
+import io
+
+import main
+
+COLUMNS = [('id', 'int', None, 'NO', None), ('name', 'varchar', 50, 'YES', None), ('photo', 'blob', None, 'YES', None),
+           ('doc', 'json', None, 'YES', None), ('tags', 'set', None, 'YES', None)]
+
+
+def test_csv_encoder_converts_columns():
+    encoder = main.make_row_encoder('csv', COLUMNS)
+    data = encoder.encode([(1, 'Ana, "la jefa"', b'\x00\xff', b'{"a": 1}', {'b', 'a'}),
+                           (2, None, None, None, None)])
+    rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+    assert rows == [['1', 'Ana, "la jefa"', '\\x00ff', '{"a": 1}', 'a,b'], ['2', '', '', '', '']]
+
+
+def test_csv_encoder_without_converters_passes_rows_through():
+    columns = COLUMNS[:2]
+    assert [main.csv_column_converter(col) for col in columns] == [None, None]
+    rows = [(1, 'a')]
+    assert main.build_row_converter(columns)(rows) is rows
+
+
+def test_csv_header_and_options():
+    encoder = main.make_row_encoder('csv', COLUMNS[:2], include_header=True)
+    assert encoder.header() == b'id,name\r\n'
+    assert encoder.copy_options() == ["FORMAT csv", "HEADER", "DELIMITER ','"]
+    assert main.make_row_encoder('csv', COLUMNS[:2]).header() == b''
+
+
+def test_csv_records_keep_quoted_newlines(tmp_path):
+    path = tmp_path / 'docs.csv'
+    path.write_bytes(b'id,name\r\n1,"dos\r\nlineas"\r\n2,b\r\n')
+    assert list(main.split_csv_records(str(path))) == [b'1,"dos\r\nlineas"\r\n', b'2,b\r\n']
@@ -0,0 +1,23 @@
+import argparse
+
+import main
+
+
+def index_args(jobs, index_jobs=None, index_memory_mb=4096):
+    return argparse.Namespace(jobs=jobs, index_jobs=index_jobs, index_memory_mb=index_memory_mb,
+                              parallel_maintenance_workers=2)
+
+
+def test_sessions_stay_within_memory_budget():
+    for jobs, memory_mb in [(4, 4096), (16, 512), (100, 1000), (3, 32)]:
+        args = index_args(jobs, index_memory_mb=memory_mb)
+        sessions = main.index_session_jobs(args)
+        per_session_mb = int(main.index_session_settings(args, sessions)['maintenance_work_mem'][:-2])
+        assert sessions * per_session_mb <= memory_mb
+
+
+def test_sessions_capped_with_warning(capsys):
+    assert main.index_session_jobs(index_args(4, index_jobs=32, index_memory_mb=512)) == 8
+    assert 'Aviso' in capsys.readouterr().out
+    assert main.index_session_jobs(index_args(4, index_memory_mb=512)) == 4
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,71 @@
+import io
+import struct
+
+import pytest
+
+import main
+from conftest import FakeMySQL
+
+COLUMNS = [('id', 'int', None, 'NO', None), ('data', 'longblob', None, 'YES', None)]
+CHUNK = {'index': 0, 'count': 1, 'pk_columns': ['id'], 'lower': None, 'upper': None}
+BLOB = bytes(range(256)) * 4
+
+
+def blob_table(sql, params):
+    if 'SUBSTRING' in sql:
+        position, length = params[0], params[1]
+        return [(BLOB[position - 1:position - 1 + length],)]
+    return [(1, None, len(BLOB))]
+
+
+def test_split_defers_oversized_values():
+    reader = main.LobReader(None, 'docs', COLUMNS, ['id'], 64)
+    inline, deferred = reader.split([(1, b'small', None), (2, None, 1000)])
+    assert inline == [(1, b'small')]
+    assert deferred[0][0] == 2
+    assert isinstance(deferred[0][1], main.LargeValue) and deferred[0][1].length == 1000
+
+
+@pytest.mark.parametrize('copy_format', ['csv', 'binary'])
+def test_single_oversized_lob_row(copy_format):
+    encoder = main.make_row_encoder(copy_format, COLUMNS)
+    stats = main.ColumnStats(COLUMNS)
+    stream = io.BytesIO()
+    mysql_conn = FakeMySQL(blob_table)
+
+    count = main.write_table_rows(mysql_conn, 'docs', stream, CHUNK, encoder, stats=stats, memory_budget=1024 * 1024,
+                                  lob_chunk_size=100)
+
+    assert count == 1 and stats.rows == 1
+    data = stream.getvalue()
+    if copy_format == 'csv':
+        assert data == b'1,\\x' + BLOB.hex().encode('ascii') + b'\r\n'
+    else:
+        body = data[len(main.PGCOPY_HEADER):-len(main.PGCOPY_TRAILER)]
+        assert body[:2] == struct.pack('!h', 2)
+        assert body.endswith(struct.pack('!i', len(BLOB)) + BLOB)
+    assert any('SUBSTRING' in sql for sql, _ in mysql_conn.executed)
+
+
+@pytest.mark.parametrize('copy_format', ['csv', 'binary'])
+def test_isolation_reread_defers_oversized_lob(copy_format):
+    encoder = main.make_row_encoder(copy_format, COLUMNS)
+    stats = main.ColumnStats(COLUMNS)
+    mysql_conn = FakeMySQL(blob_table)
+
+    records = list(main.iter_row_records(mysql_conn, 'docs', CHUNK, encoder, stats=stats, memory_budget=1024 * 1024,
+                                         lob_chunk_size=100))
+
+    stream = io.BytesIO()
+    main.write_table_rows(FakeMySQL(blob_table), 'docs', stream, CHUNK, encoder, lob_chunk_size=100)
+    assert encoder.header() + b''.join(records) + encoder.trailer() == stream.getvalue()
+    assert stats.rows == 1
+    assert 'IF(LENGTH(`data`) > 100' in mysql_conn.executed[0][0]
+    assert any('SUBSTRING' in sql for sql, _ in mysql_conn.executed)
+
+
+def test_empty_batches_are_accepted():
+    assert list(main.build_row_converter([('d', 'datetime', None, 'YES', None)])([])) == []
+    stats = main.ColumnStats(COLUMNS)
+    stats.update([], 0)
+    assert stats.as_dict()['rows'] == 0
@@ -0,0 +1,57 @@
+import main
+
+CHUNKS = [{'index': i, 'count': 3, 'pk_columns': ['id'], 'lower': i * 10 or None, 'upper': (i + 1) * 10 if i < 2 else None}
+          for i in range(3)]
+
+
+def interrupted_manifest(path):
+    manifest = main.MigrationManifest(path)
+    manifest.record('table_started', 'orders')
+    manifest.record('chunks_planned', 'orders', chunks=CHUNKS)
+    manifest.record('chunk_started', 'orders', chunk=0)
+    manifest.record('chunk_done', 'orders', chunk=0, position=10, rows=10, rejected=0, stats=None)
+    manifest.record('chunk_started', 'orders', chunk=1)
+    manifest.close()
+    return main.MigrationManifest(path, resume=True)
+
+
+def test_resume_clears_only_started_chunks(tmp_path, monkeypatch):
+    manifest = interrupted_manifest(str(tmp_path / 'manifest.jsonl'))
+    cleared = []
+    monkeypatch.setattr(main, 'clear_chunk_data', lambda pg_conn, table_name, chunk: cleared.append(chunk['index']) or True)
+    monkeypatch.setattr(main, 'load_table_data', lambda *args, **kwargs: {'rows': 10, 'rejected': 0, 'stats': None})
+
+    result = main.load_table_chunks(None, None, 'orders', [], CHUNKS, None, manifest=manifest, resuming=True)
+
+    assert result['rows'] == 20
+    assert cleared == [1]
+    assert manifest.table_state('orders')['started_chunks'] == {0, 1, 2}
+    manifest.close()
+
+
+def test_resume_without_start_events_clears_pending_chunks(tmp_path):
+    path = str(tmp_path / 'manifest.jsonl')
+    manifest = main.MigrationManifest(path)
+    manifest.record('chunks_planned', 'orders', chunks=CHUNKS)
+    manifest.record('chunk_done', 'orders', chunk=0, position=10, rows=10, rejected=0, stats=None)
+    manifest.close()
+
+    manifest = main.MigrationManifest(path, resume=True)
+    assert manifest.may_have_chunk_rows('orders', CHUNKS[1])
+    assert manifest.may_have_chunk_rows('orders', CHUNKS[2])
+    manifest.close()
+
+
+def test_restarted_table_is_no_longer_failed(tmp_path):
+    path = str(tmp_path / 'manifest.jsonl')
+    manifest = main.MigrationManifest(path)
+    manifest.record('table_started', 'orders', watermark=None)
+    manifest.record('table_failed', 'orders')
+    manifest.record('table_started', 'orders', watermark=['updated_at', '2024-01-01'])
+    assert manifest.table_state('orders')['status'] == 'started'
+    manifest.close()
+
+    manifest = main.MigrationManifest(path, resume=True)
+    state = manifest.table_state('orders')
+    assert (state['status'], state['watermark']) == ('started', ['updated_at', '2024-01-01'])
+    manifest.close()
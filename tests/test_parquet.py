@@ -0,0 +1,19 @@
+import pytest
+
+import main
+from conftest import FakeMySQL
+
+
+def test_numeric_columns_from_catalog():
+    mysql_conn = FakeMySQL(lambda sql, params: [('price', 12, 4), ('total', 65, 30)])
+    assert main.get_numeric_columns(mysql_conn, 'orders') == {'price': [12, 4], 'total': [65, 30]}
+    assert "DATA_TYPE IN ('decimal', 'numeric')" in mysql_conn.executed[0][0]
+
+
+def test_decimal_columns_are_exact_arrow_decimals():
+    pyarrow = pytest.importorskip('pyarrow')
+    column = ('price', 'decimal', None, 'YES', None)
+    assert main.arrow_type(column, [12, 4]) == pyarrow.decimal128(12, 4)
+    assert main.arrow_type(column, [65, 30]) == pyarrow.decimal256(65, 30)
+    assert main.arrow_type(column) == pyarrow.string()
+    assert main.arrow_type(('doc', 'json', None, 'YES', None)) == pyarrow.string()
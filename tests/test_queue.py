@@ -0,0 +1,138 @@
+import argparse
+import json
+import sqlite3
+
+import pytest
+
+import main
+from conftest import FakeMySQL, FakePostgreSQL
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = main.SqliteWorkQueue(sqlite3.connect(str(tmp_path / 'queue.db'), check_same_thread=False), 'work')
+    queue.setup(reset=True)
+    queue.put([('users', {'index': 0}), ('users', {'index': 1}), ('orders', {'index': 0})])
+    yield queue
+    queue.close()
+
+
+def test_lease_in_order_and_never_twice(queue):
+    first = queue.lease('w1', 60, 3)
+    second = queue.lease('w2', 60, 3)
+    assert (first['id'], first['table'], first['chunk']) == (0, 'users', {'index': 0})
+    assert second['id'] == 1
+    assert queue.lease('w3', 60, 3)['id'] == 2
+    assert queue.lease('w4', 60, 3) is None
+
+
+def test_expired_lease_is_taken_over(queue):
+    stale = queue.lease('w1', -1, 3)
+    taken = queue.lease('w2', 60, 3)
+    assert taken['id'] == stale['id'] and (taken['attempts'], taken['leases']) == (2, 2)
+    assert not queue.heartbeat(stale['id'], 'w1', 60)
+    assert not queue.complete(stale['id'], 'w1', {'rows': 1})
+    assert queue.complete(taken['id'], 'w2', {'rows': 1})
+    assert queue.counts()['done'] == 1
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    item = queue.lease('w1', 60, 2)
+    queue.fail(item['id'], 'w1', 'boom', 2)
+    assert queue.counts()['pending'] == 3
+    item = queue.lease('w1', 60, 2)
+    queue.fail(item['id'], 'w1', 'boom', 2)
+    assert queue.counts()['failed'] == 1
+    assert queue.lease('w1', 60, 2)['id'] == 1
+
+
+def test_expire_fails_exhausted_leases(queue):
+    queue.lease('w1', -1, 1)
+    assert queue.expire(1) == 1
+    assert queue.counts()['failed'] == 1
+    assert queue.items()[0][1:] == ('failed', None, 'arrendamiento caducado')
+
+
+def test_requeue_failed_keeps_lease_history(queue):
+    queue.lease('w1', -1, 1)
+    queue.expire(1)
+    assert queue.requeue_failed() == 1
+    item = queue.lease('w2', 60, 1)
+    assert item['id'] == 0 and (item['attempts'], item['leases']) == (1, 2)
+
+
+def test_meta_round_trip(queue):
+    assert queue.get_meta('catalog') is None
+    queue.set_meta('options', {'stream': True})
+    queue.set_meta('options', {'stream': False})
+    assert queue.get_meta('options') == {'stream': False}
+
+
+def test_fenced_commit_requires_the_lease(queue):
+    pg_conn = FakePostgreSQL()
+    item = queue.lease('w1', -1, 3)
+    fenced = main.LeaseFencedConnection(pg_conn, queue, item['id'], 'w1', 60)
+    fenced.commit()
+    assert pg_conn.executed[-1] == ('COMMIT', None)
+
+    queue._execute("UPDATE work SET lease_until = 0 WHERE id = 0")
+    queue.lease('w2', 60, 3)
+    with pytest.raises(main.LeaseLost):
+        fenced.commit()
+    assert pg_conn.executed[-1] == ('COMMIT', None) and len(pg_conn.executed) == 1
+
+
+def test_worker_clears_chunks_leased_before(queue, monkeypatch):
+    queue.lease('w0', -1, 1)
+    queue.expire(1)
+    queue.requeue_failed()
+    cleared = []
+    loaded = []
+    monkeypatch.setattr(main, 'connect_to_mysql', lambda *args: FakeMySQL(lambda sql, params: []))
+    monkeypatch.setattr(main, 'connect_pg_for_load', lambda args: FakePostgreSQL())
+    monkeypatch.setattr(main, 'clear_chunk_data', lambda conn, table, chunk: cleared.append((table, chunk)) or True)
+    monkeypatch.setattr(main, 'load_table_data',
+                        lambda mysql_conn, pg_conn, table, *args, **kwargs: loaded.append(table) or {'rows': 1})
+    args = argparse.Namespace(mysql_host='h', mysql_db='db', mysql_user='u', mysql_password='p', mysql_port=3306,
+                              lease_seconds=60, max_attempts=1, poll_interval=0)
+    catalog = {'tables': {'users': {'columns': []}, 'orders': {'columns': []}}}
+
+    assert main.run_queue_worker(queue, catalog, args, 'w1') == 3
+    assert cleared == [('users', {'index': 0})]
+    assert loaded == ['users', 'users', 'orders']
+    assert queue.counts()['done'] == 3
+
+
+def test_worker_logs_finished_chunks_not_tables(queue, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'connect_to_mysql', lambda *args: FakeMySQL(lambda sql, params: []))
+    monkeypatch.setattr(main, 'connect_pg_for_load', lambda args: FakePostgreSQL())
+    monkeypatch.setattr(main, 'load_table_data', lambda *args, **kwargs: {'rows': 5, 'rejected': 0, 'stats': {'bytes': 50}})
+    args = argparse.Namespace(mysql_host='h', mysql_db='db', mysql_user='u', mysql_password='p', mysql_port=3306,
+                              lease_seconds=60, max_attempts=1, poll_interval=0)
+    catalog = {'tables': {'users': {'columns': []}, 'orders': {'columns': []}}}
+    log_path = tmp_path / 'progress.jsonl'
+    progress = main.MigrationProgress({}, interval=0, log_path=str(log_path))
+
+    assert main.run_queue_worker(queue, catalog, args, 'w1', progress) == 3
+    progress.close()
+    events = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [(event['event'], event['table'], event['chunk']) for event in events if 'finished' in event['event']] == [
+        ('chunk_finished', 'users', 0), ('chunk_finished', 'users', 1), ('chunk_finished', 'orders', 0)]
+    assert main.calibrate_plan_rates([str(log_path)]) == main.DEFAULT_PLAN_RATES
+
+
+def test_local_workers_get_passwords_from_environment(monkeypatch):
+    args = argparse.Namespace(mysql_host='h', mysql_db='db', mysql_user='u', mysql_password='secreto', mysql_port=3306,
+                              pg_host='h', pg_db='db', pg_user='u', pg_password='admin', pg_port=5432, queue_name='work',
+                              lease_seconds=60, max_attempts=3, poll_interval=1, queue_file=None)
+    argv = main.local_worker_argv(args)
+    environment = main.local_worker_environment(args)
+    assert 'secreto' not in argv and 'admin' not in argv
+    assert (environment['MYSQLTOPG_MYSQL_PASSWORD'], environment['MYSQLTOPG_PG_PASSWORD']) == ('secreto', 'admin')
+
+    for variable, value in environment.items():
+        monkeypatch.setenv(variable, value)
+    parser = argparse.ArgumentParser()
+    main.add_connection_arguments(parser)
+    parsed = parser.parse_args(argv[:argv.index('--queue-name')])
+    assert (parsed.mysql_password, parsed.pg_password) == ('secreto', 'admin')
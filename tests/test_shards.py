@@ -0,0 +1,53 @@
+import main
+from conftest import FakeMySQL, FakePostgreSQL, read_stream
+
+COLUMNS = [('id', 'int', None, 'NO', None), ('name', 'varchar', 20, 'YES', None)]
+DATABASES = {
+    'information_schema': [],
+    'tenant_1': [(1, 'ana'), (2, 'luis')],
+    'tenant_2': [(1, 'otro')],
+}
+
+
+class ShardedMySQL(FakeMySQL):
+    def __init__(self, database):
+        super().__init__(self.answer)
+        self.initial = self.database = database
+
+    def answer(self, sql, params):
+        if sql.startswith('USE'):
+            self.database = sql.split('`')[1]
+            return []
+        return DATABASES[self.database]
+
+    def reconnect(self):
+        super().reconnect()
+        self.database = self.initial
+
+
+def test_use_shard_survives_reconnect():
+    mysql_conn = ShardedMySQL('information_schema')
+    main.use_shard(mysql_conn, None, 'tenant_1', None)
+    main.reconnect_mysql(mysql_conn)
+    assert mysql_conn.database == 'tenant_1'
+    assert [sql for sql, _ in mysql_conn.executed][-2:] == ['RECONNECT', 'USE `tenant_1`']
+
+
+def test_stream_reread_after_copy_error_stays_in_shard(tmp_path):
+    mysql_conn = ShardedMySQL('information_schema')
+    main.use_shard(mysql_conn, None, 'tenant_1', None)
+    copies = []
+
+    def copy(sql, stream):
+        if not copies:
+            copies.append(None)
+            raise RuntimeError('invalid input syntax')
+        copies.append(read_stream(stream))
+
+    encoder = main.make_row_encoder('binary', COLUMNS)
+    result = main.stream_table_data(mysql_conn, FakePostgreSQL(copy), 'users', COLUMNS, buffer_size=1, encoder=encoder,
+                                    reject_path=str(tmp_path / 'users.rejects.jsonl'))
+
+    assert result == {'rows': 2, 'rejected': 0}
+    assert ('RECONNECT', None) in mysql_conn.executed
+    assert b'ana' in copies[1] and b'otro' not in copies[1]
@@ -0,0 +1,42 @@
+import main
+
+COLUMNS = [('id', 'bigint', None, 'NO', None), ('parent_id', 'int', None, 'YES', None), ('name', 'varchar', 20, 'YES', None)]
+
+
+def test_column_stats_track_nulls_and_integer_max():
+    updates = []
+    stats = main.ColumnStats(COLUMNS, lambda rows, size: updates.append((rows, size)))
+    stats.update([(1, None, 'a'), (7, 3, None)], 20)
+    stats.update([(4, None, None)], 10)
+    stats.update([], 0)
+
+    assert stats.as_dict() == {'rows': 3, 'bytes': 30, 'nulls': {'parent_id': 2, 'name': 2},
+                               'max': {'id': 7, 'parent_id': 3}}
+    stats.reset()
+    assert updates[-1] == (-3, -30)
+    assert stats.as_dict()['max'] == {'id': None, 'parent_id': None}
+
+
+def test_merge_column_stats():
+    first = {'rows': 2, 'bytes': 10, 'nulls': {'name': 1}, 'max': {'id': 5, 'parent_id': None}}
+    second = {'rows': 3, 'bytes': 15, 'nulls': {'name': 2, 'parent_id': 1}, 'max': {'id': 4, 'parent_id': 9}}
+    total = main.merge_column_stats(main.merge_column_stats(None, first), second)
+    assert total == {'rows': 5, 'bytes': 25, 'nulls': {'name': 3, 'parent_id': 1}, 'max': {'id': 5, 'parent_id': 9}}
+    assert first['rows'] == 2
+
+
+def test_fetch_sizer_fits_rows_in_budget():
+    sizer = main.FetchSizer(memory_budget=100000, max_rows=1000, initial_rows=10)
+    assert sizer.size == 10
+    assert sizer.update(10, 10 * 1000) == 20
+    assert sizer.update(20, 20 * 1000) == 40
+    assert sizer.update(40, 40 * 1000) == 80
+    assert sizer.update(80, 80 * 1000) == 100
+    assert sizer.update(100, 100 * 50000) == 2
+    assert sizer.update(2, 2 * 10 ** 9) == 1
+
+
+def test_fetch_sizer_without_budget():
+    sizer = main.FetchSizer(max_rows=500, initial_rows=10)
+    assert sizer.size == 500
+    assert sizer.update(500, 10 ** 9) == 500